@@ -1,12 +1,13 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import matplotlib.pyplot as plt
 from datetime import time, timedelta, datetime
 import requests
 import pytz
 import os
 from tqdm import tqdm
-from time import sleep
+from time import sleep, perf_counter
 import random
 import logging
 import traceback
@@ -15,9 +16,23 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from scipy import stats
 import json
+import pickle
 import glob
 import argparse
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from collections import OrderedDict
+import threading
+import queue
+import socketserver
+import hashlib
+
+# Numba is optional: bar-loop kernels run as plain Python when it is missing
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 # Set up matplotlib to use 'Agg' backend
 import matplotlib
@@ -25,39 +40,58 @@ matplotlib.use('Agg')
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Run backtest with date range')
-    parser.add_argument('--from-date', required=True, help='Start date (YYYY-MM-DD)')
-    parser.add_argument('--to-date', required=True, help='End date (YYYY-MM-DD)')
+    parser.add_argument('--from-date', help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--to-date', help='End date (YYYY-MM-DD)')
     parser.add_argument('--starting-balance', type=float, default=100000, help='Starting balance')
     parser.add_argument('--output-format', choices=['json', 'text'], default='text', help='Output format')
-    return parser.parse_args()
+    parser.add_argument('--no-jit', action='store_true', help='Run bar-loop kernels as plain Python even if Numba is installed')
+    parser.add_argument('--explain-trades', action='store_true', help='Log why each Backside/Intraday Backside trigger fired and how each trade ended')
+    parser.add_argument('--workers', type=int, default=1, help='Simulate days on N worker processes, then size and compound in date order (output matches a sequential run; needs static Intraday Backside sizing)')
+    parser.add_argument('--prefetch-depth', type=int, default=2, help='Days loaded ahead of the simulator by a background thread (0 loads each day inline)')
+    parser.add_argument('--resume', action='store_true', help='Continue this date range from its checkpoint instead of starting over')
+    parser.add_argument('--checkpoint', metavar='PATH', help='Journal every finished day to PATH and keep it after the run, for a later --append-to')
+    parser.add_argument('--append-to', metavar='CHECKPOINT', help="Extend a previous run's checkpoint with the dates after its last day")
+    parser.add_argument('--monte-carlo', type=int, default=0, metavar='PATHS', help='After the backtest, re-price its fills under PATHS random draws of slippage, skips and partial fills')
+    parser.add_argument('--monte-carlo-seed', type=int, default=0, help='Seed for --monte-carlo')
+    parser.add_argument('--sweep', metavar='SPEC_JSON', help='Run a parameter sweep from a JSON grid/random spec and write parameter_sweep_results.csv')
+    parser.add_argument('--walk-forward', metavar='SPEC_JSON', help='Walk-forward optimization: sweep spec plus train_days/test_days/objective; writes the out-of-sample equity curve')
+    parser.add_argument('--sweep-workers', type=int, default=None, help='Worker processes for --sweep / --walk-forward (default: one per CPU)')
+    parser.add_argument('--serve', action='store_true', help='Stay up as a backtest worker answering JSON-RPC requests on stdin/stdout')
+    parser.add_argument('--socket', metavar='PATH', help='With --serve, listen on this Unix socket instead of stdin/stdout')
+    args = parser.parse_args()
+    if not args.serve and (args.from_date is None or args.to_date is None):
+        parser.error('--from-date and --to-date are required unless --serve is given')
+    return args
 
 # ============================================================================
 # CONFIGURATION SECTION
 # ============================================================================
 
+# Directories are created when a run first needs them, never at import
 current_dir = r'C:\Users\maxma\OneDrive\Desktop\Algo Tests'
 charts_dir = os.path.join(current_dir, 'trade_charts')
-os.makedirs(charts_dir, exist_ok=True)
 
-# Parse command line arguments
-args = parse_arguments()
+# Run settings: defaults for library use; the main block sets them from the command line
+START_DATE = None
+END_DATE = None
+initial_account_size = 100000
+output_format = 'text'
 
-# Use command line arguments instead of hardcoded values
-START_DATE = args.from_date
-END_DATE = args.to_date
-initial_account_size = args.starting_balance
-output_format = args.output_format
+# Compiled bar-loop kernels (only effective when Numba is installed)
+USE_JIT_KERNELS = NUMBA_AVAILABLE
+
+# Collect per-trade trigger/exit traces (off by default: the fast path never builds reason text)
+EXPLAIN_TRADES = False
 
 # Override the existing date configuration
 RUN_SINGLE_DATE = False  # Always run date range when using CLI args
-TARGET_DATE = args.from_date  # Not used when RUN_SINGLE_DATE is False
+TARGET_DATE = None  # Not used when RUN_SINGLE_DATE is False
 
 # Strategy Parameters
 commission_percentage = 0.4
 
 # Set up cache directory
 cache_dir = os.path.join(current_dir, 'data_cache')
-os.makedirs(cache_dir, exist_ok=True)
 
 # API Configuration
 POLYGON_BASE_URL = "https://api.polygon.io/v2"
@@ -69,6 +103,8 @@ risk_percentage_trade2 = 2.75
 min_share_price = 0.3
 min_gap_percentage = 50
 max_pmh_to_open_drop = 40
+GAPPER_STOP_1_PMH_MULTIPLIER = 1.2711  # leg 1 stop: PMH * this
+GAPPER_STOP_2_GAP_MULTIPLIER = 0.64  # leg 2 stop: 9:29 close + this * the gap
 
 # Position Sizing Configuration
 USE_STATIC_POSITION_SIZING = True
@@ -88,6 +124,7 @@ skip_trade_probability = 0
 slippage_probability = 100
 min_slippage_percentage = 0.66
 max_slippage_percentage = 0.66
+EXECUTION_SEED = 42  # keys the per-(date, ticker, strategy, leg) slippage streams, see fill_stream
 
 # Partial fill parameters
 partial_fill_frequency = 10
@@ -160,9 +197,17 @@ def initialize_caching_system():
         'size_mb': cache_size_mb
     }
 
-def apply_slippage(price, is_entry, is_short=True):
-    if random.randint(1, 100) <= slippage_probability:
-        slippage_percent = random.uniform(min_slippage_percentage, max_slippage_percentage) / 100
+def apply_slippage(price, is_entry, is_short=True, rng=None):
+    # Draws from rng (a fill_stream Generator) when given, otherwise from the global random module
+    if rng is None:
+        slipped = random.randint(1, 100) <= slippage_probability
+    else:
+        slipped = rng.integers(1, 101) <= slippage_probability
+    if slipped:
+        if rng is None:
+            slippage_percent = random.uniform(min_slippage_percentage, max_slippage_percentage) / 100
+        else:
+            slippage_percent = rng.uniform(min_slippage_percentage, max_slippage_percentage) / 100
         
         if is_short:
             if is_entry:
@@ -230,6 +275,127 @@ def filter_ticker_symbols(ticker):
     
     return True
 
+# ============================================================================
+# TIME & SESSION INDEX FUNCTIONS
+# ============================================================================
+
+EASTERN = pytz.timezone('US/Eastern')
+
+# Session boundaries expressed as minutes past midnight (US/Eastern)
+PRE_MARKET_START_MINUTE = 4 * 60
+MARKET_OPEN_MINUTE = 9 * 60 + 30
+MARKET_CLOSE_MINUTE = 16 * 60
+MINUTES_PER_DAY = 24 * 60
+
+MS_PER_MINUTE = 60 * 1000
+MS_PER_DAY = MINUTES_PER_DAY * MS_PER_MINUTE
+EST_OFFSET_MS = -5 * 60 * MS_PER_MINUTE
+
+# Eastern UTC offset (ms) keyed by Eastern calendar day number
+_et_offset_cache = {}
+
+def get_et_offset_ms(utc_ms: int) -> int:
+    """
+    UTC -> US/Eastern offset in milliseconds for the Eastern date containing utc_ms.
+    
+    The offset is looked up once per date (at noon) and cached. DST switches happen
+    at 2:00 AM on a Sunday, so a trading session never straddles one.
+    """
+    day_number = (int(utc_ms) + EST_OFFSET_MS) // MS_PER_DAY
+    offset = _et_offset_cache.get(day_number)
+    if offset is None:
+        noon_utc = datetime.fromtimestamp(day_number * 86400 + 17 * 3600, tz=pytz.utc)
+        offset = int(noon_utc.astimezone(EASTERN).utcoffset().total_seconds()) * 1000
+        _et_offset_cache[day_number] = offset
+    return offset
+
+def utc_ms_to_et_ms(utc_ms: np.ndarray) -> np.ndarray:
+    """Shift UTC epoch-ms to Eastern wall-clock epoch-ms using the cached per-date offsets."""
+    utc_ms = np.asarray(utc_ms, dtype=np.int64)
+    if len(utc_ms) == 0:
+        return utc_ms.copy()
+
+    day_numbers = (utc_ms + EST_OFFSET_MS) // MS_PER_DAY
+    if day_numbers[0] == day_numbers[-1]:
+        return utc_ms + get_et_offset_ms(utc_ms[0])
+
+    unique_days, inverse = np.unique(day_numbers, return_inverse=True)
+    offsets = np.array([get_et_offset_ms(day * MS_PER_DAY - EST_OFFSET_MS) for day in unique_days], dtype=np.int64)
+    return utc_ms + offsets[inverse]
+
+def et_minute_of_day(utc_ms: np.ndarray) -> np.ndarray:
+    return (utc_ms_to_et_ms(utc_ms) // MS_PER_MINUTE) % MINUTES_PER_DAY
+
+def et_timestamp(utc_ms: int) -> pd.Timestamp:
+    """Tz-aware Eastern Timestamp for reporting; keep epoch-ms everywhere else."""
+    return pd.Timestamp(int(utc_ms), unit='ms', tz='UTC').tz_convert(EASTERN)
+
+def et_timestamps(utc_ms: np.ndarray) -> pd.DatetimeIndex:
+    return pd.to_datetime(np.asarray(utc_ms, dtype=np.int64), unit='ms', utc=True).tz_convert(EASTERN)
+
+def timestamps_to_utc_ms(timestamps: pd.Series) -> np.ndarray:
+    """UTC epoch-ms from a numeric (already ms) or datetime column; naive datetimes are taken as UTC."""
+    if pd.api.types.is_numeric_dtype(timestamps):
+        return timestamps.to_numpy(dtype=np.int64)
+    if timestamps.dt.tz is None:
+        epoch = pd.Timestamp('1970-01-01')
+    else:
+        epoch = pd.Timestamp('1970-01-01', tz='UTC')
+    return ((timestamps - epoch) // pd.Timedelta(milliseconds=1)).to_numpy(dtype=np.int64)
+
+def ensure_time_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the t_ms / minute_of_day columns to a frame that did not come through preprocess_data."""
+    if 't_ms' not in df.columns:
+        df['t_ms'] = timestamps_to_utc_ms(df['t'])
+    if 'minute_of_day' not in df.columns:
+        df['minute_of_day'] = et_minute_of_day(df['t_ms'].to_numpy())
+    return df
+
+def calculate_minute_of_day(timestamps: pd.Series) -> np.ndarray:
+    """Integer minute-of-day (US/Eastern) for a numeric epoch-ms or datetime column."""
+    return et_minute_of_day(timestamps_to_utc_ms(timestamps))
+
+def minute_to_hhmm(minute_of_day: int) -> int:
+    return (minute_of_day // 60) * 100 + minute_of_day % 60
+
+def build_session_index(df: pd.DataFrame) -> Dict:
+    """
+    Build O(1) time-of-day lookups for a single ticker-day of minute bars.
+
+    Bars are expected in ascending time order, as returned by Polygon with sort=asc.
+    Uses the 'minute_of_day' column written by preprocess_data when present.
+    
+    Returns:
+        dict: minute_of_day array, bar_position lookup (minute -> first bar position or -1),
+              pre_market / rth (start, stop) position ranges and the positions of the
+              9:27-9:30 and 15:00 bars (-1 when missing)
+    """
+    if 'minute_of_day' in df.columns:
+        minute_of_day = df['minute_of_day'].to_numpy(dtype=np.int64)
+    else:
+        minute_of_day = calculate_minute_of_day(df['t'])
+
+    # Assign in reverse so the first bar wins when a minute appears twice
+    bar_position = np.full(MINUTES_PER_DAY, -1, dtype=np.int64)
+    bar_position[minute_of_day[::-1]] = np.arange(len(minute_of_day), dtype=np.int64)[::-1]
+
+    pre_market_start = int(np.searchsorted(minute_of_day, PRE_MARKET_START_MINUTE, side='left'))
+    market_open = int(np.searchsorted(minute_of_day, MARKET_OPEN_MINUTE, side='left'))
+    market_close = int(np.searchsorted(minute_of_day, MARKET_CLOSE_MINUTE, side='left'))
+
+    return {
+        'minute_of_day': minute_of_day,
+        'bar_position': bar_position,
+        'bar_count': len(minute_of_day),
+        'pre_market': (pre_market_start, market_open),
+        'rth': (market_open, market_close),
+        'bar_927': int(bar_position[9 * 60 + 27]),
+        'bar_928': int(bar_position[9 * 60 + 28]),
+        'bar_929': int(bar_position[9 * 60 + 29]),
+        'bar_930': int(bar_position[9 * 60 + 30]),
+        'bar_1500': int(bar_position[15 * 60])
+    }
+
 # ============================================================================
 # DATA FETCHING FUNCTIONS
 # ============================================================================
@@ -252,73 +418,76 @@ def calculate_daily_return(trades_df, starting_balance):
         print(f"Error calculating daily return: {e}", file=sys.stderr)
         return 0.0
 
+def json_results(trades_df, daily_return, starting_balance) -> Dict:
+    """The --output-format json result for a run's trades"""
+    if trades_df.empty:
+        output = {
+            'success': True,
+            'daily_return_percent': 0.0,
+            'starting_balance': starting_balance,
+            'final_account_value': starting_balance,
+            'total_gross_profit': 0.0,
+            'total_net_profit': 0.0,
+            'total_commission': 0.0,
+            'gapper_strategy_profit': 0.0,
+            'backside_strategy_profit': 0.0,
+            'intraday_backside_profit': 0.0,
+            'gapper_win_rate': 0.0,
+            'backside_win_rate': 0.0,
+            'intraday_win_rate': 0.0,
+            'max_drawdown': 0.0,
+            'final_percentage_gain': 0.0
+        }
+    else:
+        # Calculate totals
+        total_net_profit = trades_df['profit_loss'].sum()
+        total_commission = trades_df['commission'].sum()
+        total_gross_profit = total_net_profit + total_commission
+        final_account_value = starting_balance + total_net_profit
+        
+        # Calculate strategy-specific profits
+        gapper_trades = trades_df[trades_df['strategy'] == 'Gapper']
+        backside_trades = trades_df[trades_df['strategy'] == 'Backside']
+        intraday_trades = trades_df[trades_df['strategy'] == 'Intraday Backside']
+        
+        gapper_profit = gapper_trades['profit_loss'].sum() if not gapper_trades.empty else 0.0
+        backside_profit = backside_trades['profit_loss'].sum() if not backside_trades.empty else 0.0
+        intraday_profit = intraday_trades['profit_loss'].sum() if not intraday_trades.empty else 0.0
+        
+        # Calculate win rates
+        gapper_win_rate = (gapper_trades['profit_loss'] > 0).mean() if not gapper_trades.empty else 0.0
+        backside_win_rate = (backside_trades['profit_loss'] > 0).mean() if not backside_trades.empty else 0.0
+        intraday_win_rate = (intraday_trades['profit_loss'] > 0).mean() if not intraday_trades.empty else 0.0
+        
+        # Calculate max drawdown
+        equity_curve = calculate_equity_curve(trades_df)
+        drawdown = calculate_drawdown(equity_curve)
+        max_drawdown = drawdown.min() if not drawdown.empty else 0.0
+        
+        output = {
+            'success': True,
+            'daily_return_percent': daily_return,
+            'starting_balance': starting_balance,
+            'final_account_value': final_account_value,
+            'total_gross_profit': total_gross_profit,
+            'total_net_profit': total_net_profit,
+            'total_commission': total_commission,
+            'gapper_strategy_profit': gapper_profit,
+            'backside_strategy_profit': backside_profit,
+            'intraday_backside_profit': intraday_profit,
+            'gapper_win_rate': gapper_win_rate,
+            'backside_win_rate': backside_win_rate,
+            'intraday_win_rate': intraday_win_rate,
+            'max_drawdown': max_drawdown,
+            'final_percentage_gain': daily_return
+        }
+    
+    return output
+
 def output_json_results(trades_df, daily_return, starting_balance):
     """Output results in JSON format for Node.js consumption"""
     try:
-        if trades_df.empty:
-            output = {
-                'success': True,
-                'daily_return_percent': 0.0,
-                'starting_balance': starting_balance,
-                'final_account_value': starting_balance,
-                'total_gross_profit': 0.0,
-                'total_net_profit': 0.0,
-                'total_commission': 0.0,
-                'gapper_strategy_profit': 0.0,
-                'backside_strategy_profit': 0.0,
-                'intraday_backside_profit': 0.0,
-                'gapper_win_rate': 0.0,
-                'backside_win_rate': 0.0,
-                'intraday_win_rate': 0.0,
-                'max_drawdown': 0.0,
-                'final_percentage_gain': 0.0
-            }
-        else:
-            # Calculate totals
-            total_net_profit = trades_df['profit_loss'].sum()
-            total_commission = trades_df['commission'].sum()
-            total_gross_profit = total_net_profit + total_commission
-            final_account_value = starting_balance + total_net_profit
-            
-            # Calculate strategy-specific profits
-            gapper_trades = trades_df[trades_df['strategy'] == 'Gapper']
-            backside_trades = trades_df[trades_df['strategy'] == 'Backside']
-            intraday_trades = trades_df[trades_df['strategy'] == 'Intraday Backside']
-            
-            gapper_profit = gapper_trades['profit_loss'].sum() if not gapper_trades.empty else 0.0
-            backside_profit = backside_trades['profit_loss'].sum() if not backside_trades.empty else 0.0
-            intraday_profit = intraday_trades['profit_loss'].sum() if not intraday_trades.empty else 0.0
-            
-            # Calculate win rates
-            gapper_win_rate = (gapper_trades['profit_loss'] > 0).mean() if not gapper_trades.empty else 0.0
-            backside_win_rate = (backside_trades['profit_loss'] > 0).mean() if not backside_trades.empty else 0.0
-            intraday_win_rate = (intraday_trades['profit_loss'] > 0).mean() if not intraday_trades.empty else 0.0
-            
-            # Calculate max drawdown
-            equity_curve = calculate_equity_curve(trades_df)
-            drawdown = calculate_drawdown(equity_curve)
-            max_drawdown = drawdown.min() if not drawdown.empty else 0.0
-            
-            output = {
-                'success': True,
-                'daily_return_percent': daily_return,
-                'starting_balance': starting_balance,
-                'final_account_value': final_account_value,
-                'total_gross_profit': total_gross_profit,
-                'total_net_profit': total_net_profit,
-                'total_commission': total_commission,
-                'gapper_strategy_profit': gapper_profit,
-                'backside_strategy_profit': backside_profit,
-                'intraday_backside_profit': intraday_profit,
-                'gapper_win_rate': gapper_win_rate,
-                'backside_win_rate': backside_win_rate,
-                'intraday_win_rate': intraday_win_rate,
-                'max_drawdown': max_drawdown,
-                'final_percentage_gain': daily_return
-            }
-        
-        print(json.dumps(output))
-        
+        print(json.dumps(json_results(trades_df, daily_return, starting_balance)))
     except Exception as e:
         print(json.dumps({'success': False, 'error': str(e)}))
 
@@ -343,6 +512,7 @@ def fetch_daily_open_price(ticker: str, date_str: str) -> float | None:
         if data.get('resultsCount', 0) > 0 and 'results' in data and data['results']:
             daily_open = data['results'][0].get('o')
             if daily_open is not None:
+                os.makedirs(cache_dir, exist_ok=True)
                 with open(cache_file, 'w') as f:
                     f.write(str(daily_open))
                 sleep(0.12)
@@ -354,9 +524,8 @@ def fetch_daily_open_price(ticker: str, date_str: str) -> float | None:
     return None
 
 def get_previous_trading_day(date):
-    eastern = pytz.timezone('US/Eastern')
     if date.tzinfo is None:
-        date = eastern.localize(date)
+        date = EASTERN.localize(date)
     
     date_str = date.strftime('%Y-%m-%d')
     cache_file = os.path.join(cache_dir, f"prev_trading_day_{date_str}.txt")
@@ -364,7 +533,7 @@ def get_previous_trading_day(date):
     if os.path.exists(cache_file):
         with open(cache_file, 'r') as f:
             prev_date_str = f.read().strip()
-            return datetime.strptime(prev_date_str, '%Y-%m-%d').replace(tzinfo=eastern)
+            return datetime.strptime(prev_date_str, '%Y-%m-%d').replace(tzinfo=EASTERN)
     
     previous_day = date - timedelta(days=1)
     max_attempts = 10
@@ -378,6 +547,7 @@ def get_previous_trading_day(date):
             data = response.json()
             
             if 'results' in data and data['results']:
+                os.makedirs(cache_dir, exist_ok=True)
                 with open(cache_file, 'w') as f:
                     f.write(prev_date_str)
                 return previous_day
@@ -391,12 +561,11 @@ def get_previous_trading_day(date):
 
 def fetch_previous_close(symbol: str, date: datetime) -> float:
     try:
-        eastern = pytz.timezone('US/Eastern')
         if not isinstance(date, datetime):
             date = pd.to_datetime(date)
         
         if date.tzinfo is None:
-            date = eastern.localize(date)
+            date = EASTERN.localize(date)
         
         date_str = date.strftime('%Y-%m-%d')
         cache_file = os.path.join(cache_dir, f"{symbol}_prev_close_{date_str}.txt")
@@ -418,6 +587,7 @@ def fetch_previous_close(symbol: str, date: datetime) -> float:
             if 'results' in previous_close_data and previous_close_data['results']:
                 previous_close = previous_close_data['results'][0]['c']
                 
+                os.makedirs(cache_dir, exist_ok=True)
                 with open(cache_file, 'w') as f:
                     f.write(str(previous_close))
                 
@@ -458,6 +628,7 @@ def fetch_intraday_data(ticker: str, date: str) -> List[Dict]:
             if 'results' in data and data['results']:
                 df = pd.DataFrame(data['results'])
                 if not df.empty and all(col in df.columns for col in ['t', 'o', 'h', 'l', 'c', 'v']):
+                    os.makedirs(cache_dir, exist_ok=True)
                     df.to_csv(cache_file, index=False)
                     sleep(0.25)
                     return data['results']
@@ -494,23 +665,21 @@ def preprocess_data(data):
                     df['t'] = pd.to_numeric(df['t'], errors='coerce')
                 
                 if pd.api.types.is_numeric_dtype(df['t']):
-                    df['t'] = pd.to_datetime(df['t'], unit='ms')
+                    df = df.dropna(subset=['t'])
+                    df['t_ms'] = df['t'].to_numpy(dtype=np.int64)
                 else:
-                    df['t'] = pd.to_datetime(df['t'])
+                    df['t_ms'] = timestamps_to_utc_ms(pd.to_datetime(df['t']))
         except Exception:
             return None
         
-        eastern = pytz.timezone('US/Eastern')
-        if df['t'].dt.tz is None:
-            df['t'] = df['t'].dt.tz_localize('UTC').dt.tz_convert(eastern)
-        elif df['t'].dt.tz != eastern:
-            df['t'] = df['t'].dt.tz_convert(eastern)
-            
+        # Session filtering runs on integers; tz-aware Timestamps are only built for the kept rows
+        df['minute_of_day'] = et_minute_of_day(df['t_ms'].to_numpy())
         df = df[
-            ((df['t'].dt.time >= time(4, 0)) & (df['t'].dt.time < time(9, 30))) |  
-            ((df['t'].dt.time >= time(9, 28)) & (df['t'].dt.time <= time(16, 0)))
+            (df['minute_of_day'] >= PRE_MARKET_START_MINUTE) &
+            (df['minute_of_day'] <= MARKET_CLOSE_MINUTE)
         ].reset_index(drop=True)
         
+        df['t'] = et_timestamps(df['t_ms'].to_numpy())
         df['cumulative_volume'] = df['v'].cumsum()
         
         return df
@@ -522,87 +691,35 @@ def calculate_pre_market_high(df):
     try:
         if df is None or df.empty:
             return None
+        
+        if 'minute_of_day' in df.columns:
+            minute_of_day = df['minute_of_day'].to_numpy()
+        else:
+            minute_of_day = calculate_minute_of_day(df['t'])
             
-        if isinstance(df['t'].iloc[0], (int, float)):
-            df = df.copy()
-            df['t'] = pd.to_datetime(df['t'], unit='ms')
-            
-        eastern = pytz.timezone('US/Eastern')
-        if df['t'].dt.tz is None:
-            df['t'] = df['t'].dt.tz_localize('UTC').dt.tz_convert(eastern)
-        elif df['t'].dt.tz != eastern:
-            df['t'] = df['t'].dt.tz_convert(eastern)
-            
-        pre_market_data = df[
-            (df['t'].dt.time >= time(4, 0)) & 
-            (df['t'].dt.time < time(9, 30))
-        ]
+        pre_market_mask = (minute_of_day >= PRE_MARKET_START_MINUTE) & (minute_of_day < MARKET_OPEN_MINUTE)
         
-        if not pre_market_data.empty:
-            return pre_market_data['h'].max()
+        if pre_market_mask.any():
+            return df['h'].to_numpy()[pre_market_mask].max()
         else:
             return None
             
     except Exception:
         return None
 
-def get_accurate_day_open(market_hours_data: List[Dict], ticker: str, date_for_api: datetime, candidate_details: Dict = None) -> Tuple[float | None, time | None]:
-    if not market_hours_data:
-        api_open = fetch_daily_open_price(ticker, date_for_api.strftime('%Y-%m-%d'))
-        if api_open is not None:
-            return api_open, time(9, 30)
-        return None, None
-
-    eastern = pytz.timezone('US/Eastern')
-    market_open_time_threshold = time(9, 30)
-    max_acceptable_start_time = time(9, 35)
-
-    first_candle_found = None
-    first_candle_time_dt = None
-
-    for candle in market_hours_data:
-        try:
-            ts = candle.get('t')
-            if ts is None: 
-                continue
-
-            if isinstance(ts, (int, float)):
-                current_time_dt = pd.to_datetime(ts, unit='ms', utc=True).tz_convert(eastern)
-            elif isinstance(ts, str):
-                current_time_dt = pd.to_datetime(ts).tz_convert(eastern)
-            elif isinstance(ts, pd.Timestamp):
-                if ts.tzinfo is None: 
-                    current_time_dt = ts.tz_localize('UTC').tz_convert(eastern)
-                elif ts.tzinfo.zone != 'US/Eastern': 
-                    current_time_dt = ts.tz_convert(eastern)
-                else: 
-                    current_time_dt = ts
-            else: 
-                continue
-
-            current_time_obj = current_time_dt.time()
-
-            if current_time_obj >= market_open_time_threshold:
-                first_candle_found = candle
-                first_candle_time_dt = current_time_dt
-                break
-
-        except Exception:
-            continue
-
-    if first_candle_found:
-        day_open_from_candle = first_candle_found.get('o')
-        open_candle_time_obj = first_candle_time_dt.time() if first_candle_time_dt else None
-
-        if day_open_from_candle is not None and open_candle_time_obj is not None:
-            if open_candle_time_obj <= max_acceptable_start_time:
-                return day_open_from_candle, open_candle_time_obj
+def get_day_open_from_bars(bars: Dict[str, np.ndarray], session_index: Dict, ticker: str, date_for_api: datetime) -> Tuple[float | None, time | None]:
+    """Day open of a ticker-day: open of the first bar from 9:30 if it is no later than 9:35, else the API daily open."""
+    first_bar = session_index['rth'][0]
+    if first_bar < session_index['bar_count']:
+        first_minute = int(bars['minute_of_day'][first_bar])
+        if first_minute <= 9 * 60 + 35:
+            return float(bars['o'][first_bar]), time(first_minute // 60, first_minute % 60)
 
     # API Fallback
     api_open = fetch_daily_open_price(ticker, date_for_api.strftime('%Y-%m-%d'))
     if api_open is not None:
         return api_open, time(9, 30)
-        
+
     return None, None
 
 # ============================================================================
@@ -633,6 +750,7 @@ def cache_daily_candidates(date_str, candidates_dict):
         
         serializable_dict = convert_to_serializable(candidates_dict)
         
+        os.makedirs(cache_dir, exist_ok=True)
         with open(cache_file, 'w') as f:
             json.dump(serializable_dict, f, indent=2)
         
@@ -681,9 +799,8 @@ def fetch_candidates_for_date(date: datetime, api_key: str) -> Dict[str, List[Di
 
         logging.info(f"CACHE MISS: Fetching candidates for {date_str} from API")
         
-        eastern = pytz.timezone('US/Eastern')
         if date.tzinfo is None:
-            date = eastern.localize(date)
+            date = EASTERN.localize(date)
             
         previous_day = get_previous_trading_day(date)
         if previous_day is None:
@@ -740,26 +857,19 @@ def fetch_candidates_for_date(date: datetime, api_key: str) -> Dict[str, List[Di
             if intraday_data is not None:
                 df = pd.DataFrame(intraday_data)
                 if not df.empty:
-                    df['t'] = pd.to_datetime(df['t'], unit='ms')
-                    if df['t'].dt.tz is None:
-                        df['t'] = df['t'].dt.tz_localize('UTC').dt.tz_convert(eastern)
-                    elif df['t'].dt.tz != eastern:
-                        df['t'] = df['t'].dt.tz_convert(eastern)
+                    df['minute_of_day'] = et_minute_of_day(df['t'].to_numpy(dtype=np.int64))
                     
-                    # Get 9:28 candle with fallback
-                    candle_928 = df[df['t'].dt.time == time(9, 28)]
+                    session_index = build_session_index(df)
                     
-                    if candle_928.empty:
-                        candle_929 = df[df['t'].dt.time == time(9, 29)]
-                        if not candle_929.empty:
-                            candle_928 = candle_929
-                        else:
-                            candle_927 = df[df['t'].dt.time == time(9, 27)]
-                            if not candle_927.empty:
-                                candle_928 = candle_927
+                    # Get 9:28 candle with fallback
+                    candle_928_pos = session_index['bar_928']
+                    if candle_928_pos < 0:
+                        candle_928_pos = session_index['bar_929']
+                    if candle_928_pos < 0:
+                        candle_928_pos = session_index['bar_927']
                     
-                    if not candle_928.empty:
-                        price_928 = candle_928.iloc[0]['c']
+                    if candle_928_pos >= 0:
+                        price_928 = df['c'].iat[candle_928_pos]
                         gap_928 = ((price_928 - candidate['previous_close']) / candidate['previous_close']) * 100
                         
                         # Check for split if suspicious gap
@@ -777,6 +887,7 @@ def fetch_candidates_for_date(date: datetime, api_key: str) -> Dict[str, List[Di
                                         data = response.json()
                                         is_split = 'results' in data and len(data['results']) > 0
                                         
+                                        os.makedirs(cache_dir, exist_ok=True)
                                         with open(cache_file, 'w') as f:
                                             f.write(str(is_split))
                             except Exception:
@@ -787,8 +898,8 @@ def fetch_candidates_for_date(date: datetime, api_key: str) -> Dict[str, List[Di
                         
                         # Check criteria
                         if gap_928 >= 50 and price_928 >= 0.30:
-                            pre_market_data = df[df['t'].dt.time < time(9, 30)]
-                            pre_market_volume = pre_market_data['v'].sum() if not pre_market_data.empty else 0
+                            pre_market_mask = session_index['minute_of_day'] < MARKET_OPEN_MINUTE
+                            pre_market_volume = df['v'].to_numpy()[pre_market_mask].sum() if pre_market_mask.any() else 0
                             
                             if pre_market_volume >= 1000000:
                                 final_candidates.append({
@@ -979,7 +1090,6 @@ def find_intraday_backside_candidates(date: datetime, api_key: str) -> List[Dict
                     logging.warning(f"Error processing stock {stock.get('T', 'Unknown')}: {str(e)}")
                     continue
             
-            eastern = pytz.timezone('US/Eastern')
             for potential in pending_candidates:
                 ticker = potential['ticker']
                 
@@ -990,12 +1100,7 @@ def find_intraday_backside_candidates(date: datetime, api_key: str) -> List[Dict
                     if intraday_data:
                         df = pd.DataFrame(intraday_data)
                         if not df.empty:
-                            if pd.api.types.is_numeric_dtype(df['t']):
-                                df['t'] = pd.to_datetime(df['t'], unit='ms', utc=True).dt.tz_convert(eastern)
-                            else:
-                                df['t'] = pd.to_datetime(df['t'], utc=True).dt.tz_convert(eastern)
-                            
-                            market_hours = df[df['t'].dt.time >= time(9, 30)].reset_index(drop=True)
+                            market_hours = df[calculate_minute_of_day(df['t']) >= MARKET_OPEN_MINUTE].reset_index(drop=True)
                             if not market_hours.empty:
                                 market_hours['cum_vol'] = market_hours['v'].cumsum()
                                 day_open = market_hours.iloc[0]['o']
@@ -1028,6 +1133,7 @@ def find_intraday_backside_candidates(date: datetime, api_key: str) -> List[Dict
             candidates.sort(key=lambda x: -x['move_percent'])
             
             try:
+                os.makedirs(cache_dir, exist_ok=True)
                 with open(cache_file, 'w') as f:
                     json.dump(candidates, f)
                 logging.info(f"Successfully cached {len(candidates)} candidates to {cache_file}")
@@ -1099,486 +1205,1016 @@ def convert_candidates_to_dataframe(candidates_dict: Dict) -> Dict[str, pd.DataF
         'backside': backside_df
     }
 
+def load_strategy_dfs(start_date: datetime, end_date: datetime) -> Dict[str, pd.DataFrame]:
+    """Gapper and Backside candidate frames for a date range, with Date parsed."""
+    candidates_dict = fetch_candidates_for_date_range(start_date, end_date, POLYGON_API_KEY)
+    strategy_dfs = convert_candidates_to_dataframe(candidates_dict)
+    for key in strategy_dfs:
+        if 'Date' in strategy_dfs[key].columns:
+            strategy_dfs[key]['Date'] = pd.to_datetime(strategy_dfs[key]['Date'])
+    return strategy_dfs
+
 # ============================================================================
 # TRADING LOGIC HELPER FUNCTIONS
 # ============================================================================
 
-def calculate_min_overall_move_adj(previous_close: float) -> float:
-    aggression_factor = 1
-    if previous_close < 0.25:
-        return MIN_OVERALL_MOVE_PERCENT + (250 / (pow(aggression_factor, 7))) - 5
-    elif previous_close < 0.40:
-        return MIN_OVERALL_MOVE_PERCENT + (155 / (pow(aggression_factor, 7))) - 5
-    elif previous_close < 0.60:
-        return MIN_OVERALL_MOVE_PERCENT + (115 / (pow(aggression_factor, 7))) - 5
-    elif previous_close < 0.90:
-        return MIN_OVERALL_MOVE_PERCENT + (45 / (pow(aggression_factor, 7))) - 5
-    elif previous_close < 1.2:
-        return MIN_OVERALL_MOVE_PERCENT + (30 / (pow(aggression_factor, 7))) - 5
-    else:
-        return MIN_OVERALL_MOVE_PERCENT
+# Stuff Window look-backs: the window spans candles[index - N : index + 1]
+STUFF_WINDOW_LOOKBACK = 20
+STUFF_WINDOW_2_LOOKBACK = 5
 
-def calculate_high_of_day(candles: List[Dict], index: int) -> Tuple[float, float]:
-    high_of_day = max(c['h'] for c in candles[:index+1])
-    
-    market_open_time = time(9, 30)
-    current_time = pd.to_datetime(candles[index]['t']).time()
+# Moves a Stuff Window high / Stuff Candle Hard high must clear the open by: (close >= $8, close below $8)
+STUFF_WINDOW_MOVE = (1.00, 0.20)
+STUFF_WINDOW_2_MOVE = (1.40, 0.25)
+STUFF_CANDLE_HARD_MOVE = (0.70, 0.20)
+STUFF_CANDLE_HARD_VOLUME = (600000, 900000)
+
+# STUFF trigger gates
+STUFF_TRIGGER_MAX_CLOSE = 11.75
+STUFF_TRIGGER_MIN_VOLUME = 1000000
+
+def rolling_window_max(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing rolling maximum over the whole array in one vectorized pass.
     
-    if current_time < market_open_time:
-        high_of_day_rth = 0
-    else:
-        high_of_day_rth = max(c['h'] for c in candles[:index+1] 
-                             if pd.to_datetime(c['t']).time() >= market_open_time)
-    
-    return high_of_day, high_of_day_rth
-
-def is_pre_trigger_one(candles: List[Dict], index: int, previous_close: float, high_of_day: float, min_overall_move_adj: float) -> Tuple[bool, str]:
-    candle = candles[index]
-    change_from_close = 100 * (candle['h'] - previous_close) / previous_close
-    change_30_bars_ago = 100 * (candles[max(0, index-EXTENSION_OCCURS_WITHIN_BARS)]['c'] - previous_close) / previous_close
-    
-    if candle['h'] != high_of_day:
-        return False, "High is not equal to high of day"
-    if change_from_close <= min_overall_move_adj:
-        return False, f"Change from close ({change_from_close:.2f}) is not greater than min overall move ({min_overall_move_adj:.2f})"
-    if (change_from_close - change_30_bars_ago) <= MIN_EXTENSION_PERCENT:
-        return False, f"Extension ({change_from_close - change_30_bars_ago:.2f}) is not greater than {MIN_EXTENSION_PERCENT}%"
-    
-    return True, "Pre-Trigger One conditions met"
-
-def is_pre_trigger_two(candle: Dict, high_of_day: float, previous_close: float) -> Tuple[bool, str]:
-    if high_of_day == previous_close:
-        return False, "High of day is equal to previous close"
-    
-    pullback = (100 * (high_of_day - candle['c']) / (high_of_day - previous_close))
-    
-    if np.isnan(pullback) or np.isinf(pullback):
-        return False, f"Invalid pullback calculation"
-    
-    if pullback <= MIN_PULLBACK_PERCENT:
-        return False, f"Pullback ({pullback:.2f}%) is not greater than {MIN_PULLBACK_PERCENT}%"
-    
-    return True, f"Pre-Trigger Two conditions met with pullback of {pullback:.2f}%"
-
-def is_stuff_window(candles: List[Dict], index: int) -> Tuple[bool, str]:
-    if index < 20:
-        return False, "Not enough candles for Stuff Window check"
-    open_20_bars_ago = candles[index - 20]['o']
-    highest_high = max(candle['h'] for candle in candles[index-20:index+1])
-    price_condition = 1.00 if candles[index]['c'] >= 8 else 0.20
-    if highest_high - open_20_bars_ago <= price_condition:
-        return False, f"Highest high ({highest_high:.2f}) not more than ${price_condition:.2f} above open 20 bars ago ({open_20_bars_ago:.2f})"
-    if candles[index]['c'] > open_20_bars_ago:
-        return False, f"Current close ({candles[index]['c']:.2f}) not below open 20 bars ago ({open_20_bars_ago:.2f})"
-    return True, "Stuff Window conditions met"
-
-def is_stuff_window_2(candles: List[Dict], index: int) -> Tuple[bool, str]:
-    if index < 5:
-        return False, "Not enough candles for Stuff Window 2 check"
-    open_5_bars_ago = candles[index - 5]['o']
-    highest_high = max(candle['h'] for candle in candles[index-5:index+1])
-    price_condition = 1.40 if candles[index]['c'] >= 8 else 0.25
-    if highest_high - open_5_bars_ago <= price_condition:
-        return False, f"Highest high ({highest_high:.2f}) not more than ${price_condition:.2f} above open 5 bars ago ({open_5_bars_ago:.2f})"
-    if candles[index]['c'] > open_5_bars_ago:
-        return False, f"Current close ({candles[index]['c']:.2f}) not below open 5 bars ago ({open_5_bars_ago:.2f})"
-    return True, "Stuff Window 2 conditions met"
-
-def is_stuff_candle_hard(candle: Dict) -> Tuple[bool, str]:
-    price_condition = 0.70 if candle['c'] >= 8 else 0.20
-    volume_condition = 600000 if candle['c'] >= 8 else 900000
-    if candle['h'] - candle['o'] <= price_condition:
-        return False, f"High ({candle['h']:.2f}) not more than ${price_condition:.2f} above open ({candle['o']:.2f})"
-    if candle['c'] > candle['o']:
-        return False, f"Close ({candle['c']:.2f}) not below open ({candle['o']:.2f})"
-    if candle['v'] <= volume_condition:
-        return False, f"Volume ({candle['v']}) not greater than {volume_condition}"
-    return True, "Stuff Candle Hard conditions met"
-
-def check_stuff_trigger(candles: List[Dict], index: int, pre_trigger_two_count: int, previous_close: float, 
-                       stuff_trigger_count: int, high_of_day: float, high_of_day_rth: float) -> Tuple[bool, List[str]]:
-    candle = candles[index]
-    debug_messages = []
+    result[i] == max(values[i - window + 1 : i + 1]); NaN until a full window exists.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = sliding_window_view(values, window).max(axis=1)
+    return result
+
+def compute_stuff_window_highs(highs: np.ndarray) -> Dict[int, np.ndarray]:
+    """Highest high of every Stuff Window for the whole day, keyed by look-back."""
+    return {
+        lookback: rolling_window_max(highs, lookback + 1)
+        for lookback in (STUFF_WINDOW_LOOKBACK, STUFF_WINDOW_2_LOOKBACK)
+    }
 
-    if stuff_trigger_count >= 4:
-        debug_messages.append("STUFF trigger count is already 4 or more")
-        return False, debug_messages
-
-    stuff_window, sw_msg = is_stuff_window(candles, index)
-    stuff_window_2, sw2_msg = is_stuff_window_2(candles, index)
-    stuff_candle_hard, sch_msg = is_stuff_candle_hard(candle)
-    debug_messages.extend([sw_msg, sw2_msg, sch_msg])
-
-    stuff_condition = (
-        (stuff_window and not is_stuff_window(candles, index-1)[0]) or
-        (stuff_window_2 and not is_stuff_window_2(candles, index-1)[0]) or
-        stuff_candle_hard
+def get_cumulative_volume(df: pd.DataFrame) -> np.ndarray:
+    """Prefix sums of bar volume; reuses the cumulative_volume column written by preprocess_data."""
+    if 'cumulative_volume' in df.columns:
+        return df['cumulative_volume'].to_numpy()
+    return df['v'].cumsum().to_numpy()
+
+# (price below, extra move %) steps for low-priced names; at or above the last step the base move applies
+MIN_OVERALL_MOVE_PRICE_STEPS = ((0.25, 250), (0.40, 155), (0.60, 115), (0.90, 45), (1.2, 30))
+
+def calculate_min_overall_move_adj(previous_close: float) -> float:
+    aggression_factor = 1
+    for price_below, extra_move in MIN_OVERALL_MOVE_PRICE_STEPS:
+        if previous_close < price_below:
+            return MIN_OVERALL_MOVE_PERCENT + (extra_move / (pow(aggression_factor, 7))) - 5
+    return MIN_OVERALL_MOVE_PERCENT
+
+def calculate_min_overall_move_adj_array(prices: np.ndarray) -> np.ndarray:
+    """calculate_min_overall_move_adj for every element of prices."""
+    aggression_factor = 1
+    return np.select(
+        [prices < price_below for price_below, _ in MIN_OVERALL_MOVE_PRICE_STEPS],
+        [MIN_OVERALL_MOVE_PERCENT + (extra_move / (pow(aggression_factor, 7))) - 5 for _, extra_move in MIN_OVERALL_MOVE_PRICE_STEPS],
+        default=MIN_OVERALL_MOVE_PERCENT
     )
 
-    if not stuff_condition:
-        debug_messages.append("No Stuff condition met")
-        return False, debug_messages
+# Reasons are (code, *values) tuples; the text is only built by format_reason when someone reads it
+REASON_TEMPLATES = {
+    'not_enough_candles': "Not enough candles for {} check",
+    'window_high_too_low': "Highest high ({:.2f}) not more than ${:.2f} above open {} bars ago ({:.2f})",
+    'window_close_not_below': "Current close ({:.2f}) not below open {} bars ago ({:.2f})",
+    'candle_high_too_low': "High ({:.2f}) not more than ${:.2f} above open ({:.2f})",
+    'candle_close_not_below': "Close ({:.2f}) not below open ({:.2f})",
+    'candle_volume_too_low': "Volume ({}) not greater than {}",
+    'conditions_met': "{} conditions met",
+    'high_not_high_of_day': "High is not equal to high of day",
+    'move_too_small': "Change from {} ({:.2f}) is not greater than min overall move ({:.2f})",
+    'extension_too_small': "Extension ({:.2f}) is not greater than {}%",
+    'stuff_count_reached': "STUFF trigger count is already 4 or more",
+    'no_stuff_condition': "No Stuff condition met",
+    'no_pre_trigger': "Neither Pre-Trigger Two count > 0 nor Pre-Trigger One met",
+    'close_too_high': "Close ({:.2f}) not below ${:.2f}",
+    'total_volume_too_low': "Total volume ({}) not greater than {:,}",
+    'stuff_trigger_met': "All STUFF trigger conditions met",
+    'trigger_price_excluded': "Stuff trigger met but trigger price ${:.2f} in losing $1-2 range - skipping",
+    'trigger_detected': "Trigger detected: trigger_price={}, will enter next candle",
+    'risk_non_positive': "Risk per share non-positive, skipping trade",
+    'trade_entered': "Trade entered: entry_price={} (next candle open), shares={}, stop_loss={}",
+    'halt_stop_hit': "Halt gap stop loss hit: exit_price={}, total_pnl={}",
+    'stop_hit': "Stop loss hit: exit_price={}, total_pnl={}",
+    'eod_exit': "EOD exit: exit_price={}, total_pnl={}",
+    'trigger_components': "StuffWindow={}, StuffWindow2={}, StuffCandleHard={}, cumulative volume={:,}"
+}
 
-    pre_trigger_one, pt1_msg = is_pre_trigger_one(candles, index, previous_close, high_of_day, 
-                                                 calculate_min_overall_move_adj(previous_close))
-    debug_messages.append(pt1_msg)
+def format_reason(reason: Tuple) -> str:
+    return REASON_TEMPLATES[reason[0]].format(*reason[1:])
 
-    if not (pre_trigger_two_count > 0 or pre_trigger_one):
-        debug_messages.append("Neither Pre-Trigger Two count > 0 nor Pre-Trigger One met")
-        return False, debug_messages
+def log_trade_trace(ticker: str, strategy: str, trace: List[Tuple], candle_times) -> None:
+    """Write an explain-mode trace of (bar, reason) entries to the log."""
+    for bar, reason in trace:
+        logging.info(f"[explain] {strategy} {ticker} @ {candle_times[bar]}: {format_reason(reason)}")
 
-    if candle['c'] >= 11.75:
-        debug_messages.append(f"Close ({candle['c']:.2f}) not below $11.75")
-        return False, debug_messages
+# ============================================================================
+# SIGNAL FEATURE FUNCTIONS
+# ============================================================================
 
-    total_volume = sum(c['v'] for c in candles[:index+1])
-    if total_volume <= 1000000:
-        debug_messages.append(f"Total volume ({total_volume}) not greater than 1,000,000")
-        return False, debug_messages
+def extract_bar_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Typed column arrays for one ticker-day (expects the preprocess_data time columns)."""
+    ensure_time_columns(df)
+    return {
+        't_ms': df['t_ms'].to_numpy(dtype=np.int64),
+        'minute_of_day': df['minute_of_day'].to_numpy(dtype=np.int64),
+        'o': df['o'].to_numpy(dtype=np.float64),
+        'h': df['h'].to_numpy(dtype=np.float64),
+        'l': df['l'].to_numpy(dtype=np.float64),
+        'c': df['c'].to_numpy(dtype=np.float64),
+        'v': df['v'].to_numpy(),
+        'cumulative_volume': get_cumulative_volume(df)
+    }
 
-    debug_messages.append("All STUFF trigger conditions met")
-    return True, debug_messages
+def calculate_stuff_window_signal(opens: np.ndarray, closes: np.ndarray, window_highs: np.ndarray, lookback: int,
+                                  large_move: float, small_move: float, strict_close: bool = False,
+                                  require_positive: bool = False) -> np.ndarray:
+    """
+    Whole-day Stuff Window flags: the window high is more than large_move/small_move (close >= $8 / below)
+    above the open `lookback` bars ago and the close is back at or below (strictly below) that open.
+    """
+    signal = np.zeros(len(closes), dtype=bool)
+    if len(closes) <= lookback:
+        return signal
+
+    open_bars_ago = opens[:-lookback]
+    close = closes[lookback:]
+    highest_high = window_highs[lookback:]
+    price_condition = np.where(close >= 8, large_move, small_move)
+
+    # Comparisons keep the original per-candle form so NaN bars resolve the same way
+    if strict_close:
+        met = (highest_high - open_bars_ago > price_condition) & (close < open_bars_ago)
+    else:
+        met = ~(highest_high - open_bars_ago <= price_condition) & ~(close > open_bars_ago)
+    if require_positive:
+        met &= (open_bars_ago > 0) & (highest_high > 0)
+    signal[lookback:] = met
+    return signal
+
+def calculate_stuff_candle_hard_signal(opens: np.ndarray, highs: np.ndarray, closes: np.ndarray, volumes: np.ndarray,
+                                       strict_close: bool = False, require_positive: bool = False) -> np.ndarray:
+    price_condition = np.where(closes >= 8, *STUFF_CANDLE_HARD_MOVE)
+    volume_condition = np.where(closes >= 8, *STUFF_CANDLE_HARD_VOLUME)
+
+    if strict_close:
+        signal = (highs - opens > price_condition) & (closes < opens) & (volumes > volume_condition)
+    else:
+        signal = ~(highs - opens <= price_condition) & ~(closes > opens) & ~(volumes <= volume_condition)
+    if require_positive:
+        signal &= opens > 0
+    return signal
+
+def first_bar_of_signal(signal: np.ndarray) -> np.ndarray:
+    """True where a signal turns on (it was off on the previous bar)."""
+    previous = np.zeros(len(signal), dtype=bool)
+    previous[1:] = signal[:-1]
+    return signal & ~previous
+
+def is_valid_ohlc(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Non-negative prices with the high/low bracketing open and close."""
+    non_negative = (o >= 0) & (h >= 0) & (l >= 0) & (c >= 0)
+    illogical = (h < np.maximum(np.maximum(o, l), c)) | (l > np.minimum(np.minimum(o, h), c))
+    return non_negative & ~illogical
+
+# How each strategy reads the shared signal library. The reference price is the previous
+# close for Backside and the day open for Intraday Backside.
+SIGNAL_PROFILES = {
+    'Backside': {
+        'session': 'day',                  # bars the features run over: 'day' (pre-market included) or 'rth'
+        'strict_close': False,             # Stuff close must be strictly below the look-back open
+        'require_positive': False,         # Stuff signals need positive opens / window highs
+        'edge_triggered_windows': True,    # Stuff Windows only count on the bar they turn on
+        'valid_bars_only': False,          # running high skips bars failing is_valid_ohlc
+        'seed_high_with_reference': False, # running high starts at the reference price
+        'move_threshold_from': 'reference',# min overall move from the reference price or each bar's close
+        'session_volume': False,           # cumulative volume restarts at the first bar of the session
+        'inclusive_volume_gate': False     # volume gate passes at exactly STUFF_TRIGGER_MIN_VOLUME
+    },
+    'Intraday Backside': {
+        'session': 'rth',
+        'strict_close': True,
+        'require_positive': True,
+        'edge_triggered_windows': False,
+        'valid_bars_only': True,
+        'seed_high_with_reference': True,
+        'move_threshold_from': 'close',
+        'session_volume': True,
+        'inclusive_volume_gate': True
+    }
+}
 
-def check_intraday_stuff_trigger(candles: List[Dict], index: int, pre_trigger_two_count: int, 
-                       stuff_trigger_count: int, high_of_day: float) -> Tuple[bool, List[str]]:
+def compute_signal_features(bars: Dict[str, np.ndarray], reference_price: float, profile: Dict) -> Dict[str, np.ndarray]:
+    """
+    Whole-day signal columns shared by Backside and Intraday Backside, one entry per bar.
     
-    candle = candles[index]
-    debug_messages = []
-
-    if stuff_trigger_count >= 4:
-        debug_messages.append("STUFF trigger count is already 4 or more")
-        return False, debug_messages
-
-    stuff_window, sw_msg = check_intraday_stuff_window(candles, index)
-    stuff_window_2, sw2_msg = check_intraday_stuff_window_2(candles, index)
-    stuff_candle_hard, sch_msg = check_intraday_stuff_candle_hard(candle)
-    debug_messages.extend([sw_msg, sw2_msg, sch_msg])
-
-    stuff_condition = (
-        (stuff_window and not check_intraday_stuff_window(candles, index-1)[0]) or
-        (stuff_window_2 and not check_intraday_stuff_window_2(candles, index-1)[0]) or
-        stuff_candle_hard
+    The only implementation of the STUFF trigger conditions: the bar kernels and explain
+    mode both read these arrays. profile is one of SIGNAL_PROFILES.
+    """
+    o, h, l, c = bars['o'], bars['h'], bars['l'], bars['c']
+    bar_count = len(c)
+    strict_close, require_positive = profile['strict_close'], profile['require_positive']
+
+    valid = is_valid_ohlc(o, h, l, c)
+    high_of_day = np.maximum.accumulate(np.where(valid, h, -np.inf) if profile['valid_bars_only'] else h)
+    if profile['seed_high_with_reference']:
+        high_of_day = np.maximum(reference_price, high_of_day)
+    regular_session = bars['minute_of_day'] >= MARKET_OPEN_MINUTE
+    high_of_day_rth = np.where(regular_session, np.maximum.accumulate(np.where(regular_session, h, -np.inf)), 0.0)
+    window_highs = compute_stuff_window_highs(h)
+
+    stuff_window = calculate_stuff_window_signal(o, c, window_highs[STUFF_WINDOW_LOOKBACK], STUFF_WINDOW_LOOKBACK,
+                                                 *STUFF_WINDOW_MOVE, strict_close, require_positive)
+    stuff_window_2 = calculate_stuff_window_signal(o, c, window_highs[STUFF_WINDOW_2_LOOKBACK], STUFF_WINDOW_2_LOOKBACK,
+                                                   *STUFF_WINDOW_2_MOVE, strict_close, require_positive)
+    stuff_candle_hard = calculate_stuff_candle_hard_signal(o, h, c, bars['v'], strict_close, require_positive)
+    if profile['edge_triggered_windows']:
+        stuff_condition = first_bar_of_signal(stuff_window) | first_bar_of_signal(stuff_window_2) | stuff_candle_hard
+    else:
+        stuff_condition = stuff_window | stuff_window_2 | stuff_candle_hard
+
+    change_from_reference = 100 * (h - reference_price) / reference_price
+    closes_bars_ago = c[np.maximum(np.arange(bar_count) - EXTENSION_OCCURS_WITHIN_BARS, 0)]
+    change_bars_ago = 100 * (closes_bars_ago - reference_price) / reference_price
+    extension = change_from_reference - change_bars_ago
+    if profile['move_threshold_from'] == 'close':
+        min_overall_move_adj = calculate_min_overall_move_adj_array(c)
+    else:
+        min_overall_move_adj = calculate_min_overall_move_adj(reference_price)
+    pre_trigger_one = (
+        (h == high_of_day) &
+        ~(change_from_reference <= min_overall_move_adj) &
+        ~(extension <= MIN_EXTENSION_PERCENT)
     )
+    highest_move = ((high_of_day - reference_price) / reference_price) * 100
 
-    if not stuff_condition:
-        debug_messages.append("No Stuff condition met")
-        return False, debug_messages
+    with np.errstate(divide='ignore', invalid='ignore'):
+        close_pullback = (100 * (high_of_day - c) / (high_of_day - reference_price))
+        low_pullback = np.where(high_of_day > reference_price, ((high_of_day - l) / (high_of_day - reference_price)) * 100, 0.0)
+    pre_trigger_two = (high_of_day != reference_price) & np.isfinite(close_pullback) & (close_pullback > MIN_PULLBACK_PERCENT)
 
-    min_overall_move_adj = calculate_min_overall_move_adj(candle['c'])
-    pre_trigger_one, pt1_msg = check_intraday_pre_trigger_one(candles, index, high_of_day, min_overall_move_adj)
-    debug_messages.append(pt1_msg)
+    if profile['session_volume']:
+        cumulative_volume = np.cumsum(bars['v'].astype(np.int64))
+    else:
+        cumulative_volume = bars['cumulative_volume']
+    if profile['inclusive_volume_gate']:
+        volume_ok = cumulative_volume >= STUFF_TRIGGER_MIN_VOLUME
+    else:
+        volume_ok = ~(cumulative_volume <= STUFF_TRIGGER_MIN_VOLUME)
 
-    if not (pre_trigger_two_count > 0 or pre_trigger_one):
-        debug_messages.append("Neither Pre-Trigger Two count > 0 nor Pre-Trigger One met")
-        return False, debug_messages
+    return {
+        'valid': valid,
+        'high_of_day': high_of_day,
+        'high_of_day_rth': high_of_day_rth,
+        'stuff_window': stuff_window,
+        'stuff_window_high': window_highs[STUFF_WINDOW_LOOKBACK],
+        'stuff_window_2': stuff_window_2,
+        'stuff_window_2_high': window_highs[STUFF_WINDOW_2_LOOKBACK],
+        'stuff_candle_hard': stuff_candle_hard,
+        'stuff_condition': stuff_condition,
+        'extension': extension,
+        'pre_trigger_one': pre_trigger_one,
+        'highest_move': highest_move,
+        'close_pullback': close_pullback,
+        'low_pullback': low_pullback,
+        'pre_trigger_two': pre_trigger_two,
+        'below_max_close': ~(c >= STUFF_TRIGGER_MAX_CLOSE),
+        'cumulative_volume': cumulative_volume,
+        'volume_ok': volume_ok
+    }
 
-    if candle['c'] >= 11.75:
-        debug_messages.append(f"Close ({candle['c']:.2f}) not below $11.75")
-        return False, debug_messages
+def stuff_window_reason(bars: Dict[str, np.ndarray], features: Dict[str, np.ndarray], i: int, window: str,
+                        name: str, lookback: int, moves: Tuple[float, float]) -> Tuple:
+    if i < lookback:
+        return ('not_enough_candles', name)
+    if features[window][i]:
+        return ('conditions_met', name)
+    open_bars_ago, close = bars['o'][i - lookback], bars['c'][i]
+    highest_high = features[f'{window}_high'][i]
+    price_condition = moves[0] if close >= 8 else moves[1]
+    if highest_high - open_bars_ago <= price_condition:
+        return ('window_high_too_low', highest_high, price_condition, lookback, open_bars_ago)
+    return ('window_close_not_below', close, lookback, open_bars_ago)
+
+def stuff_candle_hard_reason(bars: Dict[str, np.ndarray], features: Dict[str, np.ndarray], i: int) -> Tuple:
+    if features['stuff_candle_hard'][i]:
+        return ('conditions_met', 'Stuff Candle Hard')
+    o, h, c, v = bars['o'][i], bars['h'][i], bars['c'][i], bars['v'][i]
+    price_condition = STUFF_CANDLE_HARD_MOVE[0] if c >= 8 else STUFF_CANDLE_HARD_MOVE[1]
+    volume_condition = STUFF_CANDLE_HARD_VOLUME[0] if c >= 8 else STUFF_CANDLE_HARD_VOLUME[1]
+    if h - o <= price_condition:
+        return ('candle_high_too_low', h, price_condition, o)
+    if c > o:
+        return ('candle_close_not_below', c, o)
+    return ('candle_volume_too_low', v, volume_condition)
+
+def pre_trigger_one_reason(bars: Dict[str, np.ndarray], features: Dict[str, np.ndarray], i: int, reference_price: float) -> Tuple:
+    if features['pre_trigger_one'][i]:
+        return ('conditions_met', 'Pre-Trigger One')
+    if bars['h'][i] != features['high_of_day'][i]:
+        return ('high_not_high_of_day',)
+    change_from_reference = 100 * (bars['h'][i] - reference_price) / reference_price
+    min_overall_move_adj = calculate_min_overall_move_adj(reference_price)
+    if change_from_reference <= min_overall_move_adj:
+        return ('move_too_small', 'close', change_from_reference, min_overall_move_adj)
+    return ('extension_too_small', features['extension'][i], MIN_EXTENSION_PERCENT)
+
+def explain_stuff_trigger(bars: Dict[str, np.ndarray], features: Dict[str, np.ndarray], i: int, reference_price: float,
+                          stuff_trigger_count: int, pre_trigger_two_count: int) -> List[Tuple]:
+    """
+    Reasons bar i of a Backside day did or did not fire a STUFF trigger, in the order the
+    trigger checks them. Reads the day's cached signal_features('Backside', reference_price)
+    and the bars they were computed on, so the text always agrees with the simulator.
+    """
+    if stuff_trigger_count >= 4:
+        return [('stuff_count_reached',)]
+    reasons = [
+        stuff_window_reason(bars, features, i, 'stuff_window', 'Stuff Window', STUFF_WINDOW_LOOKBACK, STUFF_WINDOW_MOVE),
+        stuff_window_reason(bars, features, i, 'stuff_window_2', 'Stuff Window 2', STUFF_WINDOW_2_LOOKBACK, STUFF_WINDOW_2_MOVE),
+        stuff_candle_hard_reason(bars, features, i)
+    ]
+    if not features['stuff_condition'][i]:
+        return reasons + [('no_stuff_condition',)]
+    reasons.append(pre_trigger_one_reason(bars, features, i, reference_price))
+    if not (pre_trigger_two_count > 0 or features['pre_trigger_one'][i]):
+        return reasons + [('no_pre_trigger',)]
+    if not features['below_max_close'][i]:
+        return reasons + [('close_too_high', bars['c'][i], STUFF_TRIGGER_MAX_CLOSE)]
+    if not features['volume_ok'][i]:
+        return reasons + [('total_volume_too_low', features['cumulative_volume'][i], STUFF_TRIGGER_MIN_VOLUME)]
+    return reasons + [('stuff_trigger_met',)]
+
+class TickerDay:
+    """
+    One preprocessed ticker-day shared by every strategy that trades it.
+    
+    Bar arrays, the session index and signal features are built on first use and
+    cached, so Gapper and Backside on the same ticker-day read the same copy.
+    """
+    __slots__ = ('df', '_bars', '_session_index', '_features')
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._bars = None
+        self._session_index = None
+        self._features = {}
+
+    @property
+    def bars(self) -> Dict[str, np.ndarray]:
+        if self._bars is None:
+            self._bars = extract_bar_arrays(self.df)
+        return self._bars
+
+    @property
+    def session_index(self) -> Dict:
+        if self._session_index is None:
+            self._session_index = build_session_index(self.df)
+        return self._session_index
+
+    def session_bars(self, session: str) -> Dict[str, np.ndarray]:
+        """Bar arrays for the whole day ('day') or views over one session_index range ('rth', 'pre_market')."""
+        if session == 'day':
+            return self.bars
+        start, stop = self.session_index[session]
+        return {name: values[start:stop] for name, values in self.bars.items()}
+
+    def signal_features(self, strategy: str, reference_price: float) -> Dict[str, np.ndarray]:
+        key = (strategy, reference_price)
+        if key not in self._features:
+            profile = SIGNAL_PROFILES[strategy]
+            self._features[key] = compute_signal_features(self.session_bars(profile['session']), reference_price, profile)
+        return self._features[key]
+
+    def clear_signal_features(self) -> None:
+        """Drop cached features, e.g. after a sweep changes one of FEATURE_PARAMETERS."""
+        self._features = {}
+
+def resolve_ticker_day(intraday_df: pd.DataFrame, ticker_day: 'TickerDay' = None) -> 'TickerDay':
+    """The shared TickerDay when it wraps this frame, otherwise a fresh one."""
+    if ticker_day is not None and ticker_day.df is intraday_df:
+        return ticker_day
+    return TickerDay(intraday_df)
+
+def load_ticker_day(ticker: str, date: datetime, ticker_days: Dict[str, 'TickerDay']) -> 'TickerDay':
+    """Fetch and preprocess a ticker's bars once per day; returns None when no usable data came back."""
+    if ticker not in ticker_days:
+        intraday_df = None
+        intraday_data = fetch_intraday_data(ticker, date.strftime('%Y-%m-%d'))
+        if intraday_data is not None:
+            intraday_df = preprocess_data(intraday_data)
+        ticker_days[ticker] = TickerDay(intraday_df) if intraday_df is not None and not intraday_df.empty else None
+    return ticker_days[ticker]
 
-    total_volume = sum(c['v'] for c in candles[:index+1])
-    if total_volume <= 1000000:
-        debug_messages.append(f"Total volume ({total_volume}) not greater than 1,000,000")
-        return False, debug_messages
+# ============================================================================
+# BAR LOOP KERNELS
+# ============================================================================
 
-    debug_messages.append("All STUFF trigger conditions met")
-    return True, debug_messages
+# A gap between consecutive bars longer than this is treated as a trading halt
+HALT_GAP_SECONDS = 180
+
+# Events returned by the bar-loop kernels and the exit resolver
+EVENT_DONE = 0
+EVENT_TRIGGER = 1
+EVENT_TRIGGER_SKIPPED = 2
+EVENT_ENTRY = 3
+EVENT_HALT_STOP = 4
+EVENT_STOP = 5
+EVENT_EOD = 6
+EVENT_TIME_CUTOFF = 7
+EVENT_TRAILING_STOP = 8
+
+# Slots of the int64 state array carried between kernel calls (bar slots hold -1 until set)
+STATE_POSITION = 0
+STATE_TRIGGER_DETECTED = 1
+STATE_TRIGGER_BAR = 2
+STATE_STUFF_TRIGGER_COUNT = 3
+STATE_PRE_TRIGGER_TWO_COUNT = 4
+STATE_EXCEEDED_PMH_BAR = 5
+STATE_VIOLATED_PMH_BAR = 6
+STATE_NORMALIZED_STOP_BAR = 7
+STATE_MOVE_QUALIFIED_BAR = 8
+STATE_PULLBACK_QUALIFIED_BAR = 9
+STATE_SIZE = 10
+
+def bar_kernel(func):
+    """Compile a bar-loop kernel with Numba when installed; the plain function is always on .py_func."""
+    if NUMBA_AVAILABLE:
+        return njit(func)
+    func.py_func = func
+    return func
+
+def get_bar_kernel(kernel):
+    return kernel if USE_JIT_KERNELS else kernel.py_func
+
+def new_kernel_state() -> np.ndarray:
+    state = np.zeros(STATE_SIZE, dtype=np.int64)
+    for slot in (STATE_TRIGGER_BAR, STATE_EXCEEDED_PMH_BAR, STATE_VIOLATED_PMH_BAR, STATE_NORMALIZED_STOP_BAR,
+                 STATE_MOVE_QUALIFIED_BAR, STATE_PULLBACK_QUALIFIED_BAR):
+        state[slot] = -1
+    return state
+
+def first_true(mask: np.ndarray) -> int:
+    """Position of the first True in mask, -1 when there is none."""
+    if len(mask) == 0:
+        return -1
+    first = int(mask.argmax())
+    return first if mask[first] else -1
+
+def resolve_stop_exit(t_ms: np.ndarray, o: np.ndarray, h: np.ndarray, l: np.ndarray, first_bar: int, stop_price: float,
+                      stop_on_open: bool = False, halt_exit: str = 'gap_open', halted: bool = False,
+                      cutoff: np.ndarray | None = None, cutoff_price: np.ndarray | None = None, cutoff_event: int = EVENT_EOD,
+                      entry_price: float | None = None, trailing_activation_pct: float | None = None,
+                      trailing_distance_pct: float | None = None) -> Dict:
+    """
+    First exit of a short position over bars first_bar onward, without drawing slippage.
+    
+    Every exit condition is a boolean mask over the remaining bars and the earliest first
+    touch wins (argmax); on one bar a halt exit beats a stop and a stop beats the cutoff.
+    halt_exit says what a bar after a HALT_GAP_SECONDS gap does:
+      'gap_open'        opening at or above the stop exits at that open (Gapper)
+      'gap_open_above'  the same, strictly above the stop (Intraday Backside)
+      'sticky'          the next stop after any gap, or with halted set, is a halt stop (Backside)
+    With trailing parameters the stop only applies until the low is trailing_activation_pct
+    below entry_price; from that bar the stop is the running low plus trailing_distance_pct.
+    cutoff marks bars that flatten the position at cutoff_price.
+    
+    Returns the exit bar (-1 when nothing is hit), pre-slippage price, reason (EVENT_DONE
+    when nothing is hit), the first halt gap up to the exit and the bar the trailing stop armed on.
+    """
+    scan = slice(first_bar, len(o))
+    opens, highs = o[scan], h[scan]
+
+    gap = np.zeros(len(opens), dtype=bool)
+    gap_from = max(first_bar, 1)
+    gap[gap_from - first_bar:] = (t_ms[gap_from:] - t_ms[gap_from - 1:-1]) / 1000 > HALT_GAP_SECONDS
+
+    stop_hit = highs >= stop_price
+    if stop_on_open:
+        stop_hit |= opens >= stop_price
+    if halt_exit == 'gap_open':
+        halt_hit = gap & (opens >= stop_price)
+    elif halt_exit == 'gap_open_above':
+        halt_hit = gap & (opens > stop_price)
+    else:
+        halt_hit = np.zeros(len(opens), dtype=bool)
+
+    trailing_bar = -1
+    trailing_hit = np.zeros(len(opens), dtype=bool)
+    if trailing_activation_pct is not None:
+        lows = l[scan]
+        armed = first_true((entry_price - lows) / entry_price >= trailing_activation_pct)
+        if armed >= 0:
+            trailing_bar = first_bar + armed
+            trailing_stops = np.fmin.accumulate(lows[armed:]) * (1 + trailing_distance_pct)
+            trailing_hit[armed:] = highs[armed:] >= trailing_stops
+            stop_hit[armed:] = False
+
+    candidates = [(first_true(halt_hit), EVENT_HALT_STOP), (first_true(trailing_hit), EVENT_TRAILING_STOP),
+                  (first_true(stop_hit), EVENT_STOP)]
+    if cutoff is not None:
+        candidates.append((first_true(cutoff[scan]), cutoff_event))
+    exit_bar, reason = -1, EVENT_DONE
+    for bar, event in candidates:
+        if bar >= 0 and (exit_bar < 0 or bar < exit_bar):
+            exit_bar, reason = bar, event
+
+    price = np.nan
+    if reason == EVENT_HALT_STOP:
+        price = opens[exit_bar]
+    elif reason == EVENT_STOP:
+        price = opens[exit_bar] if opens[exit_bar] > stop_price else stop_price
+    elif reason == EVENT_TRAILING_STOP:
+        trailing_stop = trailing_stops[exit_bar - armed]
+        price = opens[exit_bar] if opens[exit_bar] > trailing_stop else trailing_stop
+    elif reason == cutoff_event:
+        price = cutoff_price[scan][exit_bar]
+
+    halt_bar = first_true(gap if exit_bar < 0 else gap[:exit_bar + 1])
+    if halt_exit == 'sticky' and reason == EVENT_STOP and (halted or halt_bar >= 0):
+        reason = EVENT_HALT_STOP
 
-def check_intraday_stuff_window(candles: List[Dict], index: int) -> Tuple[bool, str]:
-    if index < 20:
-        return False, "Not enough candles for Stuff Window check"
-        
-    open_20_bars_ago = candles[index - 20]['o']
-    highest_high = max(candle['h'] for candle in candles[index-20:index+1])
-    price_condition = 1.00 if candles[index]['c'] >= 8 else 0.20
-    
-    if highest_high - open_20_bars_ago <= price_condition:
-        return False, f"Highest high ({highest_high:.2f}) not more than ${price_condition:.2f} above open 20 bars ago ({open_20_bars_ago:.2f})"
-    if candles[index]['c'] > open_20_bars_ago:
-        return False, f"Current close ({candles[index]['c']:.2f}) not below open 20 bars ago ({open_20_bars_ago:.2f})"
-        
-    return True, "Stuff Window conditions met"
+    return {
+        'bar': first_bar + exit_bar if exit_bar >= 0 else -1,
+        'price': price,
+        'reason': reason,
+        'halt_bar': first_bar + halt_bar if halt_bar >= 0 else -1,
+        'trailing_bar': trailing_bar
+    }
 
-def check_intraday_stuff_window_2(candles: List[Dict], index: int) -> Tuple[bool, str]:
-    if index < 5:
-        return False, "Not enough candles for Stuff Window 2 check"
-        
-    open_5_bars_ago = candles[index - 5]['o']
-    highest_high = max(candle['h'] for candle in candles[index-5:index+1])
-    price_condition = 1.40 if candles[index]['c'] >= 8 else 0.25
+@bar_kernel
+def backside_bar_kernel(start, resume_bar_end, state, hhmm, h, c, high_of_day_rth, stuff_condition, pre_trigger_one,
+                        below_max_close, volume_ok, pre_trigger_two, pre_market_high, violation_price,
+                        normalized_stop_price, time_of_day_max):
+    """
+    Run the flat Backside state machine from bar `start` until the next trigger or entry.
     
-    if highest_high - open_5_bars_ago <= price_condition:
-        return False, f"Highest high ({highest_high:.2f}) not more than ${price_condition:.2f} above open 5 bars ago ({open_5_bars_ago:.2f})"
-    if candles[index]['c'] > open_5_bars_ago:
-        return False, f"Current close ({candles[index]['c']:.2f}) not below open 5 bars ago ({open_5_bars_ago:.2f})"
-        
-    return True, "Stuff Window 2 conditions met"
+    The arrays cover the regular session only (session_index['rth']) and bar numbers are
+    relative to its first bar. With resume_bar_end the first bar only gets its end-of-bar
+    bookkeeping, which is how the caller resumes after TRIGGER and EOD events. Exits are
+    resolved by resolve_stop_exit, so the kernel never runs with a position open.
+    Returns (event, bar).
+    """
+    for i in range(start, len(h)):
+        if not (resume_bar_end and i == start):
+            if state[STATE_EXCEEDED_PMH_BAR] < 0 and high_of_day_rth[i] > pre_market_high:
+                state[STATE_EXCEEDED_PMH_BAR] = i
+            if state[STATE_EXCEEDED_PMH_BAR] >= 0 and state[STATE_VIOLATED_PMH_BAR] < 0 and h[i] >= violation_price:
+                state[STATE_VIOLATED_PMH_BAR] = i
+            if state[STATE_NORMALIZED_STOP_BAR] < 0 and high_of_day_rth[i] >= normalized_stop_price:
+                state[STATE_NORMALIZED_STOP_BAR] = i
+
+            trigger_detected = state[STATE_TRIGGER_DETECTED] != 0
+            if hhmm[i] > time_of_day_max and not trigger_detected:
+                continue
 
-def check_intraday_stuff_candle_hard(candle: Dict) -> Tuple[bool, str]:
-    price_condition = 0.70 if candle['c'] >= 8 else 0.20
-    volume_condition = 600000 if candle['c'] >= 8 else 900000
+            if (not trigger_detected and state[STATE_EXCEEDED_PMH_BAR] >= 0 and
+                    state[STATE_VIOLATED_PMH_BAR] >= 0 and state[STATE_NORMALIZED_STOP_BAR] >= 0):
+                if (state[STATE_STUFF_TRIGGER_COUNT] < 4 and stuff_condition[i] and
+                        (state[STATE_PRE_TRIGGER_TWO_COUNT] > 0 or pre_trigger_one[i]) and
+                        below_max_close[i] and volume_ok[i]):
+                    if 1.0 <= c[i] < 2.0:
+                        return EVENT_TRIGGER_SKIPPED, i
+                    state[STATE_TRIGGER_DETECTED] = 1
+                    state[STATE_TRIGGER_BAR] = i
+                    state[STATE_STUFF_TRIGGER_COUNT] += 1
+                    return EVENT_TRIGGER, i
+
+            elif trigger_detected and i == state[STATE_TRIGGER_BAR] + 1:
+                if hhmm[i] <= time_of_day_max:
+                    return EVENT_ENTRY, i
+                state[STATE_TRIGGER_DETECTED] = 0
+
+        if pre_trigger_two[i]:
+            state[STATE_PRE_TRIGGER_TWO_COUNT] += 1
+
+    return EVENT_DONE, len(h)
+
+@bar_kernel
+def intraday_backside_bar_kernel(start, state, valid, hhmm, highest_move, pullback, stuff_condition, volume_ok,
+                                 min_price_move_percent, min_pullback_percent, time_of_day_max):
+    """
+    Run the flat Intraday Backside state machine over the regular-session bars from `start`.
     
-    if candle['h'] - candle['o'] <= price_condition:
-        return False, f"High ({candle['h']:.2f}) not more than ${price_condition:.2f} above open ({candle['o']:.2f})"
-    if candle['c'] > candle['o']:
-        return False, f"Close ({candle['c']:.2f}) not below open ({candle['o']:.2f})"
-    if candle['v'] <= volume_condition:
-        return False, f"Volume ({candle['v']}) not greater than {volume_condition}"
-        
-    return True, "Stuff Candle Hard conditions met"
+    Every event ends its bar, so the caller always resumes at bar + 1. Exits are resolved by
+    resolve_stop_exit, so the kernel never runs with a position open. Returns (event, bar).
+    """
+    for i in range(start, len(hhmm)):
+        if not valid[i]:
+            continue
 
-def check_intraday_pre_trigger_one(candles: List[Dict], index: int, high_of_day: float, min_overall_move_adj: float) -> Tuple[bool, str]:
-    candle = candles[index]
-    change_from_open = 100 * (candle['h'] - candles[0]['o']) / candles[0]['o']
-    change_30_bars_ago = 100 * (candles[max(0, index-EXTENSION_OCCURS_WITHIN_BARS)]['c'] - candles[0]['o']) / candles[0]['o']
-    
-    if candle['h'] != high_of_day:
-        return False, "High is not equal to high of day"
-    if change_from_open <= min_overall_move_adj:
-        return False, f"Change from open ({change_from_open:.2f}) is not greater than min overall move ({min_overall_move_adj:.2f})"
-    if (change_from_open - change_30_bars_ago) <= MIN_EXTENSION_PERCENT:
-        return False, f"Extension ({change_from_open - change_30_bars_ago:.2f}) is not greater than {MIN_EXTENSION_PERCENT}%"
-    
-    return True, "Pre-Trigger One conditions met"
+        trigger_detected = state[STATE_TRIGGER_DETECTED] != 0
+        if not trigger_detected and hhmm[i] <= time_of_day_max:
+            if state[STATE_MOVE_QUALIFIED_BAR] < 0:
+                if highest_move[i] >= min_price_move_percent:
+                    state[STATE_MOVE_QUALIFIED_BAR] = i
+                else:
+                    continue
+            if state[STATE_PULLBACK_QUALIFIED_BAR] < 0 and pullback[i] >= min_pullback_percent:
+                state[STATE_PULLBACK_QUALIFIED_BAR] = i
+            if state[STATE_PULLBACK_QUALIFIED_BAR] < 0:
+                continue
+            if stuff_condition[i] and volume_ok[i]:
+                state[STATE_TRIGGER_DETECTED] = 1
+                state[STATE_TRIGGER_BAR] = i
+                return EVENT_TRIGGER, i
+
+        elif trigger_detected and i == state[STATE_TRIGGER_BAR] + 1:
+            if hhmm[i] <= time_of_day_max:
+                return EVENT_ENTRY, i
+            state[STATE_TRIGGER_DETECTED] = 0
+
+    return EVENT_DONE, len(hhmm)
+
+# ============================================================================
+# BAR EVENT ENGINE
+# ============================================================================
 
-def check_intraday_pre_trigger_two(candle: Dict, high_of_day: float, open_price: float) -> Tuple[bool, str]:
-    if high_of_day == open_price:
-        return False, "High of day is equal to open price"
+class Fill:
+    """One simulated fill: the price the strategy asked for and the price after slippage."""
+    __slots__ = ('event', 'bar', 'original_price', 'price', 'is_entry', 'leg', 'halt')
+
+    def __init__(self, event: int, bar: int, original_price: float, price: float, is_entry: bool, leg: int = 0,
+                 halt: bool = False):
+        self.event = event
+        self.bar = bar
+        self.original_price = original_price
+        self.price = price
+        self.is_entry = is_entry
+        self.leg = leg
+        self.halt = halt
+
+def fill_stream(date, ticker: str, strategy: str, leg: int = 0) -> np.random.Generator:
+    """
+    Counter-based random stream for one (date, ticker, strategy, leg), keyed by EXECUTION_SEED.
     
-    pullback = (100 * (high_of_day - candle['c']) / (high_of_day - open_price))
+    Philox seeded through SeedSequence from the key alone, so a fill's draw depends only on
+    which fill it is, not on the process that ran it or the order ticker-days were processed.
+    """
+    date = pd.Timestamp(date)
+    key = [EXECUTION_SEED, date.year * 10000 + date.month * 100 + date.day,
+           int.from_bytes(ticker.encode(), 'little'), int.from_bytes(strategy.encode(), 'little'), leg]
+    return np.random.Generator(np.random.Philox(np.random.SeedSequence(key)))
+
+class FillModel:
+    """
+    Slippage for simulated short fills.
     
-    if np.isnan(pullback) or np.isinf(pullback):
-        return False, f"Invalid pullback calculation"
+    With a stream_key (date, ticker, strategy) each leg draws from its own fill_stream, in
+    the order that leg's fills are requested; without one, from the global random module.
+    Halt fills add halt_slippage_multiplier times the regular slippage on top.
+    """
+    __slots__ = ('halt_slippage_multiplier', 'stream_key', 'streams')
+
+    def __init__(self, halt_slippage_multiplier: float = 1.5, stream_key: Tuple | None = None):
+        self.halt_slippage_multiplier = halt_slippage_multiplier
+        self.stream_key = stream_key
+        self.streams = {}
+
+    def stream(self, leg: int) -> np.random.Generator | None:
+        if self.stream_key is None:
+            return None
+        if leg not in self.streams:
+            self.streams[leg] = fill_stream(*self.stream_key, leg)
+        return self.streams[leg]
+
+    def fill_price(self, price: float, is_entry: bool, halt: bool = False, leg: int = 0) -> float:
+        filled = apply_slippage(price, is_entry=is_entry, is_short=True, rng=self.stream(leg))
+        if halt:
+            filled = filled + (filled - price) * self.halt_slippage_multiplier
+        return filled
+
+class TradeRecorder:
+    """Trades of one strategy on one ticker-day and the account balance they leave behind."""
+    __slots__ = ('trades', 'open_trade', 'balance')
+
+    def __init__(self, balance: float):
+        self.trades = []
+        self.open_trade = None
+        self.balance = balance
+
+    def open(self, trade: Dict) -> Dict:
+        self.open_trade = trade
+        return trade
+
+    def close(self, exit_fields: Dict) -> Dict:
+        trade = self.open_trade
+        trade.update(exit_fields)
+        self.trades.append(trade)
+        self.open_trade = None
+        return trade
+
+class BarStrategy:
+    """
+    Hooks a strategy implements to run on BarEngine.
     
-    if pullback <= MIN_PULLBACK_PERCENT:
-        return False, f"Pullback ({pullback:.2f}%) is not greater than {MIN_PULLBACK_PERCENT}%"
+    next_event advances the strategy's bar-loop kernel to the next bar that needs Python
+    (a trigger, an entry, an exit). on_bar handles that event and requests fills through
+    engine.fill, which calls back into on_fill with the slipped price. Bar numbers are
+    whatever the strategy's kernel uses.
+    """
+    name = None
+
+    def prepare(self, engine: 'BarEngine') -> bool:
+        """Set up levels and kernel inputs; return False to skip the ticker-day."""
+        return True
+
+    def next_event(self, engine: 'BarEngine') -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def on_progress(self, engine: 'BarEngine'):
+        """Called after every next_event, e.g. to log filters the kernel has flagged."""
+
+    def on_bar(self, engine: 'BarEngine', event: int, bar: int):
+        pass
+
+    def on_fill(self, engine: 'BarEngine', fill: Fill):
+        pass
+
+    def finish(self, engine: 'BarEngine'):
+        return engine.recorder.trades or None
+
+class BarEngine:
+    """
+    Runs one BarStrategy over one ticker-day.
     
-    return True, f"Pre-Trigger Two conditions met with pullback of {pullback:.2f}%"
+    Owns the shared pieces: the TickerDay bar arrays and features, the kernel state
+    array, the fill model and the trade recorder. Each event ends its bar unless the
+    strategy calls resume_bar to have the kernel finish that bar's bookkeeping.
+    """
+    __slots__ = ('strategy', 'ticker_day', 'bars', 'ticker', 'date', 'state', 'fill_model', 'recorder', 'trace',
+                 'start', 'resume_bar_end')
+
+    def __init__(self, strategy: BarStrategy, ticker_day: 'TickerDay', ticker: str, date, account_size: float,
+                 fill_model: FillModel = None):
+        self.strategy = strategy
+        self.ticker_day = ticker_day
+        self.bars = ticker_day.bars
+        self.ticker = ticker
+        self.date = date
+        self.state = new_kernel_state()
+        self.fill_model = fill_model or FillModel(stream_key=(date, ticker, strategy.name))
+        self.recorder = TradeRecorder(account_size)
+        self.trace = [] if EXPLAIN_TRADES else None
+        self.start = 0
+        self.resume_bar_end = False
+
+    def run(self):
+        strategy = self.strategy
+        if not strategy.prepare(self):
+            return None
+        while True:
+            event, bar = strategy.next_event(self)
+            strategy.on_progress(self)
+            if event == EVENT_DONE:
+                break
+            self.start, self.resume_bar_end = bar + 1, False
+            strategy.on_bar(self, event, bar)
+        return strategy.finish(self)
+
+    def resume_bar(self, bar: int):
+        """Resume at `bar` itself so the kernel runs its end-of-bar bookkeeping."""
+        self.start, self.resume_bar_end = bar, True
+
+    def fill(self, event: int, bar: int, price: float, is_entry: bool, halt: bool = False, leg: int = 0) -> Fill:
+        fill = Fill(event, bar, price, self.fill_model.fill_price(price, is_entry, halt, leg), is_entry, leg, halt)
+        self.strategy.on_fill(self, fill)
+        return fill
+
+    def explain(self, bar: int, reason: Tuple):
+        if self.trace is not None:
+            self.trace.append((bar, reason))
+
+    def reset_trigger(self):
+        self.state[STATE_TRIGGER_DETECTED] = 0
+
+    def close_position(self):
+        """Flat again after an exit: clears the position and the trigger that opened it."""
+        self.state[STATE_POSITION] = 0
+        self.state[STATE_TRIGGER_DETECTED] = 0
 
 # ============================================================================
 # MAIN TRADING STRATEGY FUNCTIONS
 # ============================================================================
 
-def simulate_gapper_trade(intraday_df, ticker, date, current_account_size, yesterday_close, pre_market_high, winning_trade_count, float_size):
+def gapper_levels(bars: Dict[str, np.ndarray], session_index: Dict, yesterday_close: float, pre_market_high: float) -> Dict:
+    """
+    Gapper reference prices and stop levels for one ticker-day, before any fill.
     
-    try:
-        if intraday_df is None or len(intraday_df) < 2:
-            logging.warning(f"Insufficient data for Gapper {ticker} on {date}")
-            return None
-
-        if isinstance(date, str):
-            date = pd.to_datetime(date)
-            
-        logging.info(f"\nAnalyzing Gapper: {ticker} on {date}")
-        logging.info(f"Yesterday's close: ${yesterday_close:.4f}")
-        
-        TRAILING_ACTIVATION_PCT = 0.9
-        TRAILING_DISTANCE_PCT = 0.9
-        
-        eastern = pytz.timezone('US/Eastern')
-        if not pd.api.types.is_datetime64_any_dtype(intraday_df['t']):
-            intraday_df['t'] = pd.to_datetime(intraday_df['t'], unit='ms')
-        if intraday_df['t'].dt.tz is None:
-            intraday_df['t'] = intraday_df['t'].dt.tz_localize('UTC').dt.tz_convert(eastern)
-
-        pre_market_data = intraday_df[intraday_df['t'].dt.time < time(9, 30)]
-        if not pre_market_data.empty:
-            calculated_pmh = pre_market_data['h'].max()
-            pmh_time = pre_market_data[pre_market_data['h'] == calculated_pmh]['t'].iloc[0]
-            logging.info(f"Calculated PMH: ${calculated_pmh:.4f} at {pmh_time.strftime('%H:%M:%S')}")
+    The pre-market high is re-derived from the bars and replaces the passed one when they
+    differ by more than a cent. Prices are None when the 9:28 / 9:29 bar is missing.
+    """
+    levels = {'calculated_pmh': None, 'pmh_pos': -1, 'pmh_mismatch': False, 'price_928': None, 'price_929': None}
+
+    pre_market_start, pre_market_end = session_index['pre_market']
+    if pre_market_end > pre_market_start:
+        pre_market_highs = bars['h'][pre_market_start:pre_market_end]
+        levels['pmh_pos'] = pre_market_start + int(pre_market_highs.argmax())
+        levels['calculated_pmh'] = calculated_pmh = pre_market_highs.max()
+        if abs(calculated_pmh - pre_market_high) > 0.01:
+            levels['pmh_mismatch'] = True
+            pre_market_high = calculated_pmh
+    levels['pre_market_high'] = pre_market_high
+
+    candle_928_pos = session_index['bar_928']
+    if candle_928_pos < 0:
+        return levels
+    levels['price_928'] = price_928 = bars['c'][candle_928_pos]
+    levels['gap_percentage'] = ((price_928 - yesterday_close) / yesterday_close) * 100
+
+    candle_929_pos = session_index['bar_929']
+    if candle_929_pos < 0:
+        return levels
+    levels['bar_929'] = candle_929_pos
+    levels['price_929'] = price_929 = bars['c'][candle_929_pos]
+    levels['pmh_to_entry_drop'] = pmh_to_entry_drop = (pre_market_high - price_929) / pre_market_high * 100
+    levels['second_leg'] = pmh_to_entry_drop <= max_pmh_to_open_drop
+    levels['stop_loss1'] = pre_market_high * GAPPER_STOP_1_PMH_MULTIPLIER
+    levels['stop_loss2'] = price_929 + (price_929 - yesterday_close) * GAPPER_STOP_2_GAP_MULTIPLIER
+
+    minute_of_day = session_index['minute_of_day']
+    levels['market_hours'] = (int(np.searchsorted(minute_of_day, MARKET_OPEN_MINUTE, side='left')),
+                              int(np.searchsorted(minute_of_day, 15 * 60, side='right')))
+    return levels
+
+class GapperStrategy(BarStrategy):
+    """
+    Two-leg short from the 9:29 close: leg 1 stops at PMH * GAPPER_STOP_1_PMH_MULTIPLIER, leg 2 at
+    the 9:29 close plus GAPPER_STOP_2_GAP_MULTIPLIER x the gap (only taken when the PMH-to-entry drop is small enough). Both legs
+    share a trailing stop and exit at the 15:00 open otherwise.
+    """
+    name = 'Gapper'
+    trailing_activation_pct = 0.9
+    trailing_distance_pct = 0.9
+
+    def __init__(self, yesterday_close: float, pre_market_high: float, float_size: float):
+        self.yesterday_close = yesterday_close
+        self.pre_market_high = pre_market_high
+        self.float_size = float_size
+
+    def prepare(self, engine: BarEngine) -> bool:
+        ticker, date, bars = engine.ticker, engine.date, engine.bars
+        levels = gapper_levels(bars, engine.ticker_day.session_index, self.yesterday_close, self.pre_market_high)
+
+        if levels['calculated_pmh'] is not None:
+            pmh_time = et_timestamp(bars['t_ms'][levels['pmh_pos']])
+            logging.info(f"Calculated PMH: ${levels['calculated_pmh']:.4f} at {pmh_time.strftime('%H:%M:%S')}")
             
-            if abs(calculated_pmh - pre_market_high) > 0.01:
-                logging.warning(f"PMH MISMATCH - Using calculated PMH: ${calculated_pmh:.4f}")
-                pre_market_high = calculated_pmh
+            if levels['pmh_mismatch']:
+                logging.warning(f"PMH MISMATCH - Using calculated PMH: ${levels['calculated_pmh']:.4f}")
+        self.pre_market_high = levels['pre_market_high']
 
         # Get 9:28 candle for stock selection validation
-        candle_928 = intraday_df[intraday_df['t'].dt.time == time(9, 28)]
-        if candle_928.empty:
+        if levels['price_928'] is None:
             logging.warning(f"9:28 candle not found for {ticker}")
-            return None
+            return False
             
-        price_928 = candle_928.iloc[0]['c']
-        gap_percentage = ((price_928 - yesterday_close) / yesterday_close) * 100
-        logging.info(f"9:28 close price: ${price_928:.4f} (used for stock selection)")
-        logging.info(f"Gap percentage (9:28): {gap_percentage:.2f}%")
+        self.price_928 = levels['price_928']
+        self.gap_percentage = levels['gap_percentage']
+        logging.info(f"9:28 close price: ${self.price_928:.4f} (used for stock selection)")
+        logging.info(f"Gap percentage (9:28): {self.gap_percentage:.2f}%")
 
         # Get 9:29 candle for entry and stop calculations
-        candle_929 = intraday_df[intraday_df['t'].dt.time == time(9, 29)]
-        if candle_929.empty:
+        if levels['price_929'] is None:
             logging.warning(f"9:29 candle not found for {ticker}")
-            return None
+            return False
             
-        price_929 = candle_929.iloc[0]['c']
-        original_entry_price = price_929
-        logging.info(f"9:29 close price: ${price_929:.4f} (used for entry and stop calculation)")
+        self.price_929 = original_entry_price = levels['price_929']
+        logging.info(f"9:29 close price: ${self.price_929:.4f} (used for entry and stop calculation)")
         
-        pmh_to_entry_drop = (pre_market_high - price_929) / pre_market_high * 100
+        self.pmh_to_entry_drop = levels['pmh_to_entry_drop']
+        self.second_leg = levels['second_leg']
 
-        entry_time = date.replace(hour=9, minute=30, second=0, microsecond=0)
-        exit_time = date.replace(hour=15, minute=0, second=0, microsecond=0)
-        entry_time = eastern.localize(entry_time)
-        exit_time = eastern.localize(exit_time)
+        self.entry_time = EASTERN.localize(date.replace(hour=9, minute=30, second=0, microsecond=0))
+        self.exit_time = EASTERN.localize(date.replace(hour=15, minute=0, second=0, microsecond=0))
 
         # Use 9:29 price for stop loss calculations
-        stop_loss1 = pre_market_high * 1.2711
-        stop_loss1_calc = f"PMH ${pre_market_high:.4f} * 1.2711 = ${stop_loss1:.4f}"
-        logging.info(f"Stop Loss 1 calculation: {stop_loss1_calc}")
+        self.stop_loss1 = levels['stop_loss1']
+        self.stop_loss1_calc = f"PMH ${self.pre_market_high:.4f} * {GAPPER_STOP_1_PMH_MULTIPLIER} = ${self.stop_loss1:.4f}"
+        logging.info(f"Stop Loss 1 calculation: {self.stop_loss1_calc}")
         
-        reference_price = original_entry_price  # This is now 9:29 price
-        stop_loss2 = reference_price + (reference_price - yesterday_close) * 0.64
-        logging.info(f"Stop Loss 2 calculation: ${reference_price:.4f} + (${reference_price:.4f} - ${yesterday_close:.4f}) * 0.64 = ${stop_loss2:.4f}")
+        self.reference_price = original_entry_price  # This is now 9:29 price
+        self.stop_loss2 = levels['stop_loss2']
+        logging.info(f"Stop Loss 2 calculation: ${self.reference_price:.4f} + (${self.reference_price:.4f} - ${self.yesterday_close:.4f}) * {GAPPER_STOP_2_GAP_MULTIPLIER} = ${self.stop_loss2:.4f}")
 
         # Use 9:29 price for position sizing
-        shares1 = calculate_position_size(
-            current_account_size,
-            original_entry_price,
-            (stop_loss1 - original_entry_price) / original_entry_price,
-            'Gapper1'
-        )
-        shares2 = calculate_position_size(
-            current_account_size,
-            original_entry_price,
-            (stop_loss2 - original_entry_price) / original_entry_price,
-            'Gapper2'
-        )
-        
-        entry_price = apply_slippage(original_entry_price, is_entry=True, is_short=True)
-        if entry_price != original_entry_price:
-            logging.info(f"Entry slippage applied: Original ${original_entry_price:.4f} -> New ${entry_price:.4f}")
+        self.shares = [
+            calculate_position_size(engine.recorder.balance, original_entry_price,
+                                    (stop_loss - original_entry_price) / original_entry_price, strategy)
+            for stop_loss, strategy in ((self.stop_loss1, 'Gapper1'), (self.stop_loss2, 'Gapper2'))
+        ]
         
-        logging.info(f"Entry price: ${entry_price:.4f}")
+        engine.fill(EVENT_ENTRY, levels['bar_929'], original_entry_price, is_entry=True)
 
-        market_hours_df = intraday_df[(intraday_df['t'] >= entry_time) & (intraday_df['t'] <= exit_time)]
+        market_hours_start, market_hours_end = levels['market_hours']
 
-        if market_hours_df.empty or len(market_hours_df) < 2:
+        if market_hours_end - market_hours_start < 2:
             logging.warning(f"Insufficient market hours data for {ticker}")
-            return None
+            return False
 
-        result1 = result2 = 'End of Day'
-        forecasted_exit_price1 = forecasted_exit_price2 = None
-        actual_exit_price1 = actual_exit_price2 = None
-        exit_time1 = exit_time2 = exit_time
-        trailing_stop_activated = False
-        trailing_stop_price = float('inf')
-        backside_eligible = False
-        
-        halt_detected = False
-        last_candle_time = None
-        halt_start_time = None
-
-        for i in range(len(market_hours_df)):
-            row = market_hours_df.iloc[i]
-            next_row = market_hours_df.iloc[i+1] if i+1 < len(market_hours_df) else None
-            
-            current_time = row['t']
-            
-            if last_candle_time is not None:
-                time_diff_seconds = (current_time - last_candle_time).total_seconds()
-                if time_diff_seconds > 180:
-                    if not halt_detected:
-                        halt_detected = True
-                        halt_start_time = last_candle_time
-                        logging.warning(f"HALT DETECTED for {ticker}: {time_diff_seconds/60:.1f} min gap ending at {current_time.strftime('%H:%M:%S')}")
-            
-            if halt_detected:
-                if result1 == 'End of Day' and row['o'] >= stop_loss1:
-                    halt_slippage_multiplier = 1.5
-                    original_exit_price = row['o']
-                    base_exit_price = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-                    additional_halt_slippage = (base_exit_price - original_exit_price) * halt_slippage_multiplier
-                    actual_exit_price1 = base_exit_price + additional_halt_slippage
-                    
-                    exit_time1 = current_time
-                    result1 = 'Halt Gap Stop Loss 1'
-                    backside_eligible = True
-                    logging.warning(f"Position 1 HALT GAP STOP at {current_time.strftime('%H:%M:%S')} - Fill: ${actual_exit_price1:.4f}")
-                
-                if result2 == 'End of Day' and row['o'] >= stop_loss2 and pmh_to_entry_drop <= max_pmh_to_open_drop:
-                    halt_slippage_multiplier = 1.5
-                    original_exit_price = row['o']
-                    base_exit_price = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-                    additional_halt_slippage = (base_exit_price - original_exit_price) * halt_slippage_multiplier
-                    actual_exit_price2 = base_exit_price + additional_halt_slippage
-                    
-                    exit_time2 = current_time
-                    result2 = 'Halt Gap Stop Loss 2'
-                    backside_eligible = True
-                    logging.warning(f"Position 2 HALT GAP STOP at {current_time.strftime('%H:%M:%S')} - Fill: ${actual_exit_price2:.4f}")
-                
-                halt_detected = False
-
-            if not halt_detected and not trailing_stop_activated:
-                price_drop_pct = (entry_price - row['l']) / entry_price
-                if price_drop_pct >= TRAILING_ACTIVATION_PCT:
-                    trailing_stop_activated = True
-                    trailing_stop_price = row['l'] * (1 + TRAILING_DISTANCE_PCT)
-                    logging.info(f"Trailing stop activated - Initial trailing stop set at ${trailing_stop_price:.4f}")
-
-            if not halt_detected and trailing_stop_activated:
-                if row['l'] < trailing_stop_price / (1 + TRAILING_DISTANCE_PCT):
-                    trailing_stop_price = row['l'] * (1 + TRAILING_DISTANCE_PCT)
-                    logging.info(f"Trailing stop updated to: ${trailing_stop_price:.4f}")
-
-            if not halt_detected and trailing_stop_activated:
-                if row['h'] >= trailing_stop_price:
-                    exit_price = row['o'] if row['o'] > trailing_stop_price else trailing_stop_price
-                    if result1 == 'End of Day':
-                        actual_exit_price1 = apply_slippage(exit_price, is_entry=False, is_short=True)
-                        exit_time1 = row['t']
-                        result1 = 'Trailing Stop'
-                    if result2 == 'End of Day' and pmh_to_entry_drop <= max_pmh_to_open_drop:
-                        actual_exit_price2 = apply_slippage(exit_price, is_entry=False, is_short=True)
-                        exit_time2 = row['t']
-                        result2 = 'Trailing Stop'
-                    logging.info(f"Positions stopped out by trailing stop at {row['t'].strftime('%H:%M:%S')}")
-                    break
+        self.results = ['End of Day', 'End of Day']
+        self.forecasted_exit_prices = [None, None]
+        self.actual_exit_prices = [None, None]
+        self.original_exit_prices = [None, None]
+        self.halt_exit_fills = [False, False]
+        self.exit_times = [self.exit_time, self.exit_time]
+        self.backside_eligible = False
+        self.halt_start_time = None
+
+        # Views over the 9:30-15:00 bars; kernel bar numbers index into these
+        self.t_ms = t_ms = bars['t_ms'][market_hours_start:market_hours_end]
+        self.opens = bars['o'][market_hours_start:market_hours_end]
+        lows = bars['l'][market_hours_start:market_hours_end]
+        self.leg_exits = [
+            resolve_stop_exit(t_ms, self.opens, bars['h'][market_hours_start:market_hours_end], lows, 0, stop_loss,
+                              halt_exit='gap_open', entry_price=self.entry_price,
+                              trailing_activation_pct=self.trailing_activation_pct,
+                              trailing_distance_pct=self.trailing_distance_pct)
+            if enabled else None
+            for stop_loss, enabled in ((self.stop_loss1, True), (self.stop_loss2, self.second_leg))
+        ]
 
-            elif not halt_detected:
-                if result1 == 'End of Day' and row['h'] >= stop_loss1:
-                    original_exit_price = row['o'] if row['o'] > stop_loss1 else stop_loss1
-                    actual_exit_price1 = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-                    exit_time1 = row['t']
-                    result1 = 'Stop Loss 1'
-                    backside_eligible = True
-                    logging.info(f"Position 1 stopped out at {row['t'].strftime('%H:%M:%S')}")
-
-                if result2 == 'End of Day' and row['h'] >= stop_loss2 and pmh_to_entry_drop <= max_pmh_to_open_drop:
-                    original_exit_price = row['o'] if row['o'] > stop_loss2 else stop_loss2
-                    actual_exit_price2 = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-                    exit_time2 = row['t']
-                    result2 = 'Stop Loss 2'
-                    backside_eligible = True
-                    logging.info(f"Position 2 stopped out at {row['t'].strftime('%H:%M:%S')}")
-
-            last_candle_time = current_time
-
-            if result1 != 'End of Day' and (result2 != 'End of Day' or pmh_to_entry_drop > max_pmh_to_open_drop):
-                break
+        # Bars up to the last exit are the ones the legs were live for
+        exit_bars = [leg_exit['bar'] for leg_exit in self.leg_exits if leg_exit is not None]
+        last_bar = max(exit_bars) if min(exit_bars) >= 0 else len(t_ms) - 1
+        trailing_bar = self.leg_exits[0]['trailing_bar']
+        self.trailing_stop_activated = 0 <= trailing_bar <= last_bar
+        self.trailing_stop_price = np.inf
+        if self.trailing_stop_activated:
+            self.trailing_stop_price = np.fmin.reduce(lows[trailing_bar:last_bar + 1]) * (1 + self.trailing_distance_pct)
+
+        gap_ends = np.flatnonzero(np.diff(t_ms[:last_bar + 1]) > HALT_GAP_SECONDS * 1000) + 1
+        for gap_end in gap_ends:
+            logging.warning(f"HALT DETECTED for {ticker}: {(t_ms[gap_end] - t_ms[gap_end - 1]) / 60000:.1f} min gap ending at {et_timestamp(t_ms[gap_end]).strftime('%H:%M:%S')}")
+        if len(gap_ends):
+            self.halt_start_time = et_timestamp(t_ms[gap_ends[-1] - 1])
+        if self.trailing_stop_activated:
+            logging.info(f"Trailing stop activated - trailing stop at ${self.trailing_stop_price:.4f}")
+
+        # Draw slippage in bar order; halt fills come before regular stops on the same bar
+        self.exits = sorted((leg_exit['bar'], leg_exit['reason'] != EVENT_HALT_STOP, leg)
+                            for leg, leg_exit in enumerate(self.leg_exits) if leg_exit is not None and leg_exit['bar'] >= 0)
+        self.next_exit = 0
+        return True
 
-        # Handle EOD exit for any remaining open positions
-        if actual_exit_price1 is None or actual_exit_price2 is None:
-            closing_candle = market_hours_df[market_hours_df['t'].dt.time == time(15, 0)]
-            if not closing_candle.empty:
-                if actual_exit_price1 is None:
-                    original_close_price = closing_candle.iloc[0]['o']
-                    actual_exit_price1 = apply_slippage(original_close_price, is_entry=False, is_short=True)
-                    forecasted_exit_price1 = original_close_price
-                if actual_exit_price2 is None and pmh_to_entry_drop <= max_pmh_to_open_drop:
-                    original_close_price = closing_candle.iloc[0]['o']
-                    actual_exit_price2 = apply_slippage(original_close_price, is_entry=False, is_short=True)
-                    forecasted_exit_price2 = original_close_price
-            else:
-                last_candle = market_hours_df.iloc[-1]
-                if actual_exit_price1 is None:
-                    original_close_price = last_candle['o']
-                    actual_exit_price1 = apply_slippage(original_close_price, is_entry=False, is_short=True)
-                    forecasted_exit_price1 = original_close_price
-                if actual_exit_price2 is None and pmh_to_entry_drop <= max_pmh_to_open_drop:
-                    original_close_price = last_candle['o']
-                    actual_exit_price2 = apply_slippage(original_close_price, is_entry=False, is_short=True)
-                    forecasted_exit_price2 = original_close_price
+    def next_event(self, engine: BarEngine) -> Tuple[int, int]:
+        if self.next_exit == len(self.exits):
+            return EVENT_DONE, len(self.t_ms)
+        bar, _, self.exit_leg = self.exits[self.next_exit]
+        self.next_exit += 1
+        return self.leg_exits[self.exit_leg]['reason'], bar
+
+    def on_bar(self, engine: BarEngine, event: int, bar: int):
+        leg = self.exit_leg
+        engine.fill(event, bar, self.leg_exits[leg]['price'], is_entry=False, halt=event == EVENT_HALT_STOP, leg=leg)
+
+    def on_fill(self, engine: BarEngine, fill: Fill):
+        if fill.is_entry:
+            self.entry_price = fill.price
+            if fill.price != fill.original_price:
+                logging.info(f"Entry slippage applied: Original ${fill.original_price:.4f} -> New ${fill.price:.4f}")
+            logging.info(f"Entry price: ${fill.price:.4f}")
+            return
+
+        leg = fill.leg
+        self.actual_exit_prices[leg] = fill.price
+        self.original_exit_prices[leg], self.halt_exit_fills[leg] = fill.original_price, fill.halt
+        if fill.event == EVENT_EOD:
+            self.forecasted_exit_prices[leg] = fill.original_price
+            return
+
+        bar_time = et_timestamp(self.t_ms[fill.bar])
+        if fill.event == EVENT_HALT_STOP:
+            result = f'Halt Gap Stop Loss {leg + 1}'
+            self.backside_eligible = True
+            logging.warning(f"Position {leg + 1} HALT GAP STOP at {bar_time.strftime('%H:%M:%S')} - Fill: ${fill.price:.4f}")
+        elif fill.event == EVENT_STOP:
+            result = f'Stop Loss {leg + 1}'
+            self.backside_eligible = True
+            logging.info(f"Position {leg + 1} stopped out at {bar_time.strftime('%H:%M:%S')}")
+        else:
+            result = 'Trailing Stop'
+            logging.info(f"Position {leg + 1} stopped out by trailing stop at {bar_time.strftime('%H:%M:%S')}")
+        self.exit_times[leg], self.results[leg] = bar_time, result
+
+    def finish(self, engine: BarEngine):
+        ticker = engine.ticker
+        entry_price = self.entry_price
+        legs_open = [self.actual_exit_prices[0] is None, self.actual_exit_prices[1] is None and self.second_leg]
+
+        # Handle EOD exit for any remaining open positions (15:00 open, else the last bar's open)
+        closing_candle_pos = engine.ticker_day.session_index['bar_1500']
+        close_price = engine.bars['o'][closing_candle_pos] if closing_candle_pos >= 0 else self.opens[-1]
+        for leg in range(2):
+            if legs_open[leg]:
+                engine.fill(EVENT_EOD, closing_candle_pos, close_price, is_entry=False, leg=leg)
 
         # Calculate P&L
+        actual_exit_price1, actual_exit_price2 = self.actual_exit_prices
+        shares1, shares2 = self.shares
         if actual_exit_price1 is not None:
             profit_loss1 = (entry_price - actual_exit_price1) * shares1
             commission1 = (entry_price + actual_exit_price1) * shares1 * (commission_percentage / 100)
@@ -1586,7 +2222,7 @@ def simulate_gapper_trade(intraday_df, ticker, date, current_account_size, yeste
             logging.error(f"Missing exit price 1 for {ticker}")
             return None
 
-        if pmh_to_entry_drop <= max_pmh_to_open_drop and actual_exit_price2 is not None:
+        if self.second_leg and actual_exit_price2 is not None:
             profit_loss2 = (entry_price - actual_exit_price2) * shares2
             commission2 = (entry_price + actual_exit_price2) * shares2 * (commission_percentage / 100)
         else:
@@ -1600,395 +2236,358 @@ def simulate_gapper_trade(intraday_df, ticker, date, current_account_size, yeste
 
         logging.info(f"\nTrade Results:")
         logging.info(f"Total P&L: ${total_net_profit_loss:.2f}")
-        logging.info(f"Result 1: {result1}")
-        logging.info(f"Result 2: {result2}")
+        logging.info(f"Result 1: {self.results[0]}")
+        logging.info(f"Result 2: {self.results[1]}")
 
         return {
             'ticker': ticker,
-            'date': date.date(),
-            'entry_time': entry_time,
-            'exit_time1': exit_time1,
-            'exit_time2': exit_time2,
+            'date': engine.date.date(),
+            'entry_time': self.entry_time,
+            'exit_time1': self.exit_times[0],
+            'exit_time2': self.exit_times[1],
             'entry_price': entry_price,
-            'forecasted_exit_price1': forecasted_exit_price1,
+            'forecasted_exit_price1': self.forecasted_exit_prices[0],
             'actual_exit_price1': actual_exit_price1,
-            'forecasted_exit_price2': forecasted_exit_price2,
+            'forecasted_exit_price2': self.forecasted_exit_prices[1],
             'actual_exit_price2': actual_exit_price2,
+            'original_exit_price1': self.original_exit_prices[0],
+            'original_exit_price2': self.original_exit_prices[1],
+            'halt_exit_fill1': self.halt_exit_fills[0],
+            'halt_exit_fill2': self.halt_exit_fills[1],
             'shares1': shares1,
             'shares2': shares2,
-            'result1': result1,
-            'result2': result2,
+            'result1': self.results[0],
+            'result2': self.results[1],
             'profit_loss': total_net_profit_loss,
             'commission': total_commission,
-            'pmh_to_entry_drop': pmh_to_entry_drop,
+            'pmh_to_entry_drop': self.pmh_to_entry_drop,
             'strategy': 'Gapper',
-            'stop_loss1': stop_loss1,
-            'stop_loss2': stop_loss2,
-            'open_928': price_928,  # 9:28 price for reference
-            'open_929': price_929,  # 9:29 price (actual entry reference)
-            'reference_price': reference_price,  # Now 9:29 price
-            'float_size': float_size,
-            'pre_market_high': pre_market_high,
-            'stop_loss1_calculation': stop_loss1_calc,
-            'yesterday_close': yesterday_close,
-            'gap_percentage': gap_percentage,  # Based on 9:28
-            'qualifying_price': price_928,  # 9:28 for stock selection
-            'entry_reference_price': price_929,  # 9:29 for entry/stops
-            'trailing_stop_activated': trailing_stop_activated,
-            'trailing_stop_price': trailing_stop_price if trailing_stop_activated else None,
-            'balance_after_trade': current_account_size + total_net_profit_loss,
-            'backside_eligible': backside_eligible,
-            'halt_detected': halt_start_time is not None,
-            'halt_start_time': halt_start_time
+            'stop_loss1': self.stop_loss1,
+            'stop_loss2': self.stop_loss2,
+            'open_928': self.price_928,  # 9:28 price for reference
+            'open_929': self.price_929,  # 9:29 price (actual entry reference)
+            'reference_price': self.reference_price,  # Now 9:29 price
+            'float_size': self.float_size,
+            'pre_market_high': self.pre_market_high,
+            'stop_loss1_calculation': self.stop_loss1_calc,
+            'yesterday_close': self.yesterday_close,
+            'gap_percentage': self.gap_percentage,  # Based on 9:28
+            'qualifying_price': self.price_928,  # 9:28 for stock selection
+            'entry_reference_price': self.price_929,  # 9:29 for entry/stops
+            'trailing_stop_activated': self.trailing_stop_activated,
+            'trailing_stop_price': self.trailing_stop_price if self.trailing_stop_activated else None,
+            'balance_after_trade': engine.recorder.balance + total_net_profit_loss,
+            'backside_eligible': self.backside_eligible,
+            'halt_detected': self.halt_start_time is not None,
+            'halt_start_time': self.halt_start_time
         }
 
-    except Exception as e:
-        logging.error(f"Error in simulate_gapper_trade for {ticker} on {date}: {str(e)}")
-        logging.error(traceback.format_exc())
-        return None
-
-def simulate_backside_trade_mac(intraday_df, ticker, date, current_account_size, winning_trade_count, float_size, daily_starting_balance):
+def simulate_gapper_trade(intraday_df, ticker, date, current_account_size, yesterday_close, pre_market_high, winning_trade_count, float_size,
+                          ticker_day=None):
     
     try:
         if intraday_df is None or len(intraday_df) < 2:
-            logging.warning(f"Insufficient data for Backside {ticker} on {date}")
+            logging.warning(f"Insufficient data for Gapper {ticker} on {date}")
             return None
 
-        trades = []
-        position = 0
-        entry_price = 0.0
-        original_entry_price = 0.0
-        shares = 0
-        pre_trigger_two_count = 0
-        stuff_trigger_count = 0
-        debug_log = []
-        high_of_day = float('-inf')
-        high_of_day_rth = float('-inf')
-        pre_market_high = float('-inf')
-        exceeded_pre_market_high = False
-        violated_pre_market_high_filter = False
-        normalized_stop_triggered = False
-        normalized_stop_price = 0.0
-        trade = None
-        
-        # NEW: Variables for trigger detection and delayed entry
-        trigger_detected = False
-        trigger_candle_index = -1
-        
-        halt_detected = False
-        last_candle_time = None
-        halt_start_time = None
-
+        if isinstance(date, str):
+            date = pd.to_datetime(date)
+            
+        logging.info(f"\nAnalyzing Gapper: {ticker} on {date}")
+        logging.info(f"Yesterday's close: ${yesterday_close:.4f}")
+        
         if not pd.api.types.is_datetime64_any_dtype(intraday_df['t']):
-            intraday_df['t'] = pd.to_datetime(intraday_df['t'], unit='ms', utc=True).dt.tz_convert('US/Eastern')
+            intraday_df['t'] = pd.to_datetime(intraday_df['t'], unit='ms')
+        if intraday_df['t'].dt.tz is None:
+            intraday_df['t'] = intraday_df['t'].dt.tz_localize('UTC').dt.tz_convert(EASTERN)
+        ensure_time_columns(intraday_df)
 
-        pre_market_data = intraday_df[intraday_df['t'].dt.time < time(9, 30)]
-        if not pre_market_data.empty:
-            pre_market_high = pre_market_data['h'].max()
+        ticker_day = resolve_ticker_day(intraday_df, ticker_day)
+        strategy = GapperStrategy(yesterday_close, pre_market_high, float_size)
+        return BarEngine(strategy, ticker_day, ticker, date, current_account_size).run()
+
+    except Exception as e:
+        logging.error(f"Error in simulate_gapper_trade for {ticker} on {date}: {str(e)}")
+        logging.error(traceback.format_exc())
+        return None
+
+class BacksideStrategy(BarStrategy):
+    """
+    Short the first STUFF trigger after the pre-market high has been exceeded, violated by
+    PRE_MARKET_HIGH_VIOLATION_PERCENT and the normalized gapper stop has traded; entry on
+    the next bar's open, stop at BACKSIDE_STOP_LOSS_PERCENT, flat at the close.
+    """
+    name = 'Backside'
+
+    def __init__(self, float_size: float, daily_starting_balance: float):
+        self.float_size = float_size
+        self.daily_starting_balance = daily_starting_balance
+
+    def prepare(self, engine: BarEngine) -> bool:
+        ticker, date, bars = engine.ticker, engine.date, engine.bars
+        session_index = engine.ticker_day.session_index
+        market_open_pos, market_close_pos = session_index['rth']
+        if market_open_pos > 0:
+            pre_market_high = np.nanmax(bars['h'][:market_open_pos])
             logging.info(f"Pre-market high for {ticker} on {date}: ${pre_market_high:.2f}")
         else:
             logging.warning(f"No pre-market data found for {ticker} on {date}")
-            return None
+            return False
 
-        previous_close = intraday_df.iloc[0]['c']
+        previous_close = float(bars['c'][0])
 
         # Calculate normalized stop levels (same as before)
-        market_hours_data = intraday_df[intraday_df['t'].dt.time >= time(9, 30)]
-        if not market_hours_data.empty:
-            gapper_entry_price = market_hours_data.iloc[0]['o']
-            gapper_stop_1 = pre_market_high * 1.2711
-            gapper_stop_2 = gapper_entry_price + (gapper_entry_price - previous_close) * 0.64
+        if market_open_pos < session_index['bar_count']:
+            gapper_entry_price = bars['o'][market_open_pos]
+            gapper_stop_1 = pre_market_high * GAPPER_STOP_1_PMH_MULTIPLIER
+            gapper_stop_2 = gapper_entry_price + (gapper_entry_price - previous_close) * GAPPER_STOP_2_GAP_MULTIPLIER
             normalized_stop_price = max(gapper_stop_1, gapper_stop_2)
             
             logging.info(f"Simulated gapper entry price (day open): ${gapper_entry_price:.2f}")
-            logging.info(f"Gapper Stop 1 (PMH * 1.2711): ${gapper_stop_1:.2f}")
-            logging.info(f"Gapper Stop 2 (normalized): ${gapper_entry_price:.2f} + (${gapper_entry_price:.2f} - ${previous_close:.2f}) * 0.64 = ${gapper_stop_2:.2f}")
+            logging.info(f"Gapper Stop 1 (PMH * {GAPPER_STOP_1_PMH_MULTIPLIER}): ${gapper_stop_1:.2f}")
+            logging.info(f"Gapper Stop 2 (normalized): ${gapper_entry_price:.2f} + (${gapper_entry_price:.2f} - ${previous_close:.2f}) * {GAPPER_STOP_2_GAP_MULTIPLIER} = ${gapper_stop_2:.2f}")
             logging.info(f"Normalized stop level (higher of the two): ${normalized_stop_price:.2f}")
         else:
             normalized_stop_price = pre_market_high * 1.35
             logging.warning(f"No market hours data found - using fallback normalized stop: ${normalized_stop_price:.2f}")
 
-        intraday_data = intraday_df.to_dict('records')
-
         logging.info(f"\nProcessing Backside trade for {ticker} on {date}")
         logging.info(f"Previous close: ${previous_close:.2f}")
         logging.info(f"Pre-market high: ${pre_market_high:.2f}")
         logging.info(f"PMH + 27.1% violation level: ${pre_market_high * 1.271:.2f}")
         logging.info(f"Normalized stop level: ${normalized_stop_price:.2f}")
 
-        for i, candle in enumerate(intraday_data):
-            candle_time = candle['t']
-            candle_hhmm = candle_time.hour * 100 + candle_time.minute
-
-            if candle_time.time() < time(9, 30) or candle_time.time() >= time(16, 0):
-                debug_log.append(f"Skipping candle at {candle_time}: outside of trading hours")
-                continue
-
-            # Halt detection logic (same as before)
-            if last_candle_time is not None:
-                time_diff_seconds = (candle_time - last_candle_time).total_seconds()
-                if time_diff_seconds > 180:
-                    if not halt_detected:
-                        halt_detected = True
-                        halt_start_time = last_candle_time
-                        if position != 0:
-                            logging.warning(f"HALT DETECTED for {ticker}: {time_diff_seconds/60:.1f} min gap - IN POSITION")
-
-            high_of_day, high_of_day_rth = calculate_high_of_day(intraday_data, i)
-
-            # Check pre-market high conditions (same as before)
-            if not exceeded_pre_market_high and high_of_day_rth > pre_market_high:
-                exceeded_pre_market_high = True
-                logging.info(f"{ticker} exceeded pre-market high at {candle_time}, Price: ${high_of_day_rth:.2f}")
-
-            violation_price = pre_market_high * (1 + PRE_MARKET_HIGH_VIOLATION_PERCENT / 100.0)
-            if exceeded_pre_market_high and not violated_pre_market_high_filter and candle['h'] >= violation_price:
-                violated_pre_market_high_filter = True
-                logging.info(f"{ticker} violated pre-market high filter at {candle_time}: high=${candle['h']:.2f}, violation_threshold=${violation_price:.2f}")
-
-            if not normalized_stop_triggered and high_of_day_rth >= normalized_stop_price:
-                normalized_stop_triggered = True
-                logging.info(f"{ticker} triggered normalized stop at {candle_time}, Price: ${high_of_day_rth:.2f}")
-
-            if candle_hhmm > TIME_OF_DAY_MAX:
-                if position == 0 and not trigger_detected:
-                    debug_log.append(f"Skipping candle at {candle_time}: past TIME_OF_DAY_MAX and no trigger detected")
-                    continue
+        features = engine.ticker_day.signal_features('Backside', previous_close)
+        violation_price = pre_market_high * (1 + PRE_MARKET_HIGH_VIOLATION_PERCENT / 100.0)
+
+        self.market_open_pos = market_open_pos
+        self.previous_close = previous_close
+        self.pre_market_high = pre_market_high
+        self.violation_price = violation_price
+        self.normalized_stop_price = normalized_stop_price
+        self.features = features
+        self.stop_loss = 0.0
+        self.exceeded_pre_market_high = False
+        self.violated_pre_market_high_filter = False
+        self.normalized_stop_triggered = False
+
+        # The kernel only walks the regular session: views over the whole-day arrays, so
+        # look-backs and the running high still include pre-market bars
+        rth = slice(market_open_pos, market_close_pos)
+        rth_minute_of_day = bars['minute_of_day'][rth]
+        self.rth_t_ms, self.rth_o, self.rth_h, self.rth_l = bars['t_ms'][rth], bars['o'][rth], bars['h'][rth], bars['l'][rth]
+        self.closing_bars = rth_minute_of_day >= MARKET_CLOSE_MINUTE - 1
+        self.pre_trigger_two = features['pre_trigger_two'][rth]
+        self.exit = None
+        self.kernel = get_bar_kernel(backside_bar_kernel)
+        self.kernel_inputs = (
+            minute_to_hhmm(rth_minute_of_day),
+            self.rth_h,
+            bars['c'][rth],
+            features['high_of_day_rth'][rth],
+            features['stuff_condition'][rth],
+            features['pre_trigger_one'][rth],
+            features['below_max_close'][rth],
+            features['volume_ok'][rth],
+            self.pre_trigger_two,
+            pre_market_high,
+            violation_price,
+            normalized_stop_price
+        )
+        return True
 
-            # MODIFIED: Check for trigger but don't enter immediately
-            if position == 0 and not trigger_detected and exceeded_pre_market_high and violated_pre_market_high_filter and normalized_stop_triggered:
-                logging.info(f"{ticker} @ {candle_time}: All stop conditions met - "
-                           f"PMH_exceeded={exceeded_pre_market_high}, "
-                           f"PMH_violated=${violation_price:.2f}, "
-                           f"Normalized_triggered=${normalized_stop_price:.2f}")
-                
-                stuff_trigger, trigger_debug = check_stuff_trigger(
-                    intraday_data[: i + 1],
-                    i,
-                    pre_trigger_two_count,
-                    previous_close,
-                    stuff_trigger_count,
-                    high_of_day,
-                    high_of_day_rth
-                )
-                debug_log.extend(trigger_debug)
+    def next_event(self, engine: BarEngine) -> Tuple[int, int]:
+        if engine.recorder.open_trade is None:
+            return self.kernel(engine.start, engine.resume_bar_end, engine.state, *self.kernel_inputs, TIME_OF_DAY_MAX)
+        exit_bar = self.exit['bar']
+        if exit_bar < 0:
+            return EVENT_DONE, len(self.rth_o)
+        # The kernel skips the bars spent in the position; they only feed the pre-trigger-two count
+        engine.state[STATE_PRE_TRIGGER_TWO_COUNT] += np.count_nonzero(self.pre_trigger_two[self.entry_bar:exit_bar])
+        return self.exit['reason'], exit_bar
+
+    def on_progress(self, engine: BarEngine):
+        # Log the pre-market high filters as the kernel reports them
+        state, t_ms, ticker = engine.state, engine.bars['t_ms'], engine.ticker
+        high_of_day_rth = self.features['high_of_day_rth']
+        if not self.exceeded_pre_market_high and state[STATE_EXCEEDED_PMH_BAR] >= 0:
+            self.exceeded_pre_market_high = True
+            flag_bar = self.market_open_pos + state[STATE_EXCEEDED_PMH_BAR]
+            logging.info(f"{ticker} exceeded pre-market high at {et_timestamp(t_ms[flag_bar])}, Price: ${high_of_day_rth[flag_bar]:.2f}")
+        if not self.violated_pre_market_high_filter and state[STATE_VIOLATED_PMH_BAR] >= 0:
+            self.violated_pre_market_high_filter = True
+            flag_bar = self.market_open_pos + state[STATE_VIOLATED_PMH_BAR]
+            logging.info(f"{ticker} violated pre-market high filter at {et_timestamp(t_ms[flag_bar])}: high=${engine.bars['h'][flag_bar]:.2f}, violation_threshold=${self.violation_price:.2f}")
+        if not self.normalized_stop_triggered and state[STATE_NORMALIZED_STOP_BAR] >= 0:
+            self.normalized_stop_triggered = True
+            flag_bar = self.market_open_pos + state[STATE_NORMALIZED_STOP_BAR]
+            logging.info(f"{ticker} triggered normalized stop at {et_timestamp(t_ms[flag_bar])}, Price: ${high_of_day_rth[flag_bar]:.2f}")
+
+    def on_bar(self, engine: BarEngine, event: int, rth_bar: int):
+        ticker, state = engine.ticker, engine.state
+        # Whole-day bar number, as reported in the trade record and the explain trace
+        i = self.market_open_pos + rth_bar
+        candle_time = et_timestamp(engine.bars['t_ms'][i])
+        candle_open = float(engine.bars['o'][i])
+
+        if event == EVENT_TRIGGER_SKIPPED:
+            trigger_price = float(engine.bars['c'][i])
+            engine.explain(i, ('trigger_price_excluded', trigger_price))
+            logging.info(f"Skipping Backside trade for {ticker}: trigger price ${trigger_price:.2f} in $1-2 losing range")
+
+        elif event == EVENT_TRIGGER:
+            trigger_price = float(engine.bars['c'][i])
+            logging.info(f"{ticker} @ {candle_time}: All stop conditions met - "
+                       f"PMH_exceeded={self.exceeded_pre_market_high}, "
+                       f"PMH_violated=${self.violation_price:.2f}, "
+                       f"Normalized_triggered=${self.normalized_stop_price:.2f}")
+            logging.info(f"TRIGGER DETECTED for {ticker} at {candle_time}, Price: ${trigger_price:.2f}")
+            logging.info(f"Will enter on NEXT candle open (if available)")
+            if engine.trace is not None:
+                reasons = explain_stuff_trigger(engine.bars, self.features, i, self.previous_close,
+                                                int(state[STATE_STUFF_TRIGGER_COUNT]) - 1, int(state[STATE_PRE_TRIGGER_TWO_COUNT]))
+                engine.trace.extend((i, reason) for reason in reasons)
+                engine.explain(i, ('trigger_detected', trigger_price))
+            engine.resume_bar(rth_bar)
+
+        elif event == EVENT_ENTRY:
+            engine.fill(event, i, candle_open, is_entry=True)  # Use OPEN of next candle
+
+        elif event in (EVENT_HALT_STOP, EVENT_STOP):
+            engine.fill(event, i, self.exit['price'], is_entry=False, halt=event == EVENT_HALT_STOP)
+
+        elif event == EVENT_EOD:
+            engine.fill(event, i, self.exit['price'], is_entry=False)
+            engine.resume_bar(rth_bar)
+
+    def on_fill(self, engine: BarEngine, fill: Fill):
+        ticker, state, recorder = engine.ticker, engine.state, engine.recorder
+        i = fill.bar
+        candle_time = et_timestamp(engine.bars['t_ms'][i])
+
+        if fill.is_entry:
+            entry_price = fill.price
+            if USE_STATIC_POSITION_SIZING:
+                risk_amount = STATIC_RISK_AMOUNT_BACKSIDE
+            else:
+                risk_amount = self.daily_starting_balance * BACKSIDE_RISK_PERCENTAGE
                 
-                if stuff_trigger:
-                    if candle_hhmm <= TIME_OF_DAY_MAX:
-                        trigger_price = candle['c']
-                        
-                        # Filter: Skip trades if trigger price is between $1-2
-                        if 1.0 <= trigger_price < 2.0:
-                            debug_log.append(f"Stuff trigger met but trigger price ${trigger_price:.2f} in losing $1-2 range - skipping")
-                            logging.info(f"Skipping Backside trade for {ticker}: trigger price ${trigger_price:.2f} in $1-2 losing range")
-                            continue
-                        
-                        # MODIFIED: Mark trigger detected but don't enter yet
-                        trigger_detected = True
-                        trigger_candle_index = i
-                        stuff_trigger_count += 1
-                        
-                        logging.info(f"TRIGGER DETECTED for {ticker} at {candle_time}, Price: ${trigger_price:.2f}")
-                        logging.info(f"Will enter on NEXT candle open (if available)")
-                        debug_log.append(f"Trigger detected at {candle_time}: trigger_price={trigger_price}, will enter next candle")
-                    else:
-                        debug_log.append("Stuff trigger met but candle is past TIME_OF_DAY_MAX; trade not taken")
+            stop_loss = entry_price * (1 + BACKSIDE_STOP_LOSS_PERCENT)
+            risk_per_share = stop_loss - entry_price
             
-            # MODIFIED: Enter position on the candle AFTER trigger detection
-            elif position == 0 and trigger_detected and i == trigger_candle_index + 1:
-                # This is the candle immediately after the trigger candle
-                
-                # Check if we're still within time limits
-                if candle_hhmm <= TIME_OF_DAY_MAX:
-                    original_entry_price = candle['o']  # Use OPEN of next candle
-                    entry_price = apply_slippage(original_entry_price, is_entry=True, is_short=True)
-                    
-                    if USE_STATIC_POSITION_SIZING:
-                        risk_amount = STATIC_RISK_AMOUNT_BACKSIDE
-                    else:
-                        risk_amount = daily_starting_balance * BACKSIDE_RISK_PERCENTAGE
-                        
-                    stop_loss = entry_price * (1 + BACKSIDE_STOP_LOSS_PERCENT)
-                    risk_per_share = stop_loss - entry_price
-                    
-                    if risk_per_share <= 0:
-                        debug_log.append("Risk per share non-positive, skipping trade")
-                        trigger_detected = False  # Reset trigger
-                        continue
-                    
-                    shares = int(risk_amount / risk_per_share)
-                    position = -shares
-                    commission = calculate_commission(abs(position) * entry_price)
-                    current_account_size -= commission
-                    entry_time = candle_time
-                    
-                    trade = {
-                        'ticker': ticker,
-                        'date': date,
-                        'entry_time': entry_time,
-                        'entry_price': entry_price,
-                        'original_entry_price': original_entry_price,
-                        'shares': shares,
-                        'commission': commission,
-                        'strategy': 'Backside',
-                        'float_size': float_size,
-                        'pre_market_high': pre_market_high,
-                        'violation_price': violation_price,
-                        'normalized_stop_price': normalized_stop_price,
-                        'stop_loss': stop_loss,
-                        'stop_loss_recorded': False,
-                        'daily_starting_balance': daily_starting_balance,
-                        'halt_detected': False,
-                        'halt_start_time': None,
-                        'trigger_candle_index': trigger_candle_index,
-                        'entry_candle_index': i
-                    }
-                    
-                    logging.info(f"Entered short position for {ticker} at {entry_time}")
-                    logging.info(f"Entry Price: ${entry_price:.2f} (OPEN of candle after trigger)")
-                    logging.info(f"Shares: {shares}, Stop Loss: ${stop_loss:.2f}")
-                    logging.info(f"Trigger was detected on previous candle, entered on current candle open")
-                    debug_log.append(f"Trade entered at {entry_time}: entry_price={entry_price} (next candle open), shares={shares}, stop_loss={stop_loss}")
-                else:
-                    debug_log.append("Next candle after trigger is past TIME_OF_DAY_MAX; trade not taken")
-                    trigger_detected = False  # Reset trigger
+            if risk_per_share <= 0:
+                engine.explain(i, ('risk_non_positive',))
+                engine.reset_trigger()
+                return
             
-            # Exit logic (same as before but with halt handling)
-            elif position < 0:
-                stop_loss = entry_price * (1 + BACKSIDE_STOP_LOSS_PERCENT)
-
-                if halt_detected and (candle['o'] >= stop_loss or candle['h'] >= stop_loss):
-                    halt_slippage_multiplier = 1.5
-                    
-                    if candle['o'] >= stop_loss:
-                        original_exit_price = candle['o']
-                    else:
-                        original_exit_price = stop_loss
-                    
-                    base_exit_price = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-                    additional_halt_slippage = (base_exit_price - original_exit_price) * halt_slippage_multiplier
-                    exit_price = base_exit_price + additional_halt_slippage
-                    
-                    exit_time = candle_time
-                    pnl = (entry_price - exit_price) * abs(position)
-                    commission = calculate_commission(abs(position) * exit_price)
-                    total_pnl = pnl - commission
-                    current_account_size += total_pnl
-
-                    trade.update({
-                        'exit_time': exit_time,
-                        'exit_price': exit_price,
-                        'profit_loss': total_pnl,
-                        'exit_type': 'Halt Gap Stop Loss',
-                        'stop_loss': stop_loss,
-                        'stop_loss_hit_time': candle_time,
-                        'stop_loss_recorded': True,
-                        'halt_detected': True,
-                        'halt_start_time': halt_start_time
-                    })
-                    trades.append(trade)
-
-                    logging.warning(f"HALT GAP STOP LOSS triggered for {ticker} at {exit_time}, P&L: ${total_pnl:.2f}")
-                    debug_log.append(f"Halt gap stop loss hit at {candle_time}: exit_price={exit_price}, total_pnl={total_pnl}")
-
-                    position = 0
-                    trade = None
-                    trigger_detected = False  # Reset trigger
-                    halt_detected = False
-                    continue
-
-                elif not halt_detected and (candle['o'] >= stop_loss or candle['h'] >= stop_loss):
-                    original_exit_price = candle['o'] if candle['o'] >= stop_loss else stop_loss
-                    exit_price = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-                    exit_time = candle_time
-                    pnl = (entry_price - exit_price) * abs(position)
-                    commission = calculate_commission(abs(position) * exit_price)
-                    total_pnl = pnl - commission
-                    current_account_size += total_pnl
-
-                    trade.update({
-                        'exit_time': exit_time,
-                        'exit_price': exit_price,
-                        'profit_loss': total_pnl,
-                        'exit_type': 'Stop Loss',
-                        'stop_loss': stop_loss,
-                        'stop_loss_hit_time': candle_time,
-                        'stop_loss_recorded': True
-                    })
-                    trades.append(trade)
-
-                    logging.info(f"Stop loss triggered for {ticker} at {exit_time}, P&L: ${total_pnl:.2f}")
-                    debug_log.append(f"Stop loss hit at {candle_time}: exit_price={exit_price}, total_pnl={total_pnl}")
-
-                    position = 0
-                    trade = None
-                    trigger_detected = False  # Reset trigger
-                    continue
-
-                elif candle_time.time() >= time(15, 59):
-                    original_exit_price = candle['o']
-                    exit_price = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-                    exit_time = candle_time
-                    pnl = (entry_price - exit_price) * abs(position)
-                    commission = calculate_commission(abs(position) * exit_price)
-                    total_pnl = pnl - commission
-                    current_account_size += total_pnl
-
-                    trade.update({
-                        'exit_time': exit_time,
-                        'exit_price': exit_price,
-                        'profit_loss': total_pnl,
-                        'exit_type': 'EOD',
-                        'stop_loss': stop_loss,
-                        'stop_loss_recorded': False
-                    })
-                    trades.append(trade)
-
-                    logging.info(f"EOD exit for {ticker} at {exit_time}, P&L: ${total_pnl:.2f}")
-                    debug_log.append(f"EOD exit at {exit_time}: exit_price={exit_price}, total_pnl={total_pnl}")
-                    position = 0
-                    trigger_detected = False  # Reset trigger
-
-            # Continue with pre-trigger two logic (same as before)
-            pre_trigger_two, pt2_msg = is_pre_trigger_two(candle, high_of_day, previous_close)
-            if pre_trigger_two:
-                pre_trigger_two_count += 1
-
-            last_candle_time = candle_time
+            shares = int(risk_amount / risk_per_share)
+            self.stop_loss = stop_loss
+            state[STATE_POSITION] = 1
+            commission = calculate_commission(shares * entry_price)
+            recorder.balance -= commission
+            
+            recorder.open({
+                'ticker': ticker,
+                'date': engine.date,
+                'entry_time': candle_time,
+                'entry_price': entry_price,
+                'original_entry_price': fill.original_price,
+                'shares': shares,
+                'commission': commission,
+                'strategy': 'Backside',
+                'float_size': self.float_size,
+                'pre_market_high': self.pre_market_high,
+                'violation_price': self.violation_price,
+                'normalized_stop_price': self.normalized_stop_price,
+                'stop_loss': stop_loss,
+                'stop_loss_recorded': False,
+                'daily_starting_balance': self.daily_starting_balance,
+                'halt_detected': False,
+                'halt_start_time': None,
+                'trigger_candle_index': self.market_open_pos + int(state[STATE_TRIGGER_BAR]),
+                'entry_candle_index': i
+            })
             
-            if halt_detected and position == 0:
-                halt_detected = False
-
-        # Handle any remaining open position at end of day
-        if position != 0:
-            closing_candle = intraday_data[-1]
-            original_exit_price = closing_candle['c']
-            exit_price = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-            exit_time = closing_candle['t']
-
-            pnl = (entry_price - exit_price) * abs(position)
-            commission = calculate_commission(abs(position) * exit_price)
-            total_pnl = pnl - commission
-            current_account_size += total_pnl
-
-            trade.update({
-                'exit_time': exit_time,
-                'exit_price': exit_price,
-                'profit_loss': total_pnl,
+            logging.info(f"Entered short position for {ticker} at {candle_time}")
+            logging.info(f"Entry Price: ${entry_price:.2f} (OPEN of candle after trigger)")
+            logging.info(f"Shares: {shares}, Stop Loss: ${stop_loss:.2f}")
+            logging.info(f"Trigger was detected on previous candle, entered on current candle open")
+            engine.explain(i, ('trade_entered', entry_price, shares, stop_loss))
+
+            # A halt gap into the entry bar already marks the position as halted
+            self.entry_bar = rth_bar = i - self.market_open_pos
+            halted = (self.rth_t_ms[rth_bar] - self.rth_t_ms[rth_bar - 1]) / 1000 > HALT_GAP_SECONDS
+            self.exit = resolve_stop_exit(self.rth_t_ms, self.rth_o, self.rth_h, self.rth_l, rth_bar + 1, stop_loss,
+                                          stop_on_open=True, halt_exit='sticky', halted=halted,
+                                          cutoff=self.closing_bars, cutoff_price=self.rth_o, cutoff_event=EVENT_EOD)
+            self.halt_start_bar = rth_bar - 1 if halted else self.exit['halt_bar'] - 1
+            return
+
+        trade = recorder.open_trade
+        shares = trade['shares']
+        exit_price = fill.price
+        pnl = (trade['entry_price'] - exit_price) * shares
+        commission = calculate_commission(shares * exit_price)
+        total_pnl = pnl - commission
+        recorder.balance += total_pnl
+        exit_fields = {'exit_time': candle_time, 'exit_price': exit_price, 'profit_loss': total_pnl,
+                       'original_exit_price': fill.original_price, 'halt_exit_fill': fill.halt}
+
+        if fill.event == EVENT_HALT_STOP:
+            halt_start_time = et_timestamp(self.rth_t_ms[self.halt_start_bar])
+            exit_fields.update({
+                'exit_type': 'Halt Gap Stop Loss',
+                'stop_loss': self.stop_loss,
+                'stop_loss_hit_time': candle_time,
+                'stop_loss_recorded': True,
+                'halt_detected': True,
+                'halt_start_time': halt_start_time
+            })
+            logging.warning(f"HALT DETECTED for {ticker} after {halt_start_time} - IN POSITION")
+            logging.warning(f"HALT GAP STOP LOSS triggered for {ticker} at {candle_time}, P&L: ${total_pnl:.2f}")
+            engine.explain(i, ('halt_stop_hit', exit_price, total_pnl))
+        elif fill.event == EVENT_STOP:
+            exit_fields.update({
+                'exit_type': 'Stop Loss',
+                'stop_loss': self.stop_loss,
+                'stop_loss_hit_time': candle_time,
+                'stop_loss_recorded': True
+            })
+            logging.info(f"Stop loss triggered for {ticker} at {candle_time}, P&L: ${total_pnl:.2f}")
+            engine.explain(i, ('stop_hit', exit_price, total_pnl))
+        else:
+            exit_fields.update({
                 'exit_type': 'EOD',
-                'stop_loss': entry_price * (1 + BACKSIDE_STOP_LOSS_PERCENT),
+                'stop_loss': trade['entry_price'] * (1 + BACKSIDE_STOP_LOSS_PERCENT),
                 'stop_loss_recorded': False
             })
-            trades.append(trade)
+            if fill.event == EVENT_EOD:
+                logging.info(f"EOD exit for {ticker} at {candle_time}, P&L: ${total_pnl:.2f}")
+            else:
+                logging.info(f"Final EOD exit for {ticker}, P&L: ${total_pnl:.2f}")
+            engine.explain(i, ('eod_exit', exit_price, total_pnl))
 
-            logging.info(f"Final EOD exit for {ticker}, P&L: ${total_pnl:.2f}")
-            debug_log.append(f"Final EOD exit at {exit_time}: exit_price={exit_price}, total_pnl={total_pnl}")
+        recorder.close(exit_fields)
+        engine.close_position()
+
+    def finish(self, engine: BarEngine):
+        ticker = engine.ticker
+        trigger_detected = engine.state[STATE_TRIGGER_DETECTED] != 0
+
+        # Handle any remaining open position at end of day (EVENT_DONE: the bars ran out)
+        if engine.recorder.open_trade is not None:
+            closing_bar = engine.ticker_day.session_index['bar_count'] - 1
+            engine.fill(EVENT_DONE, closing_bar, float(engine.bars['c'][closing_bar]), is_entry=False)
+
+        trades = engine.recorder.trades
+        if engine.trace:
+            log_trade_trace(ticker, 'Backside', engine.trace, engine.ticker_day.df['t'].array)
 
         if not trades:
-            logging.info(f"No Backside trade found for {ticker} on {date}")
-            logging.info(f"Final conditions: PMH_exceeded={exceeded_pre_market_high}, "
-                        f"PMH_violated={violated_pre_market_high_filter}, "
-                        f"Normalized_triggered={normalized_stop_triggered}, "
+            logging.info(f"No Backside trade found for {ticker} on {engine.date}")
+            logging.info(f"Final conditions: PMH_exceeded={self.exceeded_pre_market_high}, "
+                        f"PMH_violated={self.violated_pre_market_high_filter}, "
+                        f"Normalized_triggered={self.normalized_stop_triggered}, "
                         f"Trigger_detected={trigger_detected}")
             return None
         
@@ -1998,21 +2597,275 @@ def simulate_backside_trade_mac(intraday_df, ticker, date, current_account_size,
             
         return trades
 
+def simulate_backside_trade_mac(intraday_df, ticker, date, current_account_size, winning_trade_count, float_size, daily_starting_balance,
+                                ticker_day=None):
+    
+    try:
+        if intraday_df is None or len(intraday_df) < 2:
+            logging.warning(f"Insufficient data for Backside {ticker} on {date}")
+            return None
+
+        if not pd.api.types.is_datetime64_any_dtype(intraday_df['t']):
+            intraday_df['t'] = pd.to_datetime(intraday_df['t'], unit='ms', utc=True).dt.tz_convert(EASTERN)
+        ensure_time_columns(intraday_df)
+
+        ticker_day = resolve_ticker_day(intraday_df, ticker_day)
+        strategy = BacksideStrategy(float_size, daily_starting_balance)
+        return BarEngine(strategy, ticker_day, ticker, date, current_account_size).run()
+
     except Exception as e:
         logging.error(f"Error in simulate_backside_trade_mac for {ticker} on {date}: {str(e)}")
         logging.error(traceback.format_exc())
         return None
-    
-def simulate_intraday_backside_trade(intraday_df: pd.DataFrame, ticker: str, date: datetime, current_account_size: float, winning_trade_count: int, float_size: float, daily_starting_balance: float, candidate_details: Dict | None = None) -> List[Dict] | None:
-    
-    local_current_account_size = current_account_size
 
+class IntradayBacksideStrategy(BarStrategy):
+    """
+    Short a STUFF trigger once the day has moved MIN_PRICE_MOVE_PERCENT above the open and
+    pulled back MIN_PULLBACK_PERCENT; entry on the next bar's open, stop at STOP_LOSS_PERCENT,
+    out at TIME_OF_DAY_MAX or the close.
+    """
+    name = 'Intraday Backside'
+
+    def __init__(self, float_size: float, daily_starting_balance: float):
+        self.float_size = float_size
+        self.daily_starting_balance = daily_starting_balance
+
+    def prepare(self, engine: BarEngine) -> bool:
+        ticker, date, ticker_day = engine.ticker, engine.date, engine.ticker_day
+        day_open, open_price_time_ref = get_day_open_from_bars(ticker_day.bars, ticker_day.session_index, ticker, date)
+        if day_open is None or day_open <= 0:
+            logging.error(f"Could not determine valid positive day open for {ticker} on {date.strftime('%Y-%m-%d')}. Skipping.")
+            return False
+        logging.info(f"Using day open price ${day_open:.4f} for {ticker} calculations.")
+
+        # Regular-session views; OHLC sanity is checked once for the whole session
+        rth_bars = ticker_day.session_bars('rth')
+        self.rth_t_ms, self.rth_o, self.rth_h, self.rth_l, self.rth_c, self.rth_v = (rth_bars[k] for k in ('t_ms', 'o', 'h', 'l', 'c', 'v'))
+        self.bar_count = len(self.rth_t_ms)
+        if self.bar_count == 0:
+             logging.warning(f"No valid market hours data (9:30-15:59) found for {ticker} on {date.strftime('%Y-%m-%d')} after filtering.")
+             return False
+        logging.info(f"Starting intraday simulation for {ticker} with {self.bar_count} market hour candles.")
+        features = ticker_day.signal_features('Intraday Backside', day_open)
+        self.features = features
+        self.valid = features['valid']
+        for j in np.flatnonzero(~self.valid):
+            logging.warning(f"Skipping candle at {et_timestamp(self.rth_t_ms[j]).strftime('%H:%M:%S')} for {ticker} due to negative or illogical OHLC prices.")
+
+        self.entry_bar = -1
+        self.exit = None
+        self.move_qualified = False
+        self.pullback_qualified = False
+        hhmm = minute_to_hhmm(rth_bars['minute_of_day'])
+
+        # Exits are resolved over the valid bars only, as the bar loop skipped the others
+        self.valid_bars = valid_bars = np.flatnonzero(self.valid)
+        self.exit_inputs = (self.rth_t_ms[valid_bars], self.rth_o[valid_bars], self.rth_h[valid_bars], self.rth_l[valid_bars])
+        self.cutoff_bars = hhmm[valid_bars] >= INTRADAY_BACKSIDE_PARAMS['TIME_OF_DAY_MAX']
+        self.cutoff_prices = self.rth_c[valid_bars]
+
+        self.kernel = get_bar_kernel(intraday_backside_bar_kernel)
+        self.kernel_inputs = (
+            self.valid,
+            hhmm,
+            features['highest_move'],
+            features['low_pullback'],
+            features['stuff_condition'],
+            features['volume_ok'],
+            INTRADAY_BACKSIDE_PARAMS['MIN_PRICE_MOVE_PERCENT'],
+            INTRADAY_BACKSIDE_PARAMS['MIN_PULLBACK_PERCENT']
+        )
+        return True
+
+    def next_event(self, engine: BarEngine) -> Tuple[int, int]:
+        if engine.recorder.open_trade is None:
+            return self.kernel(engine.start, engine.state, *self.kernel_inputs, INTRADAY_BACKSIDE_PARAMS['TIME_OF_DAY_MAX'])
+        if self.exit['bar'] < 0:
+            return EVENT_DONE, self.bar_count
+        return self.exit['reason'], int(self.valid_bars[self.exit['bar']])
+
+    def on_progress(self, engine: BarEngine):
+        state, ticker, features = engine.state, engine.ticker, self.features
+        if not self.move_qualified and state[STATE_MOVE_QUALIFIED_BAR] >= 0:
+            self.move_qualified = True
+            flag_bar = state[STATE_MOVE_QUALIFIED_BAR]
+            qualify_time = et_timestamp(self.rth_t_ms[flag_bar])
+            logging.info(f"{ticker} qualified: Min move {INTRADAY_BACKSIDE_PARAMS['MIN_PRICE_MOVE_PERCENT']}% ({features['highest_move'][flag_bar]:.2f}%) at {qualify_time.strftime('%H:%M:%S')}")
+        if not self.pullback_qualified and state[STATE_PULLBACK_QUALIFIED_BAR] >= 0:
+            self.pullback_qualified = True
+            flag_bar = state[STATE_PULLBACK_QUALIFIED_BAR]
+            logging.info(f"{ticker} qualified: Min pullback {INTRADAY_BACKSIDE_PARAMS['MIN_PULLBACK_PERCENT']}% ({features['low_pullback'][flag_bar]:.2f}%) at {et_timestamp(self.rth_t_ms[flag_bar]).strftime('%H:%M:%S')}")
+
+    def build_price_history(self, first_bar: int, last_bar: int) -> List[Dict]:
+        history = slice(first_bar, last_bar + 1)
+        keep = self.valid[history]
+        return [
+            {'time': bar_time, 'price': close, 'high': high, 'low': low}
+            for bar_time, close, high, low in zip(et_timestamps(self.rth_t_ms[history][keep]), self.rth_c[history][keep].tolist(),
+                                                  self.rth_h[history][keep].tolist(), self.rth_l[history][keep].tolist())
+        ]
+
+    def candle_details(self, i: int) -> Dict:
+        return {'time': et_timestamp(self.rth_t_ms[i]).strftime('%H:%M:%S'), 'open': float(self.rth_o[i]), 'high': float(self.rth_h[i]),
+                'low': float(self.rth_l[i]), 'close': float(self.rth_c[i]), 'volume': int(self.rth_v[i])}
+
+    def on_bar(self, engine: BarEngine, event: int, i: int):
+        ticker, features = engine.ticker, self.features
+        candle_time = et_timestamp(self.rth_t_ms[i])
+        candle_open_price, candle_close_price = float(self.rth_o[i]), float(self.rth_c[i])
+
+        if event == EVENT_TRIGGER:
+            trigger_price = candle_close_price
+            logging.info(f"TRIGGER DETECTED for {ticker} at {candle_time}, Price: ${trigger_price:.2f}")
+            logging.info(f"Will enter on NEXT candle open (if available)")
+            logging.info(f"Trigger conditions: StuffWindow={features['stuff_window'][i]}, StuffWindow2={features['stuff_window_2'][i]}, StuffCandleHard={features['stuff_candle_hard'][i]}")
+            logging.info(f"Cumulative volume: {features['cumulative_volume'][i]:,}")
+            engine.explain(i, ('trigger_components', features['stuff_window'][i], features['stuff_window_2'][i],
+                               features['stuff_candle_hard'][i], features['cumulative_volume'][i]))
+            engine.explain(i, ('trigger_detected', trigger_price))
+
+        elif event == EVENT_ENTRY:
+            original_entry_price = candle_open_price  # Use OPEN of next candle
+            if original_entry_price <= 0:
+                 logging.warning(f"Invalid entry price {original_entry_price} for {ticker}. Skipping.")
+                 engine.reset_trigger()
+                 return
+            engine.fill(event, i, original_entry_price, is_entry=True)
+
+        elif event == EVENT_HALT_STOP:
+            logging.warning(f"Possible halt detected for {ticker} ending at {candle_time.strftime('%H:%M:%S')}")
+            logging.warning(f"Post-halt gap through stop loss for {ticker} at {candle_time.strftime('%H:%M:%S')}")
+            engine.fill(event, i, float(self.exit['price']), is_entry=False)
+
+        elif event == EVENT_STOP:
+            engine.fill(event, i, float(self.exit['price']), is_entry=False)
+
+        elif event == EVENT_TIME_CUTOFF:
+            original_exit_price = float(self.exit['price'])
+            if original_exit_price <= 0: original_exit_price = candle_open_price
+            if original_exit_price <= 0: original_exit_price = engine.recorder.open_trade['entry_price']
+            engine.fill(event, i, original_exit_price, is_entry=False)
+
+    def on_fill(self, engine: BarEngine, fill: Fill):
+        ticker, date, state, recorder, features = engine.ticker, engine.date, engine.state, engine.recorder, self.features
+        i = fill.bar
+        candle_time = et_timestamp(self.rth_t_ms[i])
+
+        if fill.is_entry:
+            entry_price = fill.price
+            risk_amount = STATIC_RISK_AMOUNT_INTRADAY if USE_STATIC_POSITION_SIZING_INTRADAY else self.daily_starting_balance * (INTRADAY_BACKSIDE_PARAMS['RISK_PERCENTAGE'] / 100.0)
+            stop_loss = entry_price * (1 + INTRADAY_BACKSIDE_PARAMS['STOP_LOSS_PERCENT'])
+            risk_per_share = stop_loss - entry_price
+            if risk_per_share <= 0.01:
+                logging.warning(f"Risk per share ${risk_per_share:.4f} too small for {ticker}. Skipping.")
+                engine.reset_trigger()
+                return
+            shares = int(risk_amount / risk_per_share)
+            if shares <= 0:
+                 logging.warning(f"Shares ({shares}) invalid for {ticker}. Skipping.")
+                 engine.reset_trigger()
+                 return
+
+            state[STATE_POSITION] = 1
+            self.entry_bar = i
+            high_of_day = features['high_of_day'][i]
+            highest_move = features['highest_move'][i]
+            pullback = features['low_pullback'][int(state[STATE_TRIGGER_BAR])]
+            entry_commission = calculate_commission(shares * entry_price)
+            recorder.open({
+                'ticker': ticker, 'date': date.date(), 'entry_time': candle_time,
+                'entry_price': entry_price, 'original_entry_price': fill.original_price,
+                'entry_candle_details': self.candle_details(i),
+                'shares': shares, 'commission': entry_commission, 'strategy': 'Intraday Backside',
+                'float_size': self.float_size, 'high_of_day_at_entry': high_of_day,
+                'move_percentage_at_entry': highest_move, 'pullback_percentage_at_entry': pullback,
+                'stop_loss': stop_loss,
+                'trigger_candle_index': int(state[STATE_TRIGGER_BAR]),
+                'entry_candle_index': i,
+                'exit_time': None, 'exit_price': None, 'profit_loss': None, 'exit_type': None,
+                'price_history': [], 'trailing_stop_activated': False, 'balance_after_trade': None,
+                'halt_detected': False, 'stop_loss_hit_candle': None
+            })
+            logging.info(f"\nIntraday Backside Entry for {ticker} on {date.strftime('%Y-%m-%d')}:")
+            logging.info(f" Time: {candle_time.strftime('%H:%M:%S')}, Entry: ${entry_price:.4f} (OPEN of candle after trigger), Stop: ${stop_loss:.4f}, Shares: {shares}")
+            logging.info(f" HOD@entry: ${high_of_day:.4f}, Move%@entry: {highest_move:.2f}%, Pullback%@entry: {pullback:.2f}%")
+            logging.info(f" Trigger was detected on previous candle, entered on current candle open")
+            engine.explain(i, ('trade_entered', entry_price, shares, stop_loss))
+
+            entry_pos = int(np.searchsorted(self.valid_bars, i))
+            self.exit = resolve_stop_exit(*self.exit_inputs, entry_pos + 1, stop_loss, stop_on_open=True,
+                                          halt_exit='gap_open_above', cutoff=self.cutoff_bars,
+                                          cutoff_price=self.cutoff_prices, cutoff_event=EVENT_TIME_CUTOFF)
+            return
+
+        trade = recorder.open_trade
+        exit_price = fill.price
+        pnl = (trade['entry_price'] - exit_price) * trade['shares']
+        exit_commission = calculate_commission(trade['shares'] * exit_price)
+        total_pnl = pnl - exit_commission
+        recorder.balance += total_pnl
+        exit_fields = {
+            'exit_time': candle_time, 'exit_price': exit_price, 'profit_loss': total_pnl,
+            'original_exit_price': fill.original_price, 'halt_exit_fill': fill.halt,
+            'commission': trade['commission'] + exit_commission,
+            'price_history': self.build_price_history(self.entry_bar, i)
+        }
+
+        if fill.event == EVENT_HALT_STOP:
+            exit_fields.update({'exit_type': 'Halt Gap Stop', 'halt_detected': True, 'stop_loss_hit_candle': self.candle_details(i)})
+            engine.explain(i, ('halt_stop_hit', exit_price, total_pnl))
+        elif fill.event == EVENT_STOP:
+            exit_fields.update({'exit_type': 'Stop Loss', 'stop_loss_hit_candle': self.candle_details(i)})
+            logging.info(f"Stop Loss Exit for {ticker} @ ${exit_price:.4f}, P&L: ${total_pnl:.2f}")
+            engine.explain(i, ('stop_hit', exit_price, total_pnl))
+        elif fill.event == EVENT_TIME_CUTOFF:
+            exit_fields['exit_type'] = 'Time Cutoff'
+            logging.info(f"Time Cutoff Exit for {ticker} @ ${exit_price:.4f}, P&L: ${total_pnl:.2f}")
+            engine.explain(i, ('eod_exit', exit_price, total_pnl))
+        else:
+            exit_fields['exit_type'] = 'EOD'
+            logging.info(f"EOD Exit for {ticker} @ ${exit_price:.4f}, P&L: ${total_pnl:.2f}")
+            engine.explain(i, ('eod_exit', exit_price, total_pnl))
+
+        exit_fields['balance_after_trade'] = recorder.balance
+        recorder.close(exit_fields)
+        engine.close_position()
+
+    def finish(self, engine: BarEngine):
+        ticker, recorder = engine.ticker, engine.recorder
+
+        # Bars ran out with the position still open: exit at the last regular-session close
+        if recorder.open_trade is not None:
+            last_bar = self.bar_count - 1
+            try:
+                entry_price = recorder.open_trade['entry_price']
+                original_exit_price = float(self.rth_c[last_bar])
+                if original_exit_price <= 0: original_exit_price = float(self.rth_o[last_bar])
+                if original_exit_price <= 0: original_exit_price = entry_price if entry_price > 0 else 0.1
+                engine.fill(EVENT_DONE, last_bar, original_exit_price, is_entry=False)
+            except Exception as eod_e:
+                 logging.error(f"Error during EOD exit for {ticker}: {eod_e}")
+                 if recorder.open_trade is not None:
+                     recorder.close({'exit_type': 'EOD Error', 'profit_loss': 0.0})
+
+        trades = recorder.trades
+        if engine.trace:
+            log_trade_trace(ticker, 'Intraday Backside', engine.trace, et_timestamps(self.rth_t_ms))
+
+        if trades:
+            total_pnl_ticker = sum(t.get('profit_loss', 0.0) for t in trades)
+            logging.info(f"\nIntraday Backside Summary for {ticker}: Total P&L: ${total_pnl_ticker:.2f}")
+
+        return trades if trades else None
+
+def simulate_intraday_backside_trade(intraday_df: pd.DataFrame, ticker: str, date: datetime, current_account_size: float, winning_trade_count: int, float_size: float, daily_starting_balance: float, candidate_details: Dict | None = None,
+                                     ticker_day: 'TickerDay | None' = None) -> List[Dict] | None:
+    
     try:
         if intraday_df is None or len(intraday_df) < 2:
             logging.warning(f"Insufficient data provided for Intraday Backside {ticker} on {date.strftime('%Y-%m-%d')}")
             return None
 
-        eastern = pytz.timezone('US/Eastern')
         if 't' not in intraday_df.columns:
              logging.error(f"Timestamp column 't' not found in DataFrame for {ticker}.")
              return None
@@ -2021,327 +2874,29 @@ def simulate_intraday_backside_trade(intraday_df: pd.DataFrame, ticker: str, dat
                intraday_df['t'].dt.tz is None or \
                intraday_df['t'].dt.tz.zone != 'US/Eastern':
                 if pd.api.types.is_numeric_dtype(intraday_df['t']):
-                    intraday_df['t'] = pd.to_datetime(intraday_df['t'], unit='ms', errors='coerce', utc=True).dt.tz_convert(eastern)
+                    intraday_df['t'] = pd.to_datetime(intraday_df['t'], unit='ms', errors='coerce', utc=True).dt.tz_convert(EASTERN)
                 else:
-                    intraday_df['t'] = pd.to_datetime(intraday_df['t'], errors='coerce', utc=True).dt.tz_convert(eastern)
+                    intraday_df['t'] = pd.to_datetime(intraday_df['t'], errors='coerce', utc=True).dt.tz_convert(EASTERN)
             if intraday_df['t'].isnull().any():
                 logging.warning(f"Timestamp conversion resulted in NaT values for {ticker}. Removing invalid rows.")
                 intraday_df = intraday_df.dropna(subset=['t'])
                 if intraday_df.empty:
                     logging.error(f"No valid timestamp data remaining for {ticker} after cleaning NaT.")
                     return None
+            ensure_time_columns(intraday_df)
         except Exception as e:
             logging.error(f"Failed during timestamp column processing for {ticker}: {e}")
             return None
 
-        trades = []
-        position = 0
-        entry_price = 0.0
-        original_entry_price = 0.0
-        shares = 0
-        pre_trigger_two_count = 0
-        stuff_trigger_count = 0
-        move_qualified = False
-        pullback_qualified = False
-        price_history = []
-        high_of_day = float('-inf')
-        qualify_time = None
-        stop_loss = 0.0
-        halt_detected = False
-        last_candle_time = None
-        trade = None
-        
-        # NEW: Variables for trigger detection and delayed entry
-        trigger_detected = False
-        trigger_candle_index = -1
-
         required_cols = ['t', 'o', 'h', 'l', 'c', 'v']
         if not all(col in intraday_df.columns for col in required_cols):
              missing = [col for col in required_cols if col not in intraday_df.columns]
              logging.error(f"Missing required columns for {ticker}: {missing}. Cannot proceed.")
              return None
-        intraday_data = intraday_df[required_cols].to_dict('records')
-
-        day_open, open_price_time_ref = get_accurate_day_open(intraday_data, ticker, date, candidate_details)
-        if day_open is None or day_open <= 0:
-            logging.error(f"Could not determine valid positive day open for {ticker} on {date.strftime('%Y-%m-%d')}. Skipping.")
-            return None
-        logging.info(f"Using day open price ${day_open:.4f} for {ticker} calculations.")
-        high_of_day = day_open
-
-        market_hours_data_for_loop = []
-        for c in intraday_data:
-            try:
-                 if c['t'] is pd.NaT: continue
-                 candle_t_time = pd.to_datetime(c['t']).time()
-                 if time(9, 30) <= candle_t_time < time(16, 0):
-                     market_hours_data_for_loop.append(c)
-            except Exception as filter_e:
-                 logging.warning(f"Skipping candle due to error during market hours filtering for {ticker}: {c.get('t')}. Error: {filter_e}")
-                 continue
-        if not market_hours_data_for_loop:
-             logging.warning(f"No valid market hours data (9:30-15:59) found for {ticker} on {date.strftime('%Y-%m-%d')} after filtering.")
-             return None
-        logging.info(f"Starting intraday simulation for {ticker} with {len(market_hours_data_for_loop)} market hour candles.")
-
-        for i, candle in enumerate(market_hours_data_for_loop):
-            try:
-                candle_time = pd.to_datetime(candle.get('t'))
-                if candle_time is pd.NaT: continue
-                candle_hhmm = candle_time.hour * 100 + candle_time.minute
-                candle_open_price = float(candle.get('o', 0.0))
-                candle_high_price = float(candle.get('h', 0.0))
-                candle_low_price = float(candle.get('l', 0.0))
-                candle_close_price = float(candle.get('c', 0.0))
-                candle_volume = int(candle.get('v', 0))
-                if not all(p >= 0 for p in [candle_open_price, candle_high_price, candle_low_price, candle_close_price]):
-                     logging.warning(f"Skipping candle at {candle_time.strftime('%H:%M:%S')} for {ticker} due to negative OHLC price.")
-                     continue
-                if candle_high_price < max(candle_open_price, candle_low_price, candle_close_price) or \
-                   candle_low_price > min(candle_open_price, candle_high_price, candle_close_price):
-                     logging.warning(f"Skipping candle at {candle_time.strftime('%H:%M:%S')} for {ticker} due to illogical H/L relationship.")
-                     continue
-            except Exception as e:
-                logging.error(f"Error processing candle data at index {i} for {ticker}: {candle}. Error: {e}")
-                continue
-
-            if last_candle_time is not None:
-                time_diff_seconds = (candle_time - last_candle_time).total_seconds()
-                if time_diff_seconds > 180 and position != 0:
-                    halt_detected = True
-                    logging.warning(f"Possible halt detected for {ticker} ending at {candle_time.strftime('%H:%M:%S')}. Gap: {time_diff_seconds / 60:.1f} min")
-            last_candle_time = candle_time
 
-            high_of_day = max(high_of_day, candle_high_price)
-
-            highest_price_so_far = high_of_day
-            highest_move = ((highest_price_so_far - day_open) / day_open) * 100 if day_open > 0 else 0
-
-            if position != 0:
-                price_history.append({
-                    'time': candle_time, 'price': candle_close_price,
-                    'high': candle_high_price, 'low': candle_low_price
-                })
-
-            if halt_detected and position != 0:
-                 if candle_open_price > stop_loss:
-                    logging.warning(f"Post-halt gap through stop loss for {ticker} at {candle_time.strftime('%H:%M:%S')}")
-                    original_exit_price = candle_open_price
-                    exit_price = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-                    exit_time = candle_time
-                    pnl = (entry_price - exit_price) * abs(position)
-                    exit_commission = calculate_commission(abs(position) * exit_price)
-                    total_pnl = pnl - exit_commission
-                    local_current_account_size += total_pnl
-                    if trade:
-                        trade.update({
-                            'exit_time': exit_time, 'exit_price': exit_price, 'profit_loss': total_pnl,
-                            'commission': trade['commission'] + exit_commission, 'exit_type': 'Halt Gap Stop',
-                            'price_history': price_history, 'halt_detected': True,
-                            'stop_loss_hit_candle': {'time': candle_time.strftime('%H:%M:%S'), 'open': candle_open_price, 'high': candle_high_price, 'low': candle_low_price, 'close': candle_close_price, 'volume': candle_volume },
-                            'balance_after_trade': local_current_account_size })
-                        trades.append(trade)
-                        trade = None
-                    else: logging.error(f"Halt stop triggered for {ticker}, but 'trade' dict was None.")
-                    position = 0
-                    halt_detected = False
-                    price_history = []
-                    trigger_detected = False  # Reset trigger
-                    continue
-                 else:
-                    halt_detected = False
-
-            if position < 0:
-                if candle_high_price >= stop_loss or candle_open_price >= stop_loss:
-                    original_exit_price = candle_open_price if candle_open_price >= stop_loss else stop_loss
-                    exit_price = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-                    exit_time = candle_time
-                    pnl = (entry_price - exit_price) * abs(position)
-                    exit_commission = calculate_commission(abs(position) * exit_price)
-                    total_pnl = pnl - exit_commission
-                    local_current_account_size += total_pnl
-                    if trade:
-                        trade.update({
-                            'exit_time': exit_time, 'exit_price': exit_price, 'profit_loss': total_pnl,
-                            'commission': trade['commission'] + exit_commission, 'exit_type': 'Stop Loss',
-                            'price_history': price_history,
-                            'stop_loss_hit_candle': {'time': candle_time.strftime('%H:%M:%S'), 'open': candle_open_price, 'high': candle_high_price, 'low': candle_low_price, 'close': candle_close_price, 'volume': candle_volume },
-                            'balance_after_trade': local_current_account_size })
-                        trades.append(trade)
-                        trade = None
-                    else: logging.error(f"Stop loss triggered for {ticker}, but 'trade' dict was None.")
-                    logging.info(f"Stop Loss Exit for {ticker} @ ${exit_price:.4f}, P&L: ${total_pnl:.2f}")
-                    position = 0
-                    price_history = []
-                    trigger_detected = False  # Reset trigger
-                    continue
-
-                elif candle_hhmm >= INTRADAY_BACKSIDE_PARAMS['TIME_OF_DAY_MAX']:
-                    original_exit_price = candle_close_price
-                    if original_exit_price <= 0: original_exit_price = candle_open_price
-                    if original_exit_price <= 0: original_exit_price = entry_price
-                    exit_price = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-                    exit_time = candle_time
-                    pnl = (entry_price - exit_price) * abs(position)
-                    exit_commission = calculate_commission(abs(position) * exit_price)
-                    total_pnl = pnl - exit_commission
-                    local_current_account_size += total_pnl
-                    if trade:
-                        trade.update({
-                            'exit_time': exit_time, 'exit_price': exit_price, 'profit_loss': total_pnl,
-                            'commission': trade['commission'] + exit_commission, 'exit_type': 'Time Cutoff',
-                            'price_history': price_history, 'balance_after_trade': local_current_account_size })
-                        trades.append(trade)
-                        trade = None
-                    else: logging.error(f"Time cutoff exit for {ticker}, but 'trade' dict was None.")
-                    logging.info(f"Time Cutoff Exit for {ticker} @ ${exit_price:.4f}, P&L: ${total_pnl:.2f}")
-                    position = 0
-                    price_history = []
-                    trigger_detected = False  # Reset trigger
-                    continue
-
-            # MODIFIED: Check for trigger detection
-            if position == 0 and not trigger_detected and candle_hhmm <= INTRADAY_BACKSIDE_PARAMS['TIME_OF_DAY_MAX']:
-
-                if not move_qualified:
-                     if highest_move >= INTRADAY_BACKSIDE_PARAMS['MIN_PRICE_MOVE_PERCENT']:
-                         move_qualified = True
-                         qualify_time = candle_time
-                         logging.info(f"{ticker} qualified: Min move {INTRADAY_BACKSIDE_PARAMS['MIN_PRICE_MOVE_PERCENT']}% ({highest_move:.2f}%) at {qualify_time.strftime('%H:%M:%S')}")
-                     else: continue
-
-                if move_qualified:
-                    pullback = 0.0
-                    if high_of_day > day_open:
-                        pullback = ((high_of_day - candle_low_price) / (high_of_day - day_open)) * 100
-                    if not pullback_qualified and pullback >= INTRADAY_BACKSIDE_PARAMS['MIN_PULLBACK_PERCENT']:
-                        pullback_qualified = True
-                        logging.info(f"{ticker} qualified: Min pullback {INTRADAY_BACKSIDE_PARAMS['MIN_PULLBACK_PERCENT']}% ({pullback:.2f}%) at {candle_time.strftime('%H:%M:%S')}")
-                    if not pullback_qualified: continue
-
-                    if pullback_qualified:
-                        stuffWindow, stuffWindow2, stuffCandleHard = False, False, False
-                        try:
-                            if i >= 20:
-                                open20 = float(market_hours_data_for_loop[i-20].get('o',0))
-                                highs20 = [float(c.get('h',0)) for c in market_hours_data_for_loop[max(0,i-20):i+1]]
-                                high20 = max(highs20) if highs20 else 0
-                                cond20 = 1.0 if candle_close_price >= 8 else 0.2
-                                if open20 > 0 and high20 > 0: stuffWindow = (high20-open20 > cond20) and (candle_close_price < open20)
-                            if i >= 5:
-                                open5 = float(market_hours_data_for_loop[i-5].get('o',0))
-                                highs5 = [float(c.get('h',0)) for c in market_hours_data_for_loop[max(0,i-5):i+1]]
-                                high5 = max(highs5) if highs5 else 0
-                                cond5 = 1.4 if candle_close_price >= 8 else 0.25
-                                if open5 > 0 and high5 > 0: stuffWindow2 = (high5-open5 > cond5) and (candle_close_price < open5)
-                            condH = 0.7 if candle_close_price >= 8 else 0.2
-                            volCondH = 600000 if candle_close_price >= 8 else 900000
-                            if candle_open_price > 0:
-                                highMinusOpen = candle_high_price - candle_open_price
-                                closeLTopen = candle_close_price < candle_open_price
-                                volChkH = candle_volume > volCondH
-                                stuffCandleHard = highMinusOpen > condH and closeLTopen and volChkH
-                        except Exception as stuff_e: logging.warning(f"Error calculating stuff for {ticker} at {candle_time}: {stuff_e}")
-                        stuff_condition_met = stuffWindow or stuffWindow2 or stuffCandleHard
-
-                        cumulative_volume = sum(int(c.get('v', 0)) for c in market_hours_data_for_loop[:i+1])
-                        volume_check_passed = cumulative_volume >= 1000000
-
-                        if stuff_condition_met and volume_check_passed:
-                            # MODIFIED: Mark trigger detected but don't enter yet
-                            trigger_detected = True
-                            trigger_candle_index = i
-                            trigger_price = candle_close_price
-                            
-                            logging.info(f"TRIGGER DETECTED for {ticker} at {candle_time}, Price: ${trigger_price:.2f}")
-                            logging.info(f"Will enter on NEXT candle open (if available)")
-                            logging.info(f"Trigger conditions: StuffWindow={stuffWindow}, StuffWindow2={stuffWindow2}, StuffCandleHard={stuffCandleHard}")
-                            logging.info(f"Cumulative volume: {cumulative_volume:,}")
-            
-            # MODIFIED: Enter position on the candle AFTER trigger detection
-            elif position == 0 and trigger_detected and i == trigger_candle_index + 1:
-                # This is the candle immediately after the trigger candle
-                
-                # Check if we're still within time limits
-                if candle_hhmm <= INTRADAY_BACKSIDE_PARAMS['TIME_OF_DAY_MAX']:
-                    original_entry_price = candle_open_price  # Use OPEN of next candle
-                    if original_entry_price <= 0:
-                         logging.warning(f"Invalid entry price {original_entry_price} for {ticker}. Skipping.")
-                         trigger_detected = False  # Reset trigger
-                         continue
-                    entry_price = apply_slippage(original_entry_price, is_entry=True, is_short=True)
-
-                    risk_amount = STATIC_RISK_AMOUNT_INTRADAY if USE_STATIC_POSITION_SIZING_INTRADAY else daily_starting_balance * (INTRADAY_BACKSIDE_PARAMS['RISK_PERCENTAGE'] / 100.0)
-                    stop_loss = entry_price * (1 + INTRADAY_BACKSIDE_PARAMS['STOP_LOSS_PERCENT'])
-                    risk_per_share = stop_loss - entry_price
-                    if risk_per_share <= 0.01:
-                        logging.warning(f"Risk per share ${risk_per_share:.4f} too small for {ticker}. Skipping.")
-                        trigger_detected = False  # Reset trigger
-                        continue
-                    shares = int(risk_amount / risk_per_share)
-                    if shares <= 0:
-                         logging.warning(f"Shares ({shares}) invalid for {ticker}. Skipping.")
-                         trigger_detected = False  # Reset trigger
-                         continue
-
-                    position = -shares
-                    entry_commission = calculate_commission(abs(position) * entry_price)
-                    price_history = [{'time': candle_time, 'price': candle_close_price, 'high': candle_high_price, 'low': candle_low_price}]
-                    trade = {
-                        'ticker': ticker, 'date': date.date(), 'entry_time': candle_time,
-                        'entry_price': entry_price, 'original_entry_price': original_entry_price,
-                        'entry_candle_details': {'time': candle_time.strftime('%H:%M:%S'), 'open': candle_open_price, 'high': candle_high_price, 'low': candle_low_price, 'close': candle_close_price, 'volume': candle_volume },
-                        'shares': shares, 'commission': entry_commission, 'strategy': 'Intraday Backside',
-                        'float_size': float_size, 'high_of_day_at_entry': high_of_day,
-                        'move_percentage_at_entry': highest_move, 'pullback_percentage_at_entry': pullback,
-                        'stop_loss': stop_loss,
-                        'trigger_candle_index': trigger_candle_index,
-                        'entry_candle_index': i,
-                        'exit_time': None, 'exit_price': None, 'profit_loss': None, 'exit_type': None,
-                        'price_history': [], 'trailing_stop_activated': False, 'balance_after_trade': None,
-                        'halt_detected': False, 'stop_loss_hit_candle': None
-                    }
-                    logging.info(f"\nIntraday Backside Entry for {ticker} on {date.strftime('%Y-%m-%d')}:")
-                    logging.info(f" Time: {candle_time.strftime('%H:%M:%S')}, Entry: ${entry_price:.4f} (OPEN of candle after trigger), Stop: ${stop_loss:.4f}, Shares: {shares}")
-                    logging.info(f" HOD@entry: ${high_of_day:.4f}, Move%@entry: {highest_move:.2f}%, Pullback%@entry: {pullback:.2f}%")
-                    logging.info(f" Trigger was detected on previous candle, entered on current candle open")
-                else:
-                    logging.info("Next candle after trigger is past TIME_OF_DAY_MAX; trade not taken")
-                    trigger_detected = False  # Reset trigger
-
-        if position != 0 and trade:
-            try:
-                last_candle = market_hours_data_for_loop[-1]
-                last_candle_time = pd.to_datetime(last_candle.get('t'))
-                original_exit_price = float(last_candle.get('c', 0.0))
-                if original_exit_price <= 0: original_exit_price = float(last_candle.get('o', entry_price if entry_price > 0 else 0.1))
-                if original_exit_price <= 0: original_exit_price = entry_price if entry_price > 0 else 0.1
-
-                exit_price = apply_slippage(original_exit_price, is_entry=False, is_short=True)
-                exit_time = last_candle_time
-                pnl = (entry_price - exit_price) * abs(position)
-                exit_commission = calculate_commission(abs(position) * exit_price)
-                total_pnl = pnl - exit_commission
-                local_current_account_size += total_pnl
-
-                trade.update({
-                    'exit_time': exit_time, 'exit_price': exit_price, 'profit_loss': total_pnl,
-                    'commission': trade['commission'] + exit_commission, 'exit_type': 'EOD',
-                    'price_history': price_history, 'balance_after_trade': local_current_account_size })
-                trades.append(trade)
-                logging.info(f"EOD Exit for {ticker} @ ${exit_price:.4f}, P&L: ${total_pnl:.2f}")
-                position = 0
-            except Exception as eod_e:
-                 logging.error(f"Error during EOD exit for {ticker}: {eod_e}")
-                 if trade:
-                     trade.update({'exit_type': 'EOD Error', 'profit_loss': 0.0})
-                     trades.append(trade)
-
-        if trades:
-            total_pnl_ticker = sum(t.get('profit_loss', 0.0) for t in trades)
-            logging.info(f"\nIntraday Backside Summary for {ticker}: Total P&L: ${total_pnl_ticker:.2f}")
-
-        return trades if trades else None
+        ticker_day = resolve_ticker_day(intraday_df, ticker_day)
+        strategy = IntradayBacksideStrategy(float_size, daily_starting_balance)
+        return BarEngine(strategy, ticker_day, ticker, date, current_account_size).run()
 
     except Exception as e:
         logging.error(f"Fatal error in simulate_intraday_backside_trade for {ticker} on {date.strftime('%Y-%m-%d')}: {str(e)}")
@@ -2352,12 +2907,155 @@ def simulate_intraday_backside_trade(intraday_df: pd.DataFrame, ticker: str, dat
 # MAIN PROCESSING FUNCTION
 # ============================================================================
 
-def process_day_trades(date, para_df, gap_df, backside_df, daily_starting_balance, winning_trade_count):
+def new_day_data() -> Dict:
+    """
+    Per-date inputs process_day_trades loads from the cache or API: TickerDays, previous
+    closes and the Intraday Backside candidate list, each filled on first use.
+    
+    A fresh one per call gives the usual load-as-you-go behaviour; a sweep keeps them
+    across configurations so bars and signal features are loaded and computed once.
+    """
+    return {'ticker_days': {}, 'previous_closes': {}, 'intraday_candidates': None}
+
+def day_previous_close(day_data: Dict, ticker: str, date: datetime) -> float | None:
+    if ticker not in day_data['previous_closes']:
+        day_data['previous_closes'][ticker] = fetch_previous_close(ticker, date)
+    return day_data['previous_closes'][ticker]
+
+def day_intraday_candidates(day_data: Dict, date: datetime) -> List[Dict]:
+    if day_data['intraday_candidates'] is None:
+        day_data['intraday_candidates'] = find_intraday_backside_candidates(date, POLYGON_API_KEY)
+    return day_data['intraday_candidates']
+
+def prepare_gapper_setups(gap_tickers: pd.DataFrame, date: datetime, day_data: Dict) -> Dict[str, Dict]:
+    """
+    Load all of the day's Gapper candidates.
+    
+    Returns per-ticker setups (ticker_day, pre_market_high, yesterday_close) for tickers
+    with pre-market bars and a previous close.
+    """
+    setups = {}
+    for ticker in (gap_tickers['Symbol'].unique() if not gap_tickers.empty else ()):
+        try:
+            ticker_day = load_ticker_day(ticker, date, day_data['ticker_days'])
+            if ticker_day is None:
+                continue
+            intraday_df = ticker_day.df
+            pre_market_mask = intraday_df['minute_of_day'] < MARKET_OPEN_MINUTE
+            if not pre_market_mask.any():
+                continue
+            pre_market_high = intraday_df.loc[pre_market_mask, 'h'].max()
+            yesterday_close = day_previous_close(day_data, ticker, date)
+            if yesterday_close is not None:
+                setups[ticker] = {'ticker_day': ticker_day, 'pre_market_high': pre_market_high, 'yesterday_close': yesterday_close}
+        except Exception as e:
+            logging.error(f"Error processing Gapper trade for {ticker}: {str(e)}")
+            logging.error(traceback.format_exc())
+    return setups
+
+def load_day_data(date: datetime, strategy_dfs: Dict[str, pd.DataFrame]) -> Dict:
+    """
+    A new_day_data() dict for one date with the data process_day_trades will read already
+    loaded, using the same cheap filters it does: Gapper rows and Intraday Backside
+    candidates except on Mondays, and Backside rows only on Mondays (with their features
+    primed). On other days Backside only trades tickers a Gapper trade made eligible, which
+    the Gapper setups have loaded already; what else it needs is loaded on first use.
+    """
+    gap_df, backside_df = strategy_dfs['gap'], strategy_dfs['backside']
+    data = new_day_data()
+    is_monday = date.weekday() == 0
+    gap_tickers = gap_df[gap_df['Date'].dt.date == date.date()] if not is_monday and not gap_df.empty else pd.DataFrame()
+    backside_tickers = backside_df[backside_df['Date'].dt.date == date.date()]['Symbol'].unique() if is_monday and not backside_df.empty else []
+    prepare_gapper_setups(gap_tickers, date, data)
+    for ticker in backside_tickers:
+        try:
+            ticker_day = load_ticker_day(ticker, date, data['ticker_days'])
+            # BacksideStrategy.prepare only computes features for days with pre-market bars,
+            # with the first bar's close as reference price
+            if ticker_day is not None and len(ticker_day.df) >= 2 and ticker_day.session_index['rth'][0] > 0:
+                ticker_day.signal_features('Backside', float(ticker_day.bars['c'][0]))
+        except Exception as e:
+            logging.error(f"Error processing Backside trade for {ticker}: {str(e)}")
+            logging.error(traceback.format_exc())
+    if not is_monday:
+        for candidate in day_intraday_candidates(data, date):
+            load_ticker_day(candidate['ticker'], date, data['ticker_days'])
+    return data
+
+class DayPrefetcher:
+    """
+    Bounded producer/consumer between data loading and simulation.
+    
+    A background thread runs load_day_data for the dates in order and puts each result on a
+    queue at most depth days deep; run_trading_days takes them with get(). While one day is
+    simulated the next ones are fetched and preprocessed, so network and CPU overlap. The wait
+    times say which side is the bottleneck: the loader waits on a full queue when simulation
+    is slower, the simulator waits on an empty one when loading is.
+    """
+
+    def __init__(self, dates_to_process, strategy_dfs: Dict[str, pd.DataFrame], depth: int):
+        self.dates = list(dates_to_process)
+        self.strategy_dfs = strategy_dfs
+        self.depth = depth
+        self.queue = queue.Queue(maxsize=depth)
+        self.stopped = threading.Event()
+        self.load_seconds = 0.0
+        self.loader_wait_seconds = 0.0
+        self.simulator_wait_seconds = 0.0
+        self.thread = threading.Thread(target=self._load, name='day-prefetch', daemon=True)
+
+    def start(self) -> 'DayPrefetcher':
+        self.thread.start()
+        return self
+
+    def _load(self) -> None:
+        for date in self.dates:
+            load_start = perf_counter()
+            try:
+                data = load_day_data(date, self.strategy_dfs)
+            except Exception as e:
+                # process_day_trades loads whatever is missing and reports the error in its usual place
+                logging.error(f"Error prefetching data for {date}: {str(e)}")
+                data = new_day_data()
+            self.load_seconds += perf_counter() - load_start
+            wait_start = perf_counter()
+            while not self.stopped.is_set():
+                try:
+                    self.queue.put((date, data), timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            self.loader_wait_seconds += perf_counter() - wait_start
+            if self.stopped.is_set():
+                return
+
+    def get(self, date) -> Dict:
+        """The loaded data for date; dates must be taken in the order given."""
+        wait_start = perf_counter()
+        loaded_date, data = self.queue.get()
+        self.simulator_wait_seconds += perf_counter() - wait_start
+        assert loaded_date == date, f"prefetched {loaded_date}, expected {date}"
+        return data
+
+    def stop(self) -> Dict[str, float]:
+        self.stopped.set()
+        self.thread.join()
+        stats = {'depth': self.depth, 'load_seconds': self.load_seconds,
+                 'loader_wait_seconds': self.loader_wait_seconds, 'simulator_wait_seconds': self.simulator_wait_seconds}
+        logging.info(f"Prefetch ({self.depth} days deep): loading took {self.load_seconds:.1f}s, "
+                     f"loader waited {self.loader_wait_seconds:.1f}s on a full queue, "
+                     f"simulator waited {self.simulator_wait_seconds:.1f}s for data")
+        return stats
+
+def process_day_trades(date, para_df, gap_df, backside_df, daily_starting_balance, winning_trade_count, day_data=None):
     
     daily_trades = []
     backside_eligible_tickers = set()
     gapper_backside_tickers = set()
     processed_tickers = set()
+    if day_data is None:
+        day_data = new_day_data()
+    ticker_days = day_data['ticker_days']  # ticker -> TickerDay, fetched once and shared by the strategies below
     daily_balance = daily_starting_balance
 
     logging.info(f"\n==========================================")
@@ -2374,45 +3072,39 @@ def process_day_trades(date, para_df, gap_df, backside_df, daily_starting_balanc
             logging.info(f"Skipping Gapper trades for {date} (Monday)")
         gap_tickers = pd.DataFrame()
         
+    gapper_setups = prepare_gapper_setups(gap_tickers, date, day_data)
     for _, row in gap_tickers.iterrows():
         try:
             ticker = row['Symbol']
             if ticker in processed_tickers:
                 continue
             
-            intraday_data = fetch_intraday_data(ticker, date.strftime('%Y-%m-%d'))
-            if intraday_data is not None:
-                intraday_df = preprocess_data(intraday_data)
-                if intraday_df is not None and not intraday_df.empty:
-                    pre_market_data = intraday_df[intraday_df['t'].dt.time < time(9, 30)]
-                    if not pre_market_data.empty:
-                        pre_market_high = pre_market_data['h'].max()
-                        yesterday_close = fetch_previous_close(ticker, date)
-                        
-                        if yesterday_close is not None:
-                            result = simulate_gapper_trade(
-                                intraday_df, 
-                                ticker, 
-                                date, 
-                                daily_balance,
-                                yesterday_close, 
-                                pre_market_high, 
-                                winning_trade_count, 
-                                float_size=row.get('Float', 3000000)
-                            )
-                            
-                            if result:
-                                result['trailing_stop_activated'] = result.get('trailing_stop_activated', False)
-                                result['balance_after_trade'] = daily_balance + result['profit_loss']
-                                daily_balance = result['balance_after_trade']
-                                daily_trades.append(result)
-                                gapper_backside_tickers.add(ticker)
-                                if result.get('backside_eligible', False):
-                                    backside_eligible_tickers.add(ticker)
-                                else:
-                                    processed_tickers.add(ticker)
-                                if result['profit_loss'] > 0:
-                                    winning_trade_count += 1
+            setup = gapper_setups.get(ticker)
+            if setup is not None:
+                result = simulate_gapper_trade(
+                    setup['ticker_day'].df, 
+                    ticker, 
+                    date, 
+                    daily_balance,
+                    setup['yesterday_close'], 
+                    setup['pre_market_high'], 
+                    winning_trade_count, 
+                    float_size=row.get('Float', 3000000),
+                    ticker_day=setup['ticker_day']
+                )
+                
+                if result:
+                    result['trailing_stop_activated'] = result.get('trailing_stop_activated', False)
+                    result['balance_after_trade'] = daily_balance + result['profit_loss']
+                    daily_balance = result['balance_after_trade']
+                    daily_trades.append(result)
+                    gapper_backside_tickers.add(ticker)
+                    if result.get('backside_eligible', False):
+                        backside_eligible_tickers.add(ticker)
+                    else:
+                        processed_tickers.add(ticker)
+                    if result['profit_loss'] > 0:
+                        winning_trade_count += 1
         except Exception as e:
             logging.error(f"Error processing Gapper trade for {ticker}: {str(e)}")
             logging.error(traceback.format_exc())
@@ -2428,6 +3120,7 @@ def process_day_trades(date, para_df, gap_df, backside_df, daily_starting_balanc
             logging.info("Monday: Running Backside for ALL backside tickers (ignoring eligibility).")
         else:
             logging.info("Not Monday: Running Backside for eligible tickers only.")
+
             
         for _, row in backside_tickers.iterrows():
             try:
@@ -2440,38 +3133,37 @@ def process_day_trades(date, para_df, gap_df, backside_df, daily_starting_balanc
                 if ticker in processed_tickers:
                     continue
                     
-                intraday_data = fetch_intraday_data(ticker, date.strftime('%Y-%m-%d'))
-                if intraday_data is not None:
-                    intraday_df = preprocess_data(intraday_data)
-                    if intraday_df is not None and not intraday_df.empty:
-                        result = simulate_backside_trade_mac(
-                            intraday_df, 
-                            ticker, 
-                            date, 
-                            daily_balance,
-                            winning_trade_count, 
-                            row.get('Float', 3000000),
-                            daily_starting_balance  
-                        )
-                        
-                        if result:
-                            if isinstance(result, list):
-                                for trade in result:
-                                    trade['trailing_stop_activated'] = trade.get('trailing_stop_activated', False)
-                                    trade['balance_after_trade'] = daily_balance + trade['profit_loss']
-                                    daily_balance = trade['balance_after_trade']
-                                    daily_trades.append(trade)
-                                    processed_tickers.add(ticker)
-                                    if trade['profit_loss'] > 0:
-                                        winning_trade_count += 1
-                            else:
-                                result['trailing_stop_activated'] = result.get('trailing_stop_activated', False)
-                                result['balance_after_trade'] = daily_balance + result['profit_loss']
-                                daily_balance = result['balance_after_trade']
-                                daily_trades.append(result)
+                ticker_day = load_ticker_day(ticker, date, ticker_days)
+                if ticker_day is not None:
+                    result = simulate_backside_trade_mac(
+                        ticker_day.df, 
+                        ticker, 
+                        date, 
+                        daily_balance,
+                        winning_trade_count, 
+                        row.get('Float', 3000000),
+                        daily_starting_balance,
+                        ticker_day=ticker_day
+                    )
+                
+                    if result:
+                        if isinstance(result, list):
+                            for trade in result:
+                                trade['trailing_stop_activated'] = trade.get('trailing_stop_activated', False)
+                                trade['balance_after_trade'] = daily_balance + trade['profit_loss']
+                                daily_balance = trade['balance_after_trade']
+                                daily_trades.append(trade)
                                 processed_tickers.add(ticker)
-                                if result['profit_loss'] > 0:
+                                if trade['profit_loss'] > 0:
                                     winning_trade_count += 1
+                        else:
+                            result['trailing_stop_activated'] = result.get('trailing_stop_activated', False)
+                            result['balance_after_trade'] = daily_balance + result['profit_loss']
+                            daily_balance = result['balance_after_trade']
+                            daily_trades.append(result)
+                            processed_tickers.add(ticker)
+                            if result['profit_loss'] > 0:
+                                winning_trade_count += 1
 
             except Exception as e:
                 logging.error(f"Error processing Backside trade for {ticker}: {str(e)}")
@@ -2483,7 +3175,7 @@ def process_day_trades(date, para_df, gap_df, backside_df, daily_starting_balanc
         if date.weekday() == 0:
             logging.info(f"Skipping Intraday Backside trades for {date} (Monday)")
         else:
-            intraday_candidates = find_intraday_backside_candidates(date, POLYGON_API_KEY)
+            intraday_candidates = day_intraday_candidates(day_data, date)
             if intraday_candidates:
                 logging.info(f"Processing {len(intraday_candidates)} Intraday Backside candidates for {date}")
                 
@@ -2495,40 +3187,39 @@ def process_day_trades(date, para_df, gap_df, backside_df, daily_starting_balanc
                             logging.info(f"Skipping Intraday Backside for {ticker} - already traded")
                             continue
                             
-                        intraday_data = fetch_intraday_data(ticker, date.strftime('%Y-%m-%d'))
-                        if intraday_data is not None:
-                            intraday_df = preprocess_data(intraday_data)
-                            if intraday_df is not None and not intraday_df.empty:
-                                result = simulate_intraday_backside_trade(
-                                    intraday_df,
-                                    ticker,
-                                    date,
-                                    daily_balance,
-                                    winning_trade_count,
-                                    float_size=3000000,
-                                    daily_starting_balance=daily_starting_balance
-                                )
-                                
-                                if result:
-                                    if isinstance(result, list):
-                                        for trade in result:
-                                            trade['trailing_stop_activated'] = trade.get('trailing_stop_activated', False)
-                                            trade['balance_after_trade'] = daily_balance + trade['profit_loss']
-                                            daily_balance = trade['balance_after_trade']
-                                            trade['strategy'] = 'Intraday Backside'
-                                            daily_trades.append(trade)
-                                            processed_tickers.add(ticker)
-                                            if trade['profit_loss'] > 0:
-                                                winning_trade_count += 1
-                                    else:
-                                        result['trailing_stop_activated'] = result.get('trailing_stop_activated', False)
-                                        result['balance_after_trade'] = daily_balance + result['profit_loss']
-                                        daily_balance = result['balance_after_trade']
-                                        result['strategy'] = 'Intraday Backside'
-                                        daily_trades.append(result)
+                        ticker_day = load_ticker_day(ticker, date, ticker_days)
+                        if ticker_day is not None:
+                            result = simulate_intraday_backside_trade(
+                                ticker_day.df,
+                                ticker,
+                                date,
+                                daily_balance,
+                                winning_trade_count,
+                                float_size=3000000,
+                                daily_starting_balance=daily_starting_balance,
+                                ticker_day=ticker_day
+                            )
+                        
+                            if result:
+                                if isinstance(result, list):
+                                    for trade in result:
+                                        trade['trailing_stop_activated'] = trade.get('trailing_stop_activated', False)
+                                        trade['balance_after_trade'] = daily_balance + trade['profit_loss']
+                                        daily_balance = trade['balance_after_trade']
+                                        trade['strategy'] = 'Intraday Backside'
+                                        daily_trades.append(trade)
                                         processed_tickers.add(ticker)
-                                        if result['profit_loss'] > 0:
+                                        if trade['profit_loss'] > 0:
                                             winning_trade_count += 1
+                                else:
+                                    result['trailing_stop_activated'] = result.get('trailing_stop_activated', False)
+                                    result['balance_after_trade'] = daily_balance + result['profit_loss']
+                                    daily_balance = result['balance_after_trade']
+                                    result['strategy'] = 'Intraday Backside'
+                                    daily_trades.append(result)
+                                    processed_tickers.add(ticker)
+                                    if result['profit_loss'] > 0:
+                                        winning_trade_count += 1
 
                     except Exception as e:
                         logging.error(f"Error processing Intraday Backside trade for {ticker}: {str(e)}")
@@ -2549,6 +3240,361 @@ def process_day_trades(date, para_df, gap_df, backside_df, daily_starting_balanc
     
     return daily_trades, winning_trade_count
 
+_day_worker_context = {}  # set in each day worker by init_day_worker
+
+# Phase one of a two-phase run sizes every trade statically; size_day_trades re-sizes them after
+STATIC_SIZING_PARAMETERS = {'USE_STATIC_POSITION_SIZING': True}
+
+# Run settings a day worker must share with the parent; spawned workers only see import-time defaults
+DAY_WORKER_SETTINGS = ('USE_JIT_KERNELS', 'EXPLAIN_TRADES', 'output_format')
+
+def run_settings() -> Dict:
+    """The current DAY_WORKER_SETTINGS values, to hand to apply_run_settings in a worker."""
+    return {name: globals()[name] for name in DAY_WORKER_SETTINGS}
+
+def apply_run_settings(settings: Dict) -> None:
+    globals().update({name: settings[name] for name in DAY_WORKER_SETTINGS})
+
+def two_phase_supported() -> bool:
+    """
+    Whether size_day_trades can reproduce the sequential loop under the current sizing.
+    
+    Intraday Backside skips an entry that sizes to zero shares and then watches the ticker for
+    a later trigger, so which Intraday trades happen depends on the balance unless that
+    strategy is sized statically.
+    """
+    return USE_STATIC_POSITION_SIZING_INTRADAY
+
+def init_day_worker(strategy_dfs: Dict[str, pd.DataFrame], settings: Dict, params: Dict) -> None:
+    _day_worker_context['strategy_dfs'] = strategy_dfs
+    apply_run_settings(settings)
+    apply_parameters(params)
+
+def simulate_day(date, daily_starting_balance: float) -> Dict:
+    """
+    process_day_trades for one date in a day worker, with static sizing.
+    
+    Which trades happen and their fills do not depend on position size, so the result can be
+    re-sized for any balance by size_day_trades. Errors come back as text so the merge can log
+    them in date order.
+    """
+    strategy_dfs = _day_worker_context['strategy_dfs']
+    day_start_time = datetime.now()
+    previous = apply_parameters(STATIC_SIZING_PARAMETERS)
+    try:
+        daily_trades, _ = process_day_trades(
+            date, pd.DataFrame(), strategy_dfs['gap'], strategy_dfs['backside'], daily_starting_balance, 0
+        )
+    except Exception as e:
+        return {'error': str(e), 'traceback': traceback.format_exc()}
+    finally:
+        apply_parameters(previous)
+    return {'trades': daily_trades, 'seconds': (datetime.now() - day_start_time).total_seconds()}
+
+def simulate_days_in_parallel(dates_to_process, strategy_dfs: Dict[str, pd.DataFrame], starting_balance: float,
+                              workers: int, show_progress: bool = True, params: Dict | None = None) -> Dict:
+    """
+    Phase one of a two-phase run: simulate_day for every date on a process pool; date -> result.
+    
+    Workers get DAY_WORKER_SETTINGS and params (see apply_parameters) applied, so they match
+    the parent however processes are started. Pass the result to
+    run_trading_days(day_results=...) for the sizing and compounding pass, as many times as
+    needed (e.g. once per sizing setting).
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_day_worker,
+                             initargs=(strategy_dfs, run_settings(), params or {})) as executor:
+        futures = {executor.submit(simulate_day, date, starting_balance): date for date in dates_to_process}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Simulating trading days", disable=not show_progress):
+            results[futures[future]] = future.result()
+    return results
+
+def size_trade(trade: Dict, balance: float, daily_starting_balance: float) -> Dict:
+    """
+    A copy of a recorded trade re-sized for the given balances, with shares, commission and P&L
+    recomputed exactly as the strategy computes them.
+    
+    Gapper sizes from the running balance and Backside from the day's starting balance.
+    Intraday Backside is sized statically whenever two phases run (two_phase_supported), so
+    its trades are kept as recorded.
+    """
+    trade = dict(trade)
+    entry_price = trade['entry_price']
+    if trade['strategy'] == 'Gapper':
+        reference_price = trade['entry_reference_price']
+        shares1, shares2 = [
+            calculate_position_size(balance, reference_price, (stop_loss - reference_price) / reference_price, strategy)
+            for stop_loss, strategy in ((trade['stop_loss1'], 'Gapper1'), (trade['stop_loss2'], 'Gapper2'))
+        ]
+        profit_loss1 = (entry_price - trade['actual_exit_price1']) * shares1
+        commission1 = (entry_price + trade['actual_exit_price1']) * shares1 * (commission_percentage / 100)
+        if trade['actual_exit_price2'] is not None:
+            profit_loss2 = (entry_price - trade['actual_exit_price2']) * shares2
+            commission2 = (entry_price + trade['actual_exit_price2']) * shares2 * (commission_percentage / 100)
+        else:
+            profit_loss2 = 0
+            commission2 = 0
+        trade.update({'shares1': shares1, 'shares2': shares2,
+                      'profit_loss': (profit_loss1 - commission1) + (profit_loss2 - commission2),
+                      'commission': commission1 + commission2})
+    elif trade['strategy'] == 'Backside':
+        if USE_STATIC_POSITION_SIZING:
+            risk_amount = STATIC_RISK_AMOUNT_BACKSIDE
+        else:
+            risk_amount = daily_starting_balance * BACKSIDE_RISK_PERCENTAGE
+        shares = int(risk_amount / (entry_price * (1 + BACKSIDE_STOP_LOSS_PERCENT) - entry_price))
+        trade.update({'shares': shares, 'commission': calculate_commission(shares * entry_price),
+                      'profit_loss': (entry_price - trade['exit_price']) * shares - calculate_commission(shares * trade['exit_price']),
+                      'daily_starting_balance': daily_starting_balance})
+    return trade
+
+def size_day_trades(daily_trades: List[Dict], daily_starting_balance: float) -> List[Dict]:
+    """Phase two for one day: size_trade each trade in processing order and rebuild the balance fields as process_day_trades does."""
+    sized_trades = []
+    daily_balance = daily_starting_balance
+    for trade in daily_trades:
+        trade = size_trade(trade, daily_balance, daily_starting_balance)
+        trade['balance_after_trade'] = daily_balance + trade['profit_loss']
+        daily_balance = trade['balance_after_trade']
+        sized_trades.append(trade)
+    return sized_trades
+
+def read_checkpoint(checkpoint_path: str) -> Dict | None:
+    """
+    Replay a checkpoint journal written by run_trading_days: a header (starting balance and
+    current_parameters() of the run), then one record per finished day. Returns the restored
+    loop state, or None when there is no file. A record torn by a crash mid-write is dropped;
+    valid_bytes is where the intact journal ends.
+    """
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, 'rb') as f:
+        header = pickle.load(f)
+        state = {'starting_balance': header['starting_balance'], 'parameters': header.get('parameters', {}),
+                 'trades': [], 'daily_pnl_list': [], 'daily_account_sizes': [header['starting_balance']],
+                 'dates': [], 'final_balance': header['starting_balance'],
+                 'winning_trade_count': 0, 'last_date': None, 'days': 0, 'valid_bytes': f.tell()}
+        while True:
+            try:
+                record = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError, IndexError, MemoryError):
+                break
+            state['trades'].extend(record['trades'])
+            state['daily_pnl_list'].extend(record['daily_pnl'])
+            state['daily_account_sizes'].extend(record['daily_account_sizes'])
+            state['dates'].extend(record['dates'])
+            state.update(final_balance=record['balance'], winning_trade_count=record['winning_trade_count'],
+                         last_date=record['date'], days=state['days'] + 1, valid_bytes=f.tell())
+    return state
+
+def open_checkpoint(checkpoint_path: str, starting_balance: float, resume: bool):
+    """
+    The journal file to append day records to, and the state restored from it (None for a
+    fresh run, which truncates the file and writes a new header). Resuming a checkpoint
+    written under other strategy parameters raises ValueError rather than mixing two runs.
+    """
+    restored = read_checkpoint(checkpoint_path) if resume else None
+    if restored is None:
+        if resume:
+            logging.warning(f"No checkpoint at {checkpoint_path}, starting from the first date")
+        os.makedirs(os.path.dirname(checkpoint_path) or '.', exist_ok=True)
+        checkpoint = open(checkpoint_path, 'wb')
+        pickle.dump({'starting_balance': starting_balance, 'parameters': current_parameters()}, checkpoint)
+        checkpoint.flush()
+        return checkpoint, None
+
+    parameters = current_parameters()
+    changed = sorted(name for name in parameters.keys() | restored['parameters'].keys()
+                     if restored['parameters'].get(name) != parameters.get(name))
+    if changed:
+        raise ValueError(f"Checkpoint {checkpoint_path} was written with different parameters: {', '.join(changed)}")
+
+    checkpoint = open(checkpoint_path, 'r+b')
+    checkpoint.truncate(restored['valid_bytes'])
+    checkpoint.seek(restored['valid_bytes'])
+    if restored['starting_balance'] != starting_balance:
+        logging.warning(f"Checkpoint started from ${restored['starting_balance']:,.2f}, not ${starting_balance:,.2f}; keeping the checkpoint's")
+    logging.info(f"Resuming from {checkpoint_path}: {restored['days']} days up to {restored['last_date']}, "
+                 f"{len(restored['trades'])} trades, balance ${restored['final_balance']:,.2f}")
+    return checkpoint, restored
+
+def append_checkpoint(checkpoint, record: Dict) -> None:
+    """Write one day's record and force it to disk, so a kill after this point never loses the day."""
+    pickle.dump(record, checkpoint)
+    checkpoint.flush()
+    os.fsync(checkpoint.fileno())
+
+def cli_checkpoint(args, dates_to_process) -> Tuple[str | None, bool]:
+    """
+    The checkpoint a command-line run journals to, and whether to keep it once the run is done.
+    
+    A checkpoint named by --checkpoint or --append-to is kept for later appends. Otherwise
+    runs spanning more than one day (or asked to --resume) journal to a file per date range
+    in current_dir that only outlives a run that did not finish; single-day runs, such as the
+    API's --output-format json requests, do not checkpoint at all.
+    """
+    named = args.append_to or args.checkpoint
+    if named:
+        return named, True
+    if args.resume or len(dates_to_process) > 1:
+        return os.path.join(current_dir, f'backtest_checkpoint_{args.from_date}_{args.to_date}.pkl'), False
+    return None, False
+
+def run_trading_days(dates_to_process, strategy_dfs: Dict[str, pd.DataFrame], starting_balance: float,
+                     day_data: Dict | None = None, show_progress: bool = True, workers: int = 1,
+                     day_results: Dict | None = None, prefetch_depth: int = 0,
+                     checkpoint_path: str | None = None, resume: bool = False) -> Dict:
+    """
+    The main trading loop: process each date in order, compounding the account balance.
+    
+    day_data optionally maps each date to a new_day_data() dict that outlives the run (see
+    run_parameter_sweep). With workers > 1 the run goes in two phases: every day is simulated
+    on a process pool (simulate_days_in_parallel), then this loop sizes and compounds the
+    trades in date order (size_day_trades), with the same output as the sequential loop.
+    Two phases need static Intraday Backside sizing (two_phase_supported); otherwise the run
+    stays sequential. Passing day_results from an earlier phase one re-runs only the sizing
+    pass. Sequential runs with prefetch_depth > 0 load days ahead on a DayPrefetcher
+    thread, and the result also carries its wait times under 'prefetch'.
+    
+    With checkpoint_path every finished day is appended to a journal there (read_checkpoint);
+    resume=True restores the loop state from it and runs only the dates after its last day,
+    which also extends a finished run with new dates. Returns the trades, per-day balances and
+    P&L, the dates those per-day entries belong to (restored ones included), the final balance
+    and the starting balance (the checkpoint's when resuming).
+    """
+    all_trades = []
+    current_account_size = starting_balance
+    daily_account_sizes = [starting_balance]
+    winning_trade_count = 0
+    daily_pnl_list = []
+    covered_dates = []
+    trading_start_time = datetime.now()
+
+    checkpoint = None
+    if checkpoint_path is not None:
+        checkpoint, restored = open_checkpoint(checkpoint_path, starting_balance, resume)
+        if restored is not None:
+            starting_balance = restored['starting_balance']
+            all_trades, daily_pnl_list = restored['trades'], restored['daily_pnl_list']
+            daily_account_sizes, covered_dates = restored['daily_account_sizes'], restored['dates']
+            current_account_size, winning_trade_count = restored['final_balance'], restored['winning_trade_count']
+            if restored['last_date'] is not None:
+                dates_to_process = [date for date in dates_to_process if date > restored['last_date']]
+            logging.info(f"{len(dates_to_process)} trading days left to process")
+
+    if day_results is not None and not two_phase_supported():
+        raise ValueError("day_results need static Intraday Backside sizing (USE_STATIC_POSITION_SIZING_INTRADAY)")
+    if day_results is None and workers > 1 and day_data is None:
+        if two_phase_supported():
+            logging.info(f"Simulating {len(dates_to_process)} days on {workers} worker processes")
+            day_results = simulate_days_in_parallel(dates_to_process, strategy_dfs, starting_balance, workers, show_progress)
+        else:
+            logging.warning("Dynamic Intraday Backside sizing changes which trades happen; running days sequentially")
+    prefetcher = None
+    if day_results is None and day_data is None and prefetch_depth > 0:
+        prefetcher = DayPrefetcher(dates_to_process, strategy_dfs, prefetch_depth).start()
+
+    for day_index, date in enumerate(tqdm(dates_to_process, desc="Processing trading days", disable=not show_progress or day_results is not None)):
+        day_start_counts = (len(all_trades), len(daily_pnl_list), len(daily_account_sizes), len(covered_dates))
+        try:
+            day_start_time = datetime.now()
+
+            if day_results is None:
+                if prefetcher is not None:
+                    date_day_data = prefetcher.get(date)
+                else:
+                    date_day_data = day_data.get(date) if day_data is not None else None
+                daily_trades, winning_trade_count = process_day_trades(
+                    date, pd.DataFrame(), strategy_dfs['gap'], strategy_dfs['backside'],
+                    current_account_size, winning_trade_count, day_data=date_day_data
+                )
+                day_processing_time = (datetime.now() - day_start_time).total_seconds()
+            else:
+                day_result = day_results[date]
+                if 'error' in day_result:
+                    logging.error(f"Error processing trades for {date}: {day_result['error']}")
+                    logging.error(day_result['traceback'])
+                    continue
+                daily_trades = size_day_trades(day_result['trades'], current_account_size)
+                winning_trade_count += sum(trade['profit_loss'] > 0 for trade in daily_trades)
+                day_processing_time = day_result['seconds']
+                
+            if daily_trades:
+                all_trades.extend(daily_trades)
+                total_daily_pnl = sum(trade['profit_loss'] for trade in daily_trades)
+                current_account_size += total_daily_pnl
+                daily_account_sizes.append(current_account_size)
+                    
+                daily_pnl_list.append({
+                    'date': pd.to_datetime(date),
+                    'pnl': total_daily_pnl,
+                    'trades': len(daily_trades)
+                })
+                    
+                if output_format == 'text':
+                    logging.info(f"\nTrades for {date.strftime('%Y-%m-%d')} (Day {day_index + 1}/{len(dates_to_process)}):")
+                    logging.info(f"Daily P&L: ${total_daily_pnl:.2f}")
+                    logging.info(f"Number of trades: {len(daily_trades)}")
+                    logging.info(f"Account Balance: ${current_account_size:.2f}")
+                    logging.info(f"Processing time: {day_processing_time:.1f} seconds")
+                        
+                    for trade in daily_trades:
+                        pnl_indicator = "💰" if trade['profit_loss'] > 0 else "📉"
+                        logging.info(f"  {pnl_indicator} {trade['strategy']}: {trade['ticker']} = ${trade['profit_loss']:.2f}")
+                        
+            else:
+                daily_pnl_list.append({
+                    'date': pd.to_datetime(date),
+                    'pnl': 0,
+                    'trades': 0
+                })
+                daily_account_sizes.append(current_account_size)
+            covered_dates.append(date)
+
+            if (day_index + 1) % 10 == 0 and len(dates_to_process) > 20 and output_format == 'text':
+                elapsed_time = (datetime.now() - trading_start_time).total_seconds()
+                avg_time_per_day = elapsed_time / (day_index + 1)
+                remaining_days = len(dates_to_process) - (day_index + 1)
+                estimated_remaining_time = remaining_days * avg_time_per_day
+                    
+                current_return = ((current_account_size / starting_balance) - 1) * 100
+                    
+                logging.info(f"\nProgress Update:")
+                logging.info(f"  Completed: {day_index + 1}/{len(dates_to_process)} days ({(day_index + 1)/len(dates_to_process)*100:.1f}%)")
+                logging.info(f"  Current return: {current_return:.2f}%")
+                logging.info(f"  Total trades so far: {len(all_trades)}")
+                logging.info(f"  Estimated time remaining: {estimated_remaining_time/60:.1f} minutes")
+
+        except Exception as e:
+            logging.error(f"Error processing trades for {date}: {str(e)}")
+            logging.error(traceback.format_exc())
+            continue
+        finally:
+            # Days that failed are recorded too, so a resumed run continues after the same dates
+            if checkpoint is not None:
+                append_checkpoint(checkpoint, {
+                    'date': date, 'trades': all_trades[day_start_counts[0]:],
+                    'daily_pnl': daily_pnl_list[day_start_counts[1]:],
+                    'daily_account_sizes': daily_account_sizes[day_start_counts[2]:],
+                    'dates': covered_dates[day_start_counts[3]:],
+                    'balance': current_account_size, 'winning_trade_count': winning_trade_count
+                })
+
+    if checkpoint is not None:
+        checkpoint.close()
+    run = {
+        'trades': all_trades,
+        'daily_account_sizes': daily_account_sizes,
+        'daily_pnl_list': daily_pnl_list,
+        'dates': covered_dates,
+        'final_balance': current_account_size,
+        'winning_trade_count': winning_trade_count,
+        'starting_balance': starting_balance
+    }
+    if prefetcher is not None:
+        run['prefetch'] = prefetcher.stop()
+    return run
+
 # ============================================================================
 # ANALYSIS & REPORTING FUNCTIONS
 # ============================================================================
@@ -2629,6 +3675,7 @@ def analyze_equity_curve_rsi(trades_df, initial_balance=100000):
         plt.xlabel('Date')
         fig.autofmt_xdate()
         plt.tight_layout()
+        os.makedirs(charts_dir, exist_ok=True)
         plt.savefig(os.path.join(charts_dir, 'equity_rsi_analysis.png'))
         plt.close()
     else:
@@ -2704,6 +3751,7 @@ def print_performance_summary(trades_df):
                     verticalalignment='bottom', color='green')
     
     plt.tight_layout()
+    os.makedirs(charts_dir, exist_ok=True)
     plt.savefig(os.path.join(charts_dir, 'equity_curve_percent.png'))
     plt.close()
     
@@ -2887,6 +3935,7 @@ def plot_equity_curve(equity_curve):
     plt.grid(True)
     plt.xticks(rotation=45)
     plt.tight_layout()
+    os.makedirs(charts_dir, exist_ok=True)
     plt.savefig(os.path.join(charts_dir, 'equity_curve.png'))
     plt.close()
 
@@ -3078,6 +4127,7 @@ def plot_drawdown(drawdown):
     plt.grid(True)
     plt.xticks(rotation=45)
     plt.tight_layout()
+    os.makedirs(charts_dir, exist_ok=True)
     plt.savefig(os.path.join(charts_dir, 'drawdown.png'))
     plt.close()
 
@@ -3148,6 +4198,7 @@ def plot_monthly_equity_curve(trades_df, initial_account_size, charts_dir):
         
         # Use lower DPI to prevent oversized images
         chart_path = os.path.join(charts_dir, 'monthly_equity_curve.png')
+        os.makedirs(charts_dir, exist_ok=True)
         plt.savefig(chart_path, dpi=150, bbox_inches='tight')  # Reduced from 300 to 150
         plt.close()
         
@@ -3283,6 +4334,7 @@ def add_monthly_analysis_to_summary(trades_df, initial_account_size):
         return None
 
 def create_strategy_charts(trades_df):
+    os.makedirs(charts_dir, exist_ok=True)
     for strategy in ['Para', 'Gapper', 'Backside']:
         strategy_trades = trades_df[trades_df['strategy'] == strategy]
         if strategy_trades.empty:
@@ -3336,6 +4388,7 @@ def save_trade_results(trades_df, base_filename):
     from time import sleep
     
     max_attempts = 5
+    os.makedirs(current_dir, exist_ok=True)
     for attempt in range(max_attempts):
         try:
             if attempt == 0:
@@ -3404,6 +4457,7 @@ def save_trading_summary(trades_df, dates_to_process, daily_account_sizes, daily
                     logging.warning(f"Could not fix timezone in column {col}: {e}")
                     excel_df[col] = excel_df[col].astype(str)
         
+        os.makedirs(current_dir, exist_ok=True)
         with pd.ExcelWriter(summary_file, engine='openpyxl', mode='w') as writer:
             # Write main trades sheet
             excel_df.to_excel(writer, sheet_name='All Trades', index=False)
@@ -3525,14 +4579,738 @@ def create_ticker_analysis_report(trades_df: pd.DataFrame) -> pd.DataFrame:
         })
     
     analysis_df = pd.DataFrame(analysis_results)
+    os.makedirs(current_dir, exist_ok=True)
     analysis_df.to_csv(os.path.join(current_dir, 'ticker_analysis.csv'), index=False)
     return analysis_df
 
+# ============================================================================
+# MONTE CARLO EXECUTION NOISE
+# ============================================================================
+
+MONTE_CARLO_PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+def execution_legs(trades: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    One row per filled leg of the recorded trades, with the pre-slippage prices to re-price.
+    
+    Gapper trades give a row per leg taken (both legs share the entry fill); Backside and
+    Intraday Backside trades give one row each. entry_commission marks legs whose profit_loss
+    includes the entry commission (Gapper); the other strategies only book the exit commission
+    in profit_loss. Trades without a recorded exit fill keep their profit_loss as fixed_pnl.
+    """
+    legs = {name: [] for name in ('trade', 'entry_price', 'exit_price', 'shares', 'halt_exit', 'entry_commission')}
+    fixed_pnl = np.zeros(len(trades))
+    for index, trade in enumerate(trades):
+        if trade['strategy'] == 'Gapper':
+            trade_legs = [(trade['entry_reference_price'], trade[f'original_exit_price{leg}'], trade[f'shares{leg}'],
+                           trade[f'halt_exit_fill{leg}']) for leg in (1, 2) if trade[f'actual_exit_price{leg}'] is not None]
+            entry_commission = True
+        elif trade.get('original_exit_price') is not None:
+            trade_legs = [(trade['original_entry_price'], trade['original_exit_price'], trade['shares'], trade['halt_exit_fill'])]
+            entry_commission = False
+        else:
+            fixed_pnl[index] = trade.get('profit_loss') or 0.0
+            continue
+        for entry_price, exit_price, shares, halt_exit in trade_legs:
+            for name, value in zip(legs, (index, entry_price, exit_price, shares, halt_exit, entry_commission)):
+                legs[name].append(value)
+    execution = {
+        'trade': np.array(legs['trade'], dtype=np.int64),
+        'entry_price': np.array(legs['entry_price'], dtype=np.float64),
+        'exit_price': np.array(legs['exit_price'], dtype=np.float64),
+        'shares': np.array(legs['shares'], dtype=np.float64),
+        'halt_exit': np.array(legs['halt_exit'], dtype=bool),
+        'entry_commission': np.array(legs['entry_commission'], dtype=bool)
+    }
+    execution['fixed_pnl'] = fixed_pnl
+    return execution
+
+def sample_slippage(rng: np.random.Generator, shape: Tuple[int, int]) -> np.ndarray:
+    """apply_slippage's draw as a fraction of price: slippage_probability% of fills slip by U(min, max)%."""
+    slipped = rng.random(shape) < slippage_probability / 100
+    return np.where(slipped, rng.uniform(min_slippage_percentage, max_slippage_percentage, shape) / 100, 0.0)
+
+def simulate_execution_paths(execution: Dict[str, np.ndarray], trade_count: int, paths: int,
+                             rng: np.random.Generator, halt_slippage_multiplier: float = 1.5) -> np.ndarray:
+    """
+    Net P&L of every trade under `paths` fresh draws of slippage, skips and partial fills: a (paths × trades) matrix.
+    
+    Mirrors FillModel on short fills: entries slip down, exits up, and halt exits add
+    halt_slippage_multiplier times the slippage again. skip_trade_probability% of trades are
+    dropped and partial_fill_frequency% fill U(partial_fill_min/max_percentage)% of their shares.
+    """
+    trade = execution['trade']
+    entry_slippage = sample_slippage(rng, (paths, trade_count))
+    exit_slippage = sample_slippage(rng, (paths, len(trade)))
+    skipped = rng.random((paths, trade_count)) < skip_trade_probability / 100
+    partial = rng.random((paths, trade_count)) < partial_fill_frequency / 100
+    fill_fraction = np.where(partial, rng.uniform(partial_fill_min_percentage, partial_fill_max_percentage, (paths, trade_count)) / 100, 1.0)
+
+    entry_price, exit_price = execution['entry_price'], execution['exit_price']
+    entries = entry_price * (1 - entry_slippage[:, trade])
+    exits = exit_price * (1 + exit_slippage)
+    exits = np.where(execution['halt_exit'], exits + (exits - exit_price) * halt_slippage_multiplier, exits)
+    shares = np.where(skipped[:, trade], 0.0, np.floor(execution['shares'] * fill_fraction[:, trade]))
+
+    commission_rate = commission_percentage / 100
+    leg_pnl = (entries - exits) * shares - exits * shares * commission_rate
+    leg_pnl -= np.where(execution['entry_commission'], entries * shares * commission_rate, 0.0)
+
+    trade_pnl = np.zeros((paths, trade_count))
+    if len(trade):
+        trade_pnl[:, np.unique(trade)] = np.add.reduceat(leg_pnl, np.flatnonzero(np.r_[True, trade[1:] != trade[:-1]]), axis=1)
+    return trade_pnl + np.where(skipped, 0.0, execution['fixed_pnl'])
+
+def run_monte_carlo(trades: List[Dict], starting_balance: float, paths: int = 1000, seed: int = 0,
+                    chunk_size: int = 2000) -> Dict:
+    """
+    Return and drawdown distributions of the recorded trades under execution noise.
+    
+    Entries and exits stay at the prices the backtest chose; only fills are re-drawn, so no
+    bars are re-simulated. Shares keep their recorded values (exact under static sizing).
+    Drawdown is measured on daily balances like summarize_run. Paths run in chunks of
+    chunk_size to bound memory. Writes monte_carlo_paths.csv and monte_carlo_summary.csv.
+    """
+    monte_carlo_start_time = datetime.now()
+    rng = np.random.default_rng(seed)
+    execution = execution_legs(trades)
+    dates = pd.to_datetime(pd.Series([trade['date'] for trade in trades]))
+    order = np.argsort(dates.to_numpy(), kind='stable')
+    day_starts = np.flatnonzero(np.r_[True, dates.to_numpy()[order][1:] != dates.to_numpy()[order][:-1]]) if len(trades) else np.array([], dtype=np.int64)
+
+    total_returns, max_drawdowns = [], []
+    for chunk_start in range(0, paths, chunk_size):
+        chunk_paths = min(chunk_size, paths - chunk_start)
+        trade_pnl = simulate_execution_paths(execution, len(trades), chunk_paths, rng)
+        if len(trades):
+            daily_pnl = np.add.reduceat(trade_pnl[:, order], day_starts, axis=1)
+        else:
+            daily_pnl = np.zeros((chunk_paths, 0))
+        equity = starting_balance + np.cumsum(daily_pnl, axis=1)
+        equity = np.hstack([np.full((chunk_paths, 1), starting_balance), equity])
+        drawdown = equity / np.maximum.accumulate(equity, axis=1) - 1
+        total_returns.append((equity[:, -1] / starting_balance - 1) * 100)
+        max_drawdowns.append(drawdown.min(axis=1) * 100)
+
+    paths_df = pd.DataFrame({'total_return_pct': np.concatenate(total_returns), 'max_drawdown_pct': np.concatenate(max_drawdowns)})
+    summary_df = pd.DataFrame({
+        f'p{q}': [np.percentile(paths_df[column], q) for column in paths_df.columns] for q in MONTE_CARLO_PERCENTILES
+    }, index=paths_df.columns)
+    summary_df.insert(0, 'mean', paths_df.mean())
+    os.makedirs(current_dir, exist_ok=True)
+    paths_df.to_csv(os.path.join(current_dir, 'monte_carlo_paths.csv'), index_label='path')
+    summary_df.to_csv(os.path.join(current_dir, 'monte_carlo_summary.csv'), index_label='metric')
+
+    recorded_return = sum(trade.get('profit_loss') or 0.0 for trade in trades) / starting_balance * 100
+    logging.info(f"Monte Carlo: {paths} paths over {len(trades)} trades ({len(execution['trade'])} legs) "
+                 f"in {(datetime.now() - monte_carlo_start_time).total_seconds():.2f} seconds")
+    logging.info(f"  Recorded return: {recorded_return:.2f}%, probability of a loss: {(paths_df['total_return_pct'] < 0).mean() * 100:.1f}%")
+    for metric, row in summary_df.iterrows():
+        logging.info(f"  {metric}: mean {row['mean']:.2f}, " + ', '.join(f"p{q} {row[f'p{q}']:.2f}" for q in MONTE_CARLO_PERCENTILES))
+    return {'paths': paths_df, 'summary': summary_df}
+
+# ============================================================================
+# PARAMETER SWEEP
+# ============================================================================
+
+# Parameters read by compute_signal_features: changing one invalidates cached TickerDay features
+FEATURE_PARAMETERS = frozenset({
+    'STUFF_WINDOW_LOOKBACK', 'STUFF_WINDOW_2_LOOKBACK', 'STUFF_TRIGGER_MAX_CLOSE', 'STUFF_TRIGGER_MIN_VOLUME',
+    'MIN_OVERALL_MOVE_PERCENT', 'MIN_OVERALL_MOVE_PRICE_STEPS', 'EXTENSION_OCCURS_WITHIN_BARS',
+    'MIN_EXTENSION_PERCENT', 'MIN_PULLBACK_PERCENT'
+})
+
+# Module globals apply_parameters may override (besides 'INTRADAY_BACKSIDE_PARAMS.<KEY>')
+STRATEGY_PARAMETERS = FEATURE_PARAMETERS | frozenset({
+    'commission_percentage',
+    'risk_percentage_trade1', 'risk_percentage_trade2', 'min_share_price', 'min_gap_percentage',
+    'max_pmh_to_open_drop', 'GAPPER_STOP_1_PMH_MULTIPLIER', 'GAPPER_STOP_2_GAP_MULTIPLIER',
+    'USE_STATIC_POSITION_SIZING', 'USE_STATIC_POSITION_SIZING_INTRADAY', 'STATIC_RISK_AMOUNT_GAPPER_1',
+    'STATIC_RISK_AMOUNT_GAPPER_2', 'STATIC_RISK_AMOUNT_BACKSIDE', 'STATIC_RISK_AMOUNT_INTRADAY',
+    'BACKSIDE_STOP_LOSS_PERCENT', 'BACKSIDE_RISK_PERCENTAGE', 'PRE_MARKET_HIGH_VIOLATION_PERCENT',
+    'skip_trade_probability', 'slippage_probability', 'min_slippage_percentage', 'max_slippage_percentage',
+    'EXECUTION_SEED', 'partial_fill_frequency', 'partial_fill_min_percentage', 'partial_fill_max_percentage',
+    'PREVIOUS_CLOSE_MIN', 'PREVIOUS_CLOSE_MAX', 'PULLBACK_OCCURS_WITHIN_BARS', 'PULLBACK_HOLD_TIME_BARS',
+    'MAX_BAR_VOLUME_DAY', 'MAX_BAR_VOLUME_PM', 'MAX_TOTAL_VOLUME_PM', 'TRIGGER_EXCLUSION_1_MIN',
+    'TRIGGER_EXCLUSION_1_MAX', 'TRIGGER_EXCLUSION_2_MIN', 'TRIGGER_EXCLUSION_2_MAX', 'MIN_RUN_TIME_BARS',
+    'VOLUME_MAX', 'VOLUME_MIN', 'TIME_OF_DAY_MAX', 'TIME_OF_DAY_MIN'
+})
+
+_sweep_context = {}  # set in each sweep worker by init_sweep_worker
+
+def check_parameter_names(names) -> None:
+    """Raise ValueError for the first name apply_parameters does not take."""
+    for name in names:
+        if name.startswith('INTRADAY_BACKSIDE_PARAMS.'):
+            key = name.split('.', 1)[1]
+            if key not in INTRADAY_BACKSIDE_PARAMS:
+                raise ValueError(f"Unknown Intraday Backside parameter: {key}")
+        elif name not in STRATEGY_PARAMETERS:
+            raise ValueError(f"Unknown strategy parameter: {name}")
+
+def apply_parameters(params: Dict) -> Dict:
+    """
+    Override module-level strategy parameters and return their previous values.
+    
+    Names are from STRATEGY_PARAMETERS (e.g. 'PRE_MARKET_HIGH_VIOLATION_PERCENT',
+    'max_pmh_to_open_drop') or 'INTRADAY_BACKSIDE_PARAMS.<KEY>' for a key of that dict. Pass
+    the returned dict back in to restore.
+    """
+    check_parameter_names(params)  # before changing anything, so a bad name leaves the module as it was
+    previous = {}
+    module_globals = globals()
+    for name, value in params.items():
+        if name.startswith('INTRADAY_BACKSIDE_PARAMS.'):
+            key = name.split('.', 1)[1]
+            previous[name] = INTRADAY_BACKSIDE_PARAMS[key]
+            INTRADAY_BACKSIDE_PARAMS[key] = value
+        else:
+            previous[name] = module_globals[name]
+            module_globals[name] = value
+    return previous
+
+def current_parameters() -> Dict:
+    """Every parameter apply_parameters can set, by the same names, with its current value."""
+    parameters = {name: globals()[name] for name in sorted(STRATEGY_PARAMETERS)}
+    parameters.update({f'INTRADAY_BACKSIDE_PARAMS.{key}': value for key, value in INTRADAY_BACKSIDE_PARAMS.items()})
+    return parameters
+
+def expand_sweep_spec(spec: Dict) -> List[Dict]:
+    """
+    Parameter configurations for a sweep spec.
+    
+    {'grid': {name: [values...]}} gives every combination. {'random': {name: [low, high]},
+    'samples': N, 'seed': S} draws N configurations uniformly from each range (integers when
+    both bounds are integers) with its own generator, so the global random state is untouched.
+    """
+    if 'grid' in spec:
+        names = list(spec['grid'])
+        configs = [{}]
+        for name in names:
+            configs = [{**config, name: value} for config in configs for value in spec['grid'][name]]
+        return configs
+    if 'random' in spec:
+        rng = random.Random(spec.get('seed', 0))
+        configs = []
+        for _ in range(int(spec.get('samples', 20))):
+            config = {}
+            for name, (low, high) in spec['random'].items():
+                if isinstance(low, int) and isinstance(high, int):
+                    config[name] = rng.randint(low, high)
+                else:
+                    config[name] = rng.uniform(low, high)
+            configs.append(config)
+        return configs
+    raise ValueError("Sweep spec needs a 'grid' or a 'random' section")
+
+def summarize_run(run: Dict, starting_balance: float) -> Dict:
+    """Total return, max drawdown (on daily balances) and win rate of one run_trading_days result, in percent."""
+    trades = run['trades']
+    drawdown = calculate_drawdown(pd.Series(run['daily_account_sizes'], dtype=np.float64))
+    return {
+        'total_return_pct': float((run['final_balance'] / starting_balance) - 1) * 100,
+        'max_drawdown_pct': float(drawdown.min()) * 100,
+        'win_rate_pct': float(sum(trade['profit_loss'] > 0 for trade in trades) / len(trades) * 100) if trades else 0.0,
+        'trades': len(trades),
+        'final_balance': float(run['final_balance'])
+    }
+
+def load_sweep_data(dates_to_process, strategy_dfs: Dict[str, pd.DataFrame]) -> Dict:
+    """
+    Load every date's bars, previous closes and candidate lists once (load_day_data), so every
+    configuration sees the same data whatever its parameters. Returns date -> new_day_data()
+    dicts for run_trading_days.
+    """
+    return {date: load_day_data(date, strategy_dfs) for date in tqdm(dates_to_process, desc="Loading sweep data")}
+
+def init_sweep_worker(dates_to_process, strategy_dfs: Dict[str, pd.DataFrame], day_data: Dict, starting_balance: float,
+                      settings: Dict) -> None:
+    """
+    Process-pool initializer: keep the loaded data for every configuration this worker runs,
+    apply the parent's run_settings() as init_day_worker does, and quiet per-trade logging.
+    """
+    _sweep_context.update(dates_to_process=dates_to_process, strategy_dfs=strategy_dfs, day_data=day_data,
+                          starting_balance=starting_balance)
+    apply_run_settings(settings)
+    logging.disable(logging.WARNING)
+
+def clear_sweep_features(day_data: Dict) -> None:
+    for data in day_data.values():
+        for ticker_day in data['ticker_days'].values():
+            if ticker_day is not None:
+                ticker_day.clear_signal_features()
+
+def run_with_parameters(params: Dict, dates_to_process, strategy_dfs: Dict[str, pd.DataFrame], starting_balance: float,
+                        day_data: Dict) -> Dict:
+    """run_trading_days over loaded day_data with params applied (restored after), seeded like a standalone run."""
+    touches_features = bool(FEATURE_PARAMETERS.intersection(params))
+    previous = apply_parameters(params)
+    try:
+        if touches_features:
+            clear_sweep_features(day_data)
+        random.seed(42)
+        np.random.seed(42)
+        return run_trading_days(dates_to_process, strategy_dfs, starting_balance, day_data=day_data, show_progress=False)
+    finally:
+        apply_parameters(previous)
+        if touches_features:
+            clear_sweep_features(day_data)
+
+def run_sweep_config(config_id: int, params: Dict, dates_to_process=None) -> Dict:
+    """One configuration over the worker's loaded data (all of its dates unless a subset is given)."""
+    context = _sweep_context
+    dates_to_process = context['dates_to_process'] if dates_to_process is None else dates_to_process
+    run = run_with_parameters(params, dates_to_process, context['strategy_dfs'], context['starting_balance'], context['day_data'])
+    return {'config': config_id, **params, **summarize_run(run, context['starting_balance'])}
+
+def run_sweep_tasks(tasks: List[Tuple], worker_args: Tuple, workers: int, desc: str) -> List[Dict]:
+    """run_sweep_config for each (config_id, params[, dates]) task, on a process pool when workers > 1; rows in task order."""
+    rows = [None] * len(tasks)
+    if workers == 1:
+        logging_disabled = logging.root.manager.disable
+        init_sweep_worker(*worker_args)
+        try:
+            for index, task in enumerate(tqdm(tasks, desc=desc)):
+                rows[index] = run_sweep_config(*task)
+        finally:
+            logging.disable(logging_disabled)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_sweep_worker, initargs=worker_args) as executor:
+            futures = {executor.submit(run_sweep_config, *task): index for index, task in enumerate(tasks)}
+            for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+                rows[futures[future]] = future.result()
+    return rows
+
+def run_parameter_sweep(dates_to_process, strategy_dfs: Dict[str, pd.DataFrame], starting_balance: float,
+                        spec: Dict, workers: int | None = None) -> pd.DataFrame:
+    """
+    Backtest every configuration of a sweep spec (see expand_sweep_spec) over the same dates.
+    
+    Bars, previous closes, candidates and parameter-independent features are loaded once and
+    shared; configurations fan out over a process pool (workers=1 runs them in-process).
+    Returns one row per configuration, best total return first, also saved as
+    parameter_sweep_results.csv.
+    """
+    configs = expand_sweep_spec(spec)
+    check_parameter_names(sorted({name for config in configs for name in config}))  # fail before loading any data
+    workers = max(1, min(workers or os.cpu_count() or 1, len(configs)))
+    logging.info(f"Parameter sweep: {len(configs)} configurations over {len(dates_to_process)} days on {workers} worker(s)")
+
+    sweep_start_time = datetime.now()
+    day_data = load_sweep_data(dates_to_process, strategy_dfs)
+    logging.info(f"Sweep data loaded in {(datetime.now() - sweep_start_time).total_seconds():.1f} seconds")
+
+    rows = run_sweep_tasks(list(enumerate(configs)), (dates_to_process, strategy_dfs, day_data, starting_balance, run_settings()),
+                           workers, "Sweeping parameters")
+
+    results_df = pd.DataFrame(rows).sort_values(['total_return_pct', 'config'], ascending=[False, True]).reset_index(drop=True)
+    os.makedirs(current_dir, exist_ok=True)
+    results_df.to_csv(os.path.join(current_dir, 'parameter_sweep_results.csv'), index=False)
+    logging.info(f"Sweep finished in {(datetime.now() - sweep_start_time).total_seconds():.1f} seconds; top configurations:")
+    for _, row in results_df.head(10).iterrows():
+        params = ', '.join(f"{name}={row[name]}" for name in configs[int(row['config'])])
+        logging.info(f"  #{int(row['config'])} {params}: return {row['total_return_pct']:.2f}%, "
+                     f"max drawdown {row['max_drawdown_pct']:.2f}%, win rate {row['win_rate_pct']:.1f}% ({int(row['trades'])} trades)")
+    return results_df
+
+def walk_forward_folds(dates_to_process, train_days: int, test_days: int) -> List[Dict]:
+    """Rolling folds: train on train_days dates, test on the next test_days, then roll forward by test_days."""
+    folds = []
+    start = 0
+    while start + train_days < len(dates_to_process):
+        folds.append({
+            'fold': len(folds),
+            'train': dates_to_process[start:start + train_days],
+            'test': dates_to_process[start + train_days:start + train_days + test_days]
+        })
+        start += test_days
+    return folds
+
+def plot_walk_forward_equity(equity_curve: pd.Series, folds: List[Dict]) -> None:
+    plt.figure(figsize=(12, 6))
+    plt.plot(equity_curve.index, equity_curve.values)
+    for fold in folds[1:]:
+        plt.axvline(fold['test'][0], color='grey', linestyle='--', linewidth=0.8)
+    plt.title('Walk-Forward Out-of-Sample Equity Curve')
+    plt.xlabel('Date')
+    plt.ylabel('Account Value ($)')
+    plt.grid(True)
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    os.makedirs(charts_dir, exist_ok=True)
+    plt.savefig(os.path.join(charts_dir, 'walk_forward_equity_curve.png'))
+    plt.close()
+
+def run_walk_forward(dates_to_process, strategy_dfs: Dict[str, pd.DataFrame], starting_balance: float,
+                     spec: Dict, workers: int | None = None) -> Dict:
+    """
+    Walk-forward optimization: per fold, pick the spec's best configuration in-sample and trade it out of sample.
+    
+    spec is a sweep spec plus 'train_days' / 'test_days' (trading days, default 60 / 20) and the
+    summarize_run 'objective' to maximize (default 'total_return_pct'). Every (fold, configuration)
+    train run goes to one process pool over data loaded once; the test windows then run in date
+    order, each starting from the balance the previous one ended with, so the stitched
+    out-of-sample curve compounds like a single backtest. Writes walk_forward_folds.csv,
+    walk_forward_equity.csv and a chart; returns the fold table, equity curve and summary.
+    """
+    train_days, test_days = int(spec.get('train_days', 60)), int(spec.get('test_days', 20))
+    objective = spec.get('objective', 'total_return_pct')
+    configs = expand_sweep_spec(spec)
+    folds = walk_forward_folds(dates_to_process, train_days, test_days)
+    if not folds:
+        raise ValueError(f"Walk-forward needs more than {train_days} trading days, got {len(dates_to_process)}")
+    tasks = [(config_id, params, fold['train']) for fold in folds for config_id, params in enumerate(configs)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    logging.info(f"Walk-forward: {len(folds)} folds ({train_days} train / {test_days} test days) x "
+                 f"{len(configs)} configurations on {workers} worker(s), maximizing {objective}")
+
+    walk_forward_start_time = datetime.now()
+    day_data = load_sweep_data(dates_to_process, strategy_dfs)
+    rows = run_sweep_tasks(tasks, (dates_to_process, strategy_dfs, day_data, starting_balance, run_settings()), workers, "Optimizing folds")
+
+    fold_rows = []
+    oos_trades = []
+    oos_dates, oos_balances = [], []
+    balance = starting_balance
+    logging_disabled = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    try:
+        for fold in folds:
+            train_rows = rows[fold['fold'] * len(configs):(fold['fold'] + 1) * len(configs)]
+            best = max(train_rows, key=lambda row: (row[objective], -row['config']))
+            test_run = run_with_parameters(configs[best['config']], fold['test'], strategy_dfs, balance, day_data)
+            test_metrics = summarize_run(test_run, balance)
+            balance = test_run['final_balance']
+            oos_trades.extend(test_run['trades'])
+            oos_dates.extend(day['date'] for day in test_run['daily_pnl_list'])
+            oos_balances.extend(test_run['daily_account_sizes'][1:])
+            fold_rows.append({
+                'fold': fold['fold'],
+                'train_start': fold['train'][0].date(), 'train_end': fold['train'][-1].date(),
+                'test_start': fold['test'][0].date(), 'test_end': fold['test'][-1].date(),
+                'config': best['config'], **configs[best['config']],
+                f'train_{objective}': best[objective],
+                **{f'test_{name}': value for name, value in test_metrics.items()}
+            })
+    finally:
+        logging.disable(logging_disabled)
+
+    equity_curve = pd.Series(oos_balances, index=pd.DatetimeIndex(oos_dates, name='date'), name='balance', dtype=np.float64)
+    summary = summarize_run({'trades': oos_trades, 'daily_account_sizes': [starting_balance, *equity_curve],
+                             'final_balance': balance}, starting_balance)
+    folds_df = pd.DataFrame(fold_rows)
+    os.makedirs(current_dir, exist_ok=True)
+    folds_df.to_csv(os.path.join(current_dir, 'walk_forward_folds.csv'), index=False)
+    equity_curve.to_csv(os.path.join(current_dir, 'walk_forward_equity.csv'))
+    plot_walk_forward_equity(equity_curve, folds)
+
+    logging.info(f"Walk-forward finished in {(datetime.now() - walk_forward_start_time).total_seconds():.1f} seconds")
+    for row in fold_rows:
+        logging.info(f"  Fold {row['fold']}: {row['test_start']} to {row['test_end']} with config #{row['config']}: "
+                     f"train {objective} {row[f'train_{objective}']:.2f}, test return {row['test_total_return_pct']:.2f}%")
+    logging.info(f"Out-of-sample: return {summary['total_return_pct']:.2f}%, max drawdown {summary['max_drawdown_pct']:.2f}%, "
+                 f"win rate {summary['win_rate_pct']:.1f}% ({summary['trades']} trades)")
+    return {'folds': folds_df, 'equity_curve': equity_curve, 'summary': summary}
+
+# ============================================================================
+# LIBRARY API
+# ============================================================================
+
+def run_backtest(start, end, starting_balance: float = 100000, params: Dict | None = None,
+                 workers: int = 1, prefetch_depth: int = 0) -> Dict:
+    """
+    Backtest [start, end] in-process, the way the CLI does, without touching its output files.
+    
+    params overrides strategy parameters for this call only, by the names apply_parameters
+    takes (e.g. {'MIN_PULLBACK_PERCENT': 10, 'INTRADAY_BACKSIDE_PARAMS.MIN_VOLUME': 400000});
+    the module is left as it was. workers > 1 runs the two phases of run_trading_days when
+    two_phase_supported() holds under those params. Returns the run_trading_days result plus
+    'summary' (what --output-format json prints).
+    """
+    params = params or {}
+    start_date, end_date = pd.to_datetime(start), pd.to_datetime(end)
+    dates_to_process = pd.date_range(start=start_date, end=end_date, freq='B')
+    previous = apply_parameters(params)
+    try:
+        random.seed(42)
+        np.random.seed(42)
+        strategy_dfs = load_strategy_dfs(start_date, end_date)
+        day_results = None
+        if workers > 1 and two_phase_supported():
+            day_results = simulate_days_in_parallel(dates_to_process, strategy_dfs, starting_balance, workers,
+                                                    show_progress=False, params=params)
+        run = run_trading_days(dates_to_process, strategy_dfs, starting_balance, show_progress=False,
+                               day_results=day_results, prefetch_depth=prefetch_depth)
+    finally:
+        apply_parameters(previous)
+    return {**run, 'summary': run_json_results(run)}
+
+# ============================================================================
+# BACKTEST WORKER
+# ============================================================================
+
+# Bounds on what a long-lived worker keeps in memory between requests
+WORKER_CACHED_RESULTS = 256
+WORKER_CACHED_RANGES = 16
+WORKER_CACHED_DAYS = 260
+WORKER_REQUEST_THREADS = 8
+
+# JSON-RPC 2.0 error codes
+RPC_PARSE_ERROR = -32700
+RPC_INVALID_REQUEST = -32600
+RPC_METHOD_NOT_FOUND = -32601
+RPC_INVALID_PARAMS = -32602
+RPC_SERVER_ERROR = -32000
+
+# Keyword arguments of BacktestService.backtest a backtest request may pass
+BACKTEST_REQUEST_ARGUMENTS = ('from_date', 'to_date', 'starting_balance', 'params', 'refresh')
+
+def parameters_hash(params: Dict) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+def run_json_results(run: Dict) -> Dict:
+    """json_results for a run_trading_days result, as the CLI prints it."""
+    trades_df = pd.DataFrame(run['trades'])
+    if trades_df.empty:
+        return json_results(trades_df, 0.0, run['starting_balance'])
+    trades_df['date'] = pd.to_datetime(trades_df['date'])
+    return json_results(trades_df, calculate_daily_return(trades_df, run['starting_balance']), run['starting_balance'])
+
+def candidate_file_mtimes(date: datetime) -> Tuple:
+    """Modification times (None if missing) of the cached Gapper/Backside and Intraday Backside candidate lists for date."""
+    date_str = date.strftime('%Y-%m-%d')
+    mtimes = []
+    for name in (f"candidates_{date_str}.json", f"intraday_backside_candidates_{date_str}.json"):
+        try:
+            mtimes.append(os.stat(os.path.join(cache_dir, name)).st_mtime_ns)
+        except FileNotFoundError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+def backtest_arguments(params) -> Dict:
+    """The BacktestService.backtest keyword arguments in a backtest request's params; ValueError if they are not valid."""
+    if not isinstance(params, dict):
+        raise ValueError('backtest takes named params')
+    unknown = sorted(set(params) - set(BACKTEST_REQUEST_ARGUMENTS))
+    if unknown:
+        raise ValueError(f"Unknown backtest argument: {', '.join(unknown)}")
+    dates = []
+    for name in ('from_date', 'to_date'):
+        if not isinstance(params.get(name), str):
+            raise ValueError(f"{name} must be a date string")
+        try:
+            dates.append(pd.to_datetime(params[name]))
+        except ValueError:
+            raise ValueError(f"{name} is not a date: {params[name]}")
+    if dates[0] > dates[1]:
+        raise ValueError('from_date is after to_date')
+    starting_balance = params.get('starting_balance', 100000)
+    if isinstance(starting_balance, bool) or not isinstance(starting_balance, (int, float)) or not starting_balance > 0:
+        raise ValueError('starting_balance must be a positive number')
+    strategy_params = params.get('params') or {}
+    if not isinstance(strategy_params, dict):
+        raise ValueError('params must be an object of strategy parameters')
+    check_parameter_names(strategy_params)
+    if not isinstance(params.get('refresh', False), bool):
+        raise ValueError('refresh must be true or false')
+    return dict(params)
+
+class BacktestService:
+    """
+    Backtests for the persistent worker (--serve).
+    
+    Results are memoized by (date range, starting balance, parameters hash), and concurrent
+    identical requests wait on the one computation already running. Candidate frames per
+    range and loaded ticker-days per date stay warm between requests, evicted least recently
+    used. Each memo remembers the modification times of the cached candidate lists it was
+    built from and is rebuilt when they change on disk. Strategy parameters are module
+    globals, so backtests run one at a time on a single compute thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.compute = ThreadPoolExecutor(max_workers=1)
+        self.results = OrderedDict()  # key -> (candidate_file_mtimes per date, json_results dict)
+        self.pending = {}  # key -> Future of the computation in flight
+        self.strategy_dfs = OrderedDict()  # (from, to) -> (Gapper/Backside list mtimes, load_strategy_dfs frames)
+        self.day_data = OrderedDict()  # date -> [Intraday Backside list mtime, new_day_data()], filled as runs touch it
+        self.stats = {'requests': 0, 'computed': 0, 'memo_hits': 0, 'coalesced': 0, 'errors': 0}
+
+    def backtest(self, from_date: str, to_date: str, starting_balance: float = 100000, params: Dict | None = None,
+                 refresh: bool = False) -> Dict:
+        """The CLI's JSON result for one backtest; refresh=True recomputes instead of using the memo."""
+        start_date, end_date = pd.to_datetime(from_date), pd.to_datetime(to_date)
+        params = params or {}
+        key = (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'), float(starting_balance), parameters_hash(params))
+        sources = tuple(candidate_file_mtimes(date) for date in pd.date_range(start=start_date, end=end_date, freq='B'))
+        with self.lock:
+            self.stats['requests'] += 1
+            if not refresh and key in self.results and self.results[key][0] == sources:
+                self.results.move_to_end(key)
+                self.stats['memo_hits'] += 1
+                return self.results[key][1]
+            future = self.pending.get(key)
+            if future is None:
+                future = self.pending[key] = self.compute.submit(self._run, key, start_date, end_date, float(starting_balance), params)
+            else:
+                self.stats['coalesced'] += 1
+        return future.result()
+
+    def _run(self, key: Tuple, start_date: datetime, end_date: datetime, starting_balance: float, params: Dict) -> Dict:
+        try:
+            dates_to_process = pd.date_range(start=start_date, end=end_date, freq='B')
+            range_key = key[:2]
+            candidates_mtimes = tuple(candidate_file_mtimes(date)[0] for date in dates_to_process)
+            if range_key not in self.strategy_dfs or self.strategy_dfs[range_key][0] != candidates_mtimes:
+                strategy_dfs = load_strategy_dfs(start_date, end_date)
+                # Stamped after loading, which writes the lists it had to fetch
+                self.strategy_dfs[range_key] = (tuple(candidate_file_mtimes(date)[0] for date in dates_to_process), strategy_dfs)
+            self.strategy_dfs.move_to_end(range_key)
+            strategy_dfs = self.strategy_dfs[range_key][1]
+
+            day_data = {}
+            for date in dates_to_process:
+                intraday_mtime = candidate_file_mtimes(date)[1]
+                if date not in self.day_data or self.day_data[date][0] != intraday_mtime:
+                    self.day_data[date] = [intraday_mtime, new_day_data()]
+                self.day_data.move_to_end(date)
+                day_data[date] = self.day_data[date][1]
+            run = run_with_parameters(params, dates_to_process, strategy_dfs, starting_balance, day_data)
+            result = run_json_results(run)
+            sources = tuple(candidate_file_mtimes(date) for date in dates_to_process)
+            for date, (_, intraday_mtime) in zip(dates_to_process, sources):
+                self.day_data[date][0] = intraday_mtime
+
+            with self.lock:
+                self.stats['computed'] += 1
+                self.results[key] = (sources, result)
+                for cache, size in ((self.results, WORKER_CACHED_RESULTS), (self.strategy_dfs, WORKER_CACHED_RANGES),
+                                    (self.day_data, WORKER_CACHED_DAYS)):
+                    while len(cache) > size:
+                        cache.popitem(last=False)
+            return result
+        except Exception:
+            with self.lock:
+                self.stats['errors'] += 1
+            raise
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+    def status(self) -> Dict:
+        with self.lock:
+            return {**self.stats, 'cached_results': len(self.results), 'cached_ranges': len(self.strategy_dfs),
+                    'cached_days': len(self.day_data), 'in_flight': len(self.pending)}
+
+def handle_rpc_request(service: BacktestService, line: str) -> str | None:
+    """
+    Answer one JSON-RPC 2.0 request line; None for notifications (no id).
+    
+    Methods: backtest {from_date, to_date, starting_balance?, params?, refresh?} returns what
+    --output-format json prints; stats returns the service counters; ping returns "pong".
+    """
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        return json.dumps({'jsonrpc': '2.0', 'id': None, 'error': {'code': RPC_PARSE_ERROR, 'message': str(e)}})
+    if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+        return json.dumps({'jsonrpc': '2.0', 'id': None, 'error': {'code': RPC_INVALID_REQUEST, 'message': 'Invalid request'}})
+
+    request_id, method, params = request.get('id'), request['method'], request.get('params') or {}
+    call, response = None, None
+    if method == 'backtest':
+        try:
+            arguments = backtest_arguments(params)
+            call = lambda: service.backtest(**arguments)
+        except ValueError as e:
+            response = {'error': {'code': RPC_INVALID_PARAMS, 'message': str(e)}}
+    elif method == 'stats':
+        call = service.status
+    elif method == 'ping':
+        call = lambda: 'pong'
+    else:
+        response = {'error': {'code': RPC_METHOD_NOT_FOUND, 'message': f"Unknown method: {method}"}}
+
+    # Arguments were checked above, so anything raised from here on is the worker's failure
+    if call is not None:
+        try:
+            response = {'result': call()}
+        except Exception as e:
+            logging.error(f"Backtest worker request failed: {str(e)}")
+            logging.error(traceback.format_exc())
+            response = {'error': {'code': RPC_SERVER_ERROR, 'message': str(e)}}
+
+    if 'id' not in request:
+        return None
+    return json.dumps({'jsonrpc': '2.0', 'id': request_id, **response}, default=str)
+
+def serve_rpc_lines(service: BacktestService, lines, write) -> None:
+    """Answer request lines concurrently (so identical requests can coalesce), writing each response line under a lock."""
+    write_lock = threading.Lock()
+
+    def respond(line):
+        response = handle_rpc_request(service, line)
+        if response is not None:
+            with write_lock:
+                write(response + '\n')
+
+    with ThreadPoolExecutor(max_workers=WORKER_REQUEST_THREADS) as handlers:
+        for line in lines:
+            if line.strip():
+                handlers.submit(respond, line)
+
+class BacktestRPCHandler(socketserver.StreamRequestHandler):
+    """One Unix socket connection: newline-delimited JSON-RPC requests and responses."""
+
+    def handle(self):
+        def write(text):
+            self.wfile.write(text.encode())
+            self.wfile.flush()
+        serve_rpc_lines(self.server.service, (line.decode() for line in self.rfile), write)
+
+def serve_backtests(socket_path: str | None = None) -> None:
+    """
+    Run the persistent backtest worker until stdin closes (or forever on a socket).
+    
+    Requests and responses are one JSON object per line. On stdin/stdout, anything else the
+    backtest would print goes to stderr so it cannot corrupt the response stream.
+    """
+    service = BacktestService()
+    logging.info(f"Backtest worker ready on {socket_path or 'stdin/stdout'}")
+    logging.disable(logging.INFO)  # per-trade logging would swamp a long-lived worker's log
+    if socket_path is None:
+        responses = sys.stdout
+        sys.stdout = sys.stderr
+
+        def write(text):
+            responses.write(text)
+            responses.flush()
+        serve_rpc_lines(service, sys.stdin, write)
+        return
+
+    if not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+        raise ValueError("Unix sockets are not available on this platform; use --serve without --socket")
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    with socketserver.ThreadingUnixStreamServer(socket_path, BacktestRPCHandler) as server:
+        server.daemon_threads = True
+        server.service = service
+        server.serve_forever()
+
 # ============================================================================
 # MAIN EXECUTION BLOCK
 # ============================================================================
 
 if __name__ == "__main__":
+    args = parse_arguments()
+    START_DATE = args.from_date
+    END_DATE = args.to_date
+    TARGET_DATE = args.from_date
+    initial_account_size = args.starting_balance
+    output_format = args.output_format
+    USE_JIT_KERNELS = NUMBA_AVAILABLE and not args.no_jit
+    EXPLAIN_TRADES = args.explain_trades
+
     try:
         # Set up random seed for reproducibility
         random.seed(42)
@@ -3557,33 +5335,41 @@ if __name__ == "__main__":
         cache_stats = initialize_caching_system()
         logging.info(f"Cache system initialized with {cache_stats['total_count']} files ({cache_stats['size_mb']:.2f} MB)")
 
+        if args.serve:
+            serve_backtests(args.socket)
+            sys.exit(0)
+
         # Parse and validate dates (using CLI args now)
         try:
             start_date = pd.to_datetime(START_DATE)
             end_date = pd.to_datetime(END_DATE)
             logging.info(f"Running backtest for date range: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
-            candidates_dict = fetch_candidates_for_date_range(start_date, end_date, POLYGON_API_KEY)
+            strategy_dfs = load_strategy_dfs(start_date, end_date)
                 
         except ValueError as e:
             logging.error(f"Invalid date format: {str(e)}")
             raise
 
-        # Convert candidates to DataFrames
-        strategy_dfs = convert_candidates_to_dataframe(candidates_dict)
-        for key in strategy_dfs:
-            if 'Date' in strategy_dfs[key].columns:
-                strategy_dfs[key]['Date'] = pd.to_datetime(strategy_dfs[key]['Date'])
-
-        # Initialize tracking variables
-        all_trades = []
-        current_account_size = initial_account_size
-        daily_account_sizes = [initial_account_size]
-        winning_trade_count = 0
-        daily_pnl_list = []
-
         # Process trades
         dates_to_process = pd.date_range(start=start_date, end=end_date, freq='B')
 
+        if args.sweep:
+            with open(args.sweep, 'r') as f:
+                sweep_spec = json.load(f)
+            sweep_results = run_parameter_sweep(dates_to_process, strategy_dfs, initial_account_size, sweep_spec, args.sweep_workers)
+            if output_format == 'json':
+                print(json.dumps({'success': True, 'sweep': sweep_results.to_dict('records')}, default=str))
+            sys.exit(0)
+
+        if args.walk_forward:
+            with open(args.walk_forward, 'r') as f:
+                walk_forward_spec = json.load(f)
+            walk_forward = run_walk_forward(dates_to_process, strategy_dfs, initial_account_size, walk_forward_spec, args.sweep_workers)
+            if output_format == 'json':
+                print(json.dumps({'success': True, 'folds': walk_forward['folds'].to_dict('records'),
+                                  'summary': walk_forward['summary']}, default=str))
+            sys.exit(0)
+
         trading_start_time = datetime.now()
         
         logging.info(f"\n{'='*80}")
@@ -3592,66 +5378,17 @@ if __name__ == "__main__":
         logging.info(f"Processing {len(dates_to_process)} trading days")
         logging.info(f"Initial account size: ${initial_account_size:,.2f}")
 
-        for day_index, date in enumerate(tqdm(dates_to_process, desc="Processing trading days")):
-            try:
-                day_start_time = datetime.now()
-                
-                daily_trades, winning_trade_count = process_day_trades(
-                    date, pd.DataFrame(), strategy_dfs['gap'], strategy_dfs['backside'],
-                    current_account_size, winning_trade_count
-                )
-                
-                day_processing_time = (datetime.now() - day_start_time).total_seconds()
-                
-                if daily_trades:
-                    all_trades.extend(daily_trades)
-                    total_daily_pnl = sum(trade['profit_loss'] for trade in daily_trades)
-                    current_account_size += total_daily_pnl
-                    daily_account_sizes.append(current_account_size)
-                    
-                    daily_pnl_list.append({
-                        'date': pd.to_datetime(date),
-                        'pnl': total_daily_pnl,
-                        'trades': len(daily_trades)
-                    })
-                    
-                    if output_format == 'text':
-                        logging.info(f"\nTrades for {date.strftime('%Y-%m-%d')} (Day {day_index + 1}/{len(dates_to_process)}):")
-                        logging.info(f"Daily P&L: ${total_daily_pnl:.2f}")
-                        logging.info(f"Number of trades: {len(daily_trades)}")
-                        logging.info(f"Account Balance: ${current_account_size:.2f}")
-                        logging.info(f"Processing time: {day_processing_time:.1f} seconds")
-                        
-                        for trade in daily_trades:
-                            pnl_indicator = "💰" if trade['profit_loss'] > 0 else "📉"
-                            logging.info(f"  {pnl_indicator} {trade['strategy']}: {trade['ticker']} = ${trade['profit_loss']:.2f}")
-                        
-                else:
-                    daily_pnl_list.append({
-                        'date': pd.to_datetime(date),
-                        'pnl': 0,
-                        'trades': 0
-                    })
-                    daily_account_sizes.append(current_account_size)
-
-                if (day_index + 1) % 10 == 0 and len(dates_to_process) > 20 and output_format == 'text':
-                    elapsed_time = (datetime.now() - trading_start_time).total_seconds()
-                    avg_time_per_day = elapsed_time / (day_index + 1)
-                    remaining_days = len(dates_to_process) - (day_index + 1)
-                    estimated_remaining_time = remaining_days * avg_time_per_day
-                    
-                    current_return = ((current_account_size / initial_account_size) - 1) * 100
-                    
-                    logging.info(f"\nProgress Update:")
-                    logging.info(f"  Completed: {day_index + 1}/{len(dates_to_process)} days ({(day_index + 1)/len(dates_to_process)*100:.1f}%)")
-                    logging.info(f"  Current return: {current_return:.2f}%")
-                    logging.info(f"  Total trades so far: {len(all_trades)}")
-                    logging.info(f"  Estimated time remaining: {estimated_remaining_time/60:.1f} minutes")
-
-            except Exception as e:
-                logging.error(f"Error processing trades for {date}: {str(e)}")
-                logging.error(traceback.format_exc())
-                continue
+        checkpoint_path, keep_checkpoint = cli_checkpoint(args, dates_to_process)
+        run = run_trading_days(dates_to_process, strategy_dfs, initial_account_size, workers=args.workers,
+                               prefetch_depth=args.prefetch_depth, checkpoint_path=checkpoint_path,
+                               resume=args.resume or bool(args.append_to))
+        if checkpoint_path is not None and not keep_checkpoint:
+            os.remove(checkpoint_path)
+        initial_account_size = run['starting_balance']
+        all_trades = run['trades']
+        current_account_size = run['final_balance']
+        daily_account_sizes = run['daily_account_sizes']
+        daily_pnl_list = run['daily_pnl_list']
 
         trading_end_time = datetime.now()
         total_trading_time = (trading_end_time - trading_start_time).total_seconds()
@@ -3692,7 +5429,7 @@ if __name__ == "__main__":
                     if save_trade_results(trades_df, 'combined_trade_results_with_caching'):
                         logging.info("\nTrade results saved successfully")
                         
-                        save_trading_summary(trades_df, dates_to_process, daily_account_sizes, daily_pnl_list, rsi_stats)
+                        save_trading_summary(trades_df, run['dates'], daily_account_sizes, daily_pnl_list, rsi_stats)
                         ticker_analysis_df = create_ticker_analysis_report(trades_df)
                         logging.info("Ticker analysis report generated and saved as 'ticker_analysis.csv'.")
                         
@@ -3712,8 +5449,11 @@ if __name__ == "__main__":
                     logging.info(f"  Final Account: ${final_account_value:,.2f}")
                     logging.info(f"  Total Return: {total_return:.2f}%")
                     logging.info(f"  Total Trades: {total_trades_executed}")
-                    logging.info(f"  Trading Period: {dates_to_process[0].strftime('%Y-%m-%d')} to {dates_to_process[-1].strftime('%Y-%m-%d')}")
-                    
+                    logging.info(f"  Trading Period: {run['dates'][0].strftime('%Y-%m-%d')} to {run['dates'][-1].strftime('%Y-%m-%d')}")
+
+                if args.monte_carlo > 0:
+                    run_monte_carlo(all_trades, initial_account_size, args.monte_carlo, args.monte_carlo_seed)
+
             except Exception as e:
                 logging.error(f"Error processing trade results: {str(e)}")
                 logging.error(traceback.format_exc())
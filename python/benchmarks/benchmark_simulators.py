@@ -0,0 +1,77 @@
+import argparse
+import logging
+import os
+import random
+import sys
+from time import perf_counter
+from typing import Dict
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Consolidated_Backtest_June_2025 as backtest
+from tests.synthetic import generate_synthetic_day
+
+def benchmark_simulators(days: int = 50, seed: int = 0, repeats: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Time each simulator per ticker-day on synthetic days, with compiled and plain Python kernels.
+
+    Bars are preprocessed once outside the timed region and simulator logging is muted while
+    timing. Reports the best of `repeats` runs in milliseconds per ticker-day.
+    """
+    date = pd.Timestamp('2024-06-04')
+    frames = []
+    for day_seed in range(seed, seed + days):
+        bars, previous_close = generate_synthetic_day(day_seed)
+        df = backtest.preprocess_data(list(bars))
+        frames.append((df, previous_close, backtest.calculate_pre_market_high(df)))
+
+    simulators = {
+        'Gapper': lambda df, previous_close, pmh: backtest.simulate_gapper_trade(df, 'TEST', date, 100000.0, previous_close, pmh, 0, 0),
+        'Backside': lambda df, previous_close, pmh: backtest.simulate_backside_trade_mac(df, 'TEST', date, 100000.0, 0, 0, 100000.0),
+        'Intraday Backside': lambda df, previous_close, pmh: backtest.simulate_intraday_backside_trade(df, 'TEST', date, 100000.0, 0, 0, 100000.0)
+    }
+    modes = (True, False) if backtest.NUMBA_AVAILABLE else (False,)
+
+    use_jit = backtest.USE_JIT_KERNELS
+    timings = {}
+    logging.disable(logging.CRITICAL)
+    try:
+        for compiled in modes:
+            backtest.USE_JIT_KERNELS = compiled
+            # Warm-up pass so Numba compilation is not timed
+            for simulate in simulators.values():
+                simulate(*frames[0])
+            for strategy, simulate in simulators.items():
+                best = float('inf')
+                for _ in range(repeats):
+                    random.seed(seed)
+                    started = perf_counter()
+                    for frame in frames:
+                        simulate(*frame)
+                    best = min(best, perf_counter() - started)
+                timings.setdefault(strategy, {})['compiled' if compiled else 'python'] = best * 1000 / days
+    finally:
+        logging.disable(logging.NOTSET)
+        backtest.USE_JIT_KERNELS = use_jit
+
+    for strategy, timing in timings.items():
+        line = f"Benchmark {strategy}: {timing['python']:.2f} ms/ticker-day with plain Python kernels"
+        if 'compiled' in timing:
+            line += f", {timing['compiled']:.2f} ms/ticker-day compiled ({timing['python'] / timing['compiled']:.1f}x)"
+        logging.info(line)
+    return timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time each strategy simulator per ticker-day on synthetic data')
+    parser.add_argument('--days', type=int, default=50, help='Synthetic ticker-days per simulator')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the first synthetic day')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed runs per simulator; the best one is reported')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # The simulators fall back to the Polygon API for missing opens; benchmarks stay offline
+    backtest.fetch_daily_open_price = lambda ticker, date_str: None
+    backtest.fetch_previous_close = lambda symbol, date: None
+    benchmark_simulators(args.days, args.seed, args.repeats)
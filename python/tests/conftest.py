@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Consolidated_Backtest_June_2025 as backtest
+from tests.synthetic import BACKSIDE_TICKERS, DATES, GAPPER_TICKERS, INTRADAY_TICKERS, generate_synthetic_day
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    """The simulators fall back to the Polygon API for missing opens and closes; tests never reach it."""
+    monkeypatch.setattr(backtest, 'fetch_daily_open_price', lambda ticker, date_str: None)
+    monkeypatch.setattr(backtest, 'fetch_previous_close', lambda symbol, date: None)
+
+@pytest.fixture
+def strategy_dfs(monkeypatch):
+    """Two weeks of synthetic candidates, with the data fetchers answering from generate_synthetic_day."""
+    days = {}
+    for day_index, date in enumerate(DATES):
+        for ticker_index in range(5):
+            days[(f'T{ticker_index}', date.strftime('%Y-%m-%d'))] = generate_synthetic_day(day_index * 10 + ticker_index,
+                                                                                           date.strftime('%Y-%m-%d'))
+    monkeypatch.setattr(backtest, 'fetch_intraday_data', lambda ticker, date: list(days[(ticker, date)][0]))
+    monkeypatch.setattr(backtest, 'fetch_previous_close', lambda symbol, date: days[(symbol, date.strftime('%Y-%m-%d'))][1])
+    monkeypatch.setattr(backtest, 'find_intraday_backside_candidates',
+                        lambda date, api_key: [{'ticker': ticker} for ticker in INTRADAY_TICKERS])
+    # Random slippage, so runs only agree if every fill draws from the same stream
+    monkeypatch.setattr(backtest, 'slippage_probability', 70)
+    monkeypatch.setattr(backtest, 'min_slippage_percentage', 0.1)
+    monkeypatch.setattr(backtest, 'max_slippage_percentage', 2.0)
+    return {
+        'gap': pd.DataFrame([{'Date': date, 'Symbol': ticker, 'Float': 3e6} for date in DATES for ticker in GAPPER_TICKERS]),
+        'backside': pd.DataFrame([{'Date': date, 'Symbol': ticker, 'Float': 3e6} for date in DATES for ticker in BACKSIDE_TICKERS])
+    }
+
+@pytest.fixture
+def output_dir(monkeypatch, tmp_path):
+    """Point the output and cache directories at a folder that does not exist yet, as on a fresh machine."""
+    output_dir = tmp_path / 'Algo Tests'
+    monkeypatch.setattr(backtest, 'current_dir', str(output_dir))
+    monkeypatch.setattr(backtest, 'charts_dir', str(output_dir / 'trade_charts'))
+    monkeypatch.setattr(backtest, 'cache_dir', str(output_dir / 'data_cache'))
+    return output_dir
+
+@pytest.fixture
+def loads(strategy_dfs, monkeypatch, output_dir):
+    """The load_strategy_dfs calls made, answered with the synthetic candidates."""
+    calls = []
+    monkeypatch.setattr(backtest, 'load_strategy_dfs', lambda start_date, end_date: calls.append((start_date, end_date)) or strategy_dfs)
+    return calls
@@ -0,0 +1,68 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import Consolidated_Backtest_June_2025 as backtest
+
+# Candidate days of the strategy_dfs fixture (conftest.py)
+DATES = pd.date_range('2024-06-03', '2024-06-14', freq='B')
+GAPPER_TICKERS = ('T0', 'T1', 'T2')
+BACKSIDE_TICKERS = ('T0', 'T1', 'T3', 'T4')
+INTRADAY_TICKERS = ('T2', 'T4')
+
+def generate_synthetic_day(seed: int, date: str = '2024-06-04') -> Tuple[List[Dict], float]:
+    """
+    Random but reproducible Polygon-style minute bars (4:00-19:59 ET) and a previous close.
+
+    Days gap up pre-market, run into a random peak and fade; some include multi-minute
+    halts (often resuming sharply higher) and every fifth day collapses from the open
+    hard enough to arm the Gapper trailing stop, then rebounds in the afternoon.
+    """
+    rng = np.random.default_rng(seed)
+    session_start_ms = int(backtest.EASTERN.localize(pd.Timestamp(date).to_pydatetime().replace(hour=4)).timestamp() * 1000)
+    previous_close = float(rng.choice([0.5, 1.0, 2.5, 5.0]))
+    collapse = seed % 5 == 4
+    peak_minute = backtest.MARKET_OPEN_MINUTE + 5 if collapse else int(rng.integers(600, 800))
+    fade_drift = -0.02 if collapse else -0.004
+    price = previous_close * rng.uniform(1.3, 2.0)
+
+    bars = []
+    minute = backtest.PRE_MARKET_START_MINUTE
+    while minute < 20 * 60:
+        if minute < backtest.MARKET_OPEN_MINUTE and rng.random() < 0.03:
+            minute += 1
+            continue
+        if backtest.MARKET_OPEN_MINUTE + 5 < minute < 15 * 60 and rng.random() < 0.004:
+            minute += int(rng.integers(4, 9))
+            if rng.random() < 0.5:
+                price *= 1.35
+            continue
+
+        drift = 0.001 if minute < backtest.MARKET_OPEN_MINUTE else (0.006 if minute < peak_minute else fade_drift)
+        if collapse and minute >= 13 * 60:
+            drift = 0.02
+        o = price
+        c = max(0.05, o * (1 + drift + rng.normal(0, 0.02)))
+        h = max(o, c) * (1 + abs(rng.normal(0, 0.02)))
+        l = min(o, c) * (1 - abs(rng.normal(0, 0.015)))
+        bars.append({
+            'v': int(rng.integers(10000, 2000000)), 'vw': (o + c) / 2,
+            'o': round(o, 4), 'c': round(c, 4), 'h': round(h, 4), 'l': round(l, 4),
+            't': session_start_ms + (minute - backtest.PRE_MARKET_START_MINUTE) * backtest.MS_PER_MINUTE, 'n': 10
+        })
+        price = c
+        minute += 1
+    return bars, previous_close
+
+def results_match(a, b) -> bool:
+    """Exact structural comparison of simulator results (NaN equals NaN)."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(results_match(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(results_match(x, y) for x, y in zip(a, b))
+    if a is None or b is None:
+        return a is b
+    if isinstance(a, float) and isinstance(b, float) and np.isnan(a) and np.isnan(b):
+        return True
+    return bool(a == b)
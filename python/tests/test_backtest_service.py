@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import Consolidated_Backtest_June_2025 as backtest
+
+FROM_DATE, TO_DATE = '2024-06-03', '2024-06-07'
+DAY = pd.Timestamp('2024-06-04')
+
+@pytest.fixture
+def service(loads):
+    return backtest.BacktestService()
+
+def rpc(service, request):
+    return json.loads(backtest.handle_rpc_request(service, json.dumps(request)))
+
+def write_cache_file(name):
+    os.makedirs(backtest.cache_dir, exist_ok=True)
+    with open(os.path.join(backtest.cache_dir, name), 'w') as f:
+        json.dump({'gap': [], 'backside': []}, f)
+
+def test_backtest_matches_run_backtest(service):
+    assert service.backtest(FROM_DATE, TO_DATE) == backtest.run_backtest(FROM_DATE, TO_DATE)['summary']
+
+def test_memo_hits(service, loads):
+    result = service.backtest(FROM_DATE, TO_DATE)
+    assert service.backtest(FROM_DATE, TO_DATE, starting_balance=100000.0) is result
+    assert service.backtest(FROM_DATE, TO_DATE, params={'MIN_PULLBACK_PERCENT': 10}) is not result
+    assert service.backtest(FROM_DATE, TO_DATE, refresh=True) == result
+    stats = service.status()
+    assert (stats['requests'], stats['memo_hits'], stats['computed'], stats['cached_results']) == (4, 1, 3, 2)
+    # Candidate frames are loaded once per range, whatever the parameters
+    assert len(loads) == 1
+
+def test_concurrent_identical_requests_coalesce(service, loads, strategy_dfs, monkeypatch):
+    release = threading.Event()
+
+    def load_when_released(start_date, end_date):
+        release.wait()
+        loads.append((start_date, end_date))
+        return strategy_dfs
+    monkeypatch.setattr(backtest, 'load_strategy_dfs', load_when_released)
+    results = [None] * 3
+
+    def request(index):
+        results[index] = service.backtest(FROM_DATE, TO_DATE)
+    threads = [threading.Thread(target=request, args=(index,)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 10
+    while service.status()['coalesced'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    stats = service.status()
+    assert (stats['requests'], stats['coalesced'], stats['computed'], stats['in_flight']) == (3, 2, 1, 0)
+    assert len(loads) == 1 and results[0] is results[1] is results[2]
+
+def test_changed_candidate_files_invalidate_the_memos(service, loads):
+    result = service.backtest(FROM_DATE, TO_DATE)
+    day_data = service.day_data[DAY][1]
+
+    write_cache_file('candidates_2024-06-05.json')
+    assert service.backtest(FROM_DATE, TO_DATE) == result
+    assert len(loads) == 2 and service.status()['computed'] == 2
+    assert service.day_data[DAY][1] is day_data
+
+    write_cache_file('intraday_backside_candidates_2024-06-04.json')
+    service.backtest(FROM_DATE, TO_DATE)
+    assert len(loads) == 2 and service.status()['computed'] == 3
+    assert service.day_data[DAY][1] is not day_data
+
+    service.backtest(FROM_DATE, TO_DATE)
+    assert service.status()['memo_hits'] == 1
+
+def test_params_restored_after_a_request(service, monkeypatch):
+    before = backtest.current_parameters()
+    service.backtest(FROM_DATE, TO_DATE, params={'MIN_PULLBACK_PERCENT': 10, 'INTRADAY_BACKSIDE_PARAMS.MIN_VOLUME': 1})
+    assert backtest.current_parameters() == before
+
+    monkeypatch.setattr(backtest, 'run_trading_days', lambda *args, **kwargs: 1 / 0)
+    response = rpc(service, {'jsonrpc': '2.0', 'id': 1, 'method': 'backtest',
+                             'params': {'from_date': FROM_DATE, 'to_date': TO_DATE, 'params': {'MIN_PULLBACK_PERCENT': 10}}})
+    assert response['error']['code'] == backtest.RPC_SERVER_ERROR
+    assert backtest.current_parameters() == before
+
+def test_rpc_backtest(service):
+    response = rpc(service, {'jsonrpc': '2.0', 'id': 'a', 'method': 'backtest', 'params': {'from_date': FROM_DATE, 'to_date': TO_DATE}})
+    assert response == {'jsonrpc': '2.0', 'id': 'a', 'result': json.loads(json.dumps(service.backtest(FROM_DATE, TO_DATE), default=str))}
+    assert rpc(service, {'jsonrpc': '2.0', 'id': 2, 'method': 'stats'})['result']['memo_hits'] == 1
+    assert rpc(service, {'jsonrpc': '2.0', 'id': 3, 'method': 'ping'})['result'] == 'pong'
+
+@pytest.mark.parametrize('line,code', [
+    ('not json', backtest.RPC_PARSE_ERROR),
+    ('[1]', backtest.RPC_INVALID_REQUEST),
+    ('{"jsonrpc": "2.0", "id": 1}', backtest.RPC_INVALID_REQUEST),
+    ('{"jsonrpc": "2.0", "id": 1, "method": 3}', backtest.RPC_INVALID_REQUEST)
+])
+def test_malformed_requests(service, line, code):
+    response = json.loads(backtest.handle_rpc_request(service, line))
+    assert (response['jsonrpc'], response['id'], response['error']['code']) == ('2.0', None, code)
+
+def test_unknown_method(service):
+    assert rpc(service, {'jsonrpc': '2.0', 'id': 1, 'method': 'optimize'})['error']['code'] == backtest.RPC_METHOD_NOT_FOUND
+
+@pytest.mark.parametrize('params', [
+    [FROM_DATE, TO_DATE],
+    {'from_date': FROM_DATE},
+    {'from_date': FROM_DATE, 'to_date': 'June'},
+    {'from_date': TO_DATE, 'to_date': FROM_DATE},
+    {'from_date': FROM_DATE, 'to_date': TO_DATE, 'starting_balance': 'lots'},
+    {'from_date': FROM_DATE, 'to_date': TO_DATE, 'starting_balance': -5},
+    {'from_date': FROM_DATE, 'to_date': TO_DATE, 'params': {'NOT_A_PARAMETER': 1}},
+    {'from_date': FROM_DATE, 'to_date': TO_DATE, 'params': [1]},
+    {'from_date': FROM_DATE, 'to_date': TO_DATE, 'refresh': 'yes'},
+    {'from_date': FROM_DATE, 'to_date': TO_DATE, 'workers': 4}
+])
+def test_invalid_backtest_params_are_rejected_before_running(service, loads, params):
+    response = rpc(service, {'jsonrpc': '2.0', 'id': 7, 'method': 'backtest', 'params': params})
+    assert response['id'] == 7 and response['error']['code'] == backtest.RPC_INVALID_PARAMS
+    assert service.status()['requests'] == 0 and loads == []
+
+def test_backtest_failures_are_server_errors(service, monkeypatch):
+    # A ValueError from inside the computation is the worker's failure, not the caller's
+    def fail(start_date, end_date):
+        raise ValueError('candidate cache is corrupt')
+    monkeypatch.setattr(backtest, 'load_strategy_dfs', fail)
+    response = rpc(service, {'jsonrpc': '2.0', 'id': 1, 'method': 'backtest', 'params': {'from_date': FROM_DATE, 'to_date': TO_DATE}})
+    assert response['error'] == {'code': backtest.RPC_SERVER_ERROR, 'message': 'candidate cache is corrupt'}
+    assert service.status()['errors'] == 1
+
+@pytest.mark.parametrize('request_', [
+    {'jsonrpc': '2.0', 'method': 'ping'},
+    {'jsonrpc': '2.0', 'method': 'optimize'},
+    {'jsonrpc': '2.0', 'method': 'backtest', 'params': {'from_date': FROM_DATE}},
+    {'jsonrpc': '2.0', 'method': 'backtest', 'params': {'from_date': FROM_DATE, 'to_date': TO_DATE}}
+])
+def test_notifications_get_no_response(service, request_):
+    assert backtest.handle_rpc_request(service, json.dumps(request_)) is None
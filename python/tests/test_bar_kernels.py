@@ -0,0 +1,42 @@
+import os
+import random
+
+import pandas as pd
+import pytest
+
+# CI sets BACKTEST_REQUIRE_NUMBA so a missing Numba fails the run instead of skipping the cross-check
+if os.environ.get('BACKTEST_REQUIRE_NUMBA'):
+    import numba
+else:
+    pytest.importorskip('numba')
+
+import Consolidated_Backtest_June_2025 as backtest
+from tests.synthetic import generate_synthetic_day, results_match
+
+DATE = pd.Timestamp('2024-06-04')
+
+# Each bar_kernel and the simulator that drives it
+KERNEL_SIMULATORS = {
+    'backside_bar_kernel': lambda df: backtest.simulate_backside_trade_mac(df, 'TEST', DATE, 100000.0, 0, 0, 100000.0),
+    'intraday_backside_bar_kernel': lambda df: backtest.simulate_intraday_backside_trade(df, 'TEST', DATE, 100000.0, 0, 0, 100000.0)
+}
+
+def simulate(kernel, seed, compiled, monkeypatch):
+    monkeypatch.setattr(backtest, 'USE_JIT_KERNELS', compiled)
+    random.seed(seed)
+    bars, _ = generate_synthetic_day(seed)
+    return KERNEL_SIMULATORS[kernel](backtest.preprocess_data(bars))
+
+@pytest.mark.parametrize('kernel', sorted(KERNEL_SIMULATORS))
+def test_kernel_is_compiled(kernel):
+    assert getattr(backtest, kernel) is not getattr(backtest, kernel).py_func
+
+@pytest.mark.parametrize('kernel', sorted(KERNEL_SIMULATORS))
+@pytest.mark.parametrize('seed', range(50))
+def test_compiled_kernel_matches_py_func(kernel, seed, monkeypatch):
+    assert results_match(simulate(kernel, seed, True, monkeypatch), simulate(kernel, seed, False, monkeypatch))
+
+@pytest.mark.parametrize('kernel', sorted(KERNEL_SIMULATORS))
+def test_synthetic_days_trade(kernel, monkeypatch):
+    # Otherwise the comparison above would only ever see two empty results
+    assert any(simulate(kernel, seed, False, monkeypatch) for seed in range(50))
@@ -0,0 +1,54 @@
+import logging
+import random
+
+import pandas as pd
+import pytest
+
+import Consolidated_Backtest_June_2025 as backtest
+from tests.synthetic import generate_synthetic_day, results_match
+
+DATE = pd.Timestamp('2024-06-04')
+
+@pytest.fixture
+def explained(monkeypatch, caplog):
+    """The [explain] lines the Backside simulator logs for a synthetic day."""
+    monkeypatch.setattr(backtest, 'EXPLAIN_TRADES', True)
+
+    def explain(seed):
+        bars, _ = generate_synthetic_day(seed)
+        random.seed(seed)
+        caplog.clear()
+        with caplog.at_level(logging.INFO):
+            trades = backtest.simulate_backside_trade_mac(backtest.preprocess_data(list(bars)), 'TEST', DATE, 100000.0, 0, 3e6, 100000.0)
+        lines = [record.getMessage() for record in caplog.records if record.getMessage().startswith('[explain]')]
+        return trades, lines
+    return explain
+
+def test_backside_trigger_reasons(explained):
+    trades, lines = explained(1)
+    assert trades[0]['trigger_candle_index'] == 413
+    prefix = '[explain] Backside TEST @ 2024-06-04 11:01:00-04:00: '
+    assert [line for line in lines if line.startswith(prefix)] == [prefix + reason for reason in (
+        'Current close (4.80) not below open 20 bars ago (4.39)',
+        'Stuff Window 2 conditions met',
+        'High (5.02) not more than $0.20 above open (4.84)',
+        'High is not equal to high of day',
+        'All STUFF trigger conditions met',
+        'Trigger detected: trigger_price=4.7988, will enter next candle'
+    )]
+
+def test_explain_mode_does_not_change_trades(explained, monkeypatch):
+    trades, _ = explained(1)
+    monkeypatch.setattr(backtest, 'EXPLAIN_TRADES', False)
+    untraced, lines = explained(1)
+    assert results_match(untraced, trades) and lines == []
+
+def test_explain_follows_swept_window_parameters(explained, monkeypatch):
+    # Every trigger the simulator fires under other look-backs is explained with those look-backs
+    monkeypatch.setattr(backtest, 'STUFF_WINDOW_LOOKBACK', 12)
+    monkeypatch.setattr(backtest, 'STUFF_WINDOW_2_LOOKBACK', 3)
+    lines = [line for seed in range(10) for line in explained(seed)[1]]
+    triggers = [line for line in lines if 'Trigger detected' in line]
+    assert triggers and len([line for line in lines if 'All STUFF trigger conditions met' in line]) == len(triggers)
+    assert any(' 12 bars ago' in line for line in lines) and any(' 3 bars ago' in line for line in lines)
+    assert not any(' 20 bars ago' in line or ' 5 bars ago' in line for line in lines)
@@ -0,0 +1,57 @@
+import random
+
+import pandas as pd
+import pytest
+
+import Consolidated_Backtest_June_2025 as backtest
+
+DATE = pd.Timestamp('2024-06-04')
+KEY = (DATE, 'TEST', 'Backside')
+
+@pytest.fixture(autouse=True)
+def random_slippage(monkeypatch):
+    monkeypatch.setattr(backtest, 'slippage_probability', 70)
+    monkeypatch.setattr(backtest, 'min_slippage_percentage', 0.1)
+    monkeypatch.setattr(backtest, 'max_slippage_percentage', 2.0)
+
+def fills(stream_key, leg=0, count=20):
+    """Entry and exit fills of one leg, as FillModel prices them on a fresh model."""
+    fill_model = backtest.FillModel(stream_key=stream_key)
+    return [fill_model.fill_price(10.0, is_entry=index % 2 == 0, halt=index % 5 == 4, leg=leg) for index in range(count)]
+
+def test_stream_does_not_depend_on_processing_order():
+    first = fills(KEY)
+    assert len(set(first)) > 2
+
+    # Other ticker-days, strategies and legs draw in between, as they would in another order or process
+    random.seed(0)
+    for other in ((DATE, 'OTHER', 'Backside'), (DATE, 'TEST', 'Gapper'), (DATE + pd.Timedelta(days=1), 'TEST', 'Backside')):
+        fills(other)
+    fills(KEY, leg=1)
+    random.random()
+
+    assert fills(KEY) == first
+    # Legs of one model keep their own streams however their fills interleave
+    fill_model = backtest.FillModel(stream_key=KEY)
+    interleaved = {0: [], 1: []}
+    for index in range(20):
+        for leg in (1, 0):
+            interleaved[leg].append(fill_model.fill_price(10.0, is_entry=index % 2 == 0, halt=index % 5 == 4, leg=leg))
+    assert interleaved[0] == first and interleaved[1] == fills(KEY, leg=1)
+
+@pytest.mark.parametrize('other', [
+    (DATE, 'TEST', 'Backside', 1),
+    (DATE, 'TSET', 'Backside', 0),
+    (DATE, 'TEST', 'Intraday Backside', 0),
+    (DATE + pd.Timedelta(days=1), 'TEST', 'Backside', 0)
+])
+def test_each_key_has_its_own_stream(other):
+    assert fills(other[:3], leg=other[3]) != fills(KEY)
+
+def test_execution_seed_keys_every_stream(monkeypatch):
+    first = fills(KEY)
+    monkeypatch.setattr(backtest, 'EXECUTION_SEED', backtest.EXECUTION_SEED + 1)
+    assert fills(KEY) != first
+
+def test_date_type_does_not_matter():
+    assert fills((DATE.date(), 'TEST', 'Backside')) == fills((str(DATE.date()), 'TEST', 'Backside')) == fills(KEY)
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import Consolidated_Backtest_June_2025 as backtest
+from tests.synthetic import DATES
+
+@pytest.fixture
+def recorded_run(strategy_dfs, monkeypatch):
+    """A backtest whose trades the Monte Carlo re-prices, under the repo's fixed 0.66% slippage."""
+    monkeypatch.setattr(backtest, 'slippage_probability', 100)
+    monkeypatch.setattr(backtest, 'min_slippage_percentage', 0.66)
+    monkeypatch.setattr(backtest, 'max_slippage_percentage', 0.66)
+    run = backtest.run_trading_days(DATES, strategy_dfs, 100000.0, show_progress=False)
+    assert {trade['strategy'] for trade in run['trades']} == {'Gapper', 'Backside', 'Intraday Backside'}
+    return run
+
+def test_deterministic_fills_reproduce_the_recorded_return(recorded_run, output_dir):
+    monte_carlo = backtest.run_monte_carlo(recorded_run['trades'], 100000.0, paths=20, seed=1)
+    recorded_return = (recorded_run['final_balance'] / 100000.0 - 1) * 100
+    assert monte_carlo['paths']['total_return_pct'].to_numpy() == pytest.approx(np.full(20, recorded_return), abs=1e-9)
+    recorded_drawdown = backtest.summarize_run(recorded_run, 100000.0)['max_drawdown_pct']
+    assert monte_carlo['paths']['max_drawdown_pct'].to_numpy() == pytest.approx(np.full(20, recorded_drawdown), abs=1e-9)
+    assert (output_dir / 'monte_carlo_paths.csv').exists() and (output_dir / 'monte_carlo_summary.csv').exists()
+
+def test_fixed_seed_gives_identical_paths(recorded_run, output_dir, monkeypatch):
+    monkeypatch.setattr(backtest, 'min_slippage_percentage', 0.1)
+    monkeypatch.setattr(backtest, 'max_slippage_percentage', 2.0)
+    monkeypatch.setattr(backtest, 'skip_trade_probability', 10)
+    paths = backtest.run_monte_carlo(recorded_run['trades'], 100000.0, paths=300, seed=7, chunk_size=128)['paths']
+    pd.testing.assert_frame_equal(paths, backtest.run_monte_carlo(recorded_run['trades'], 100000.0, paths=300, seed=7, chunk_size=128)['paths'])
+    assert paths['total_return_pct'].nunique() > 1
+    assert not paths.equals(backtest.run_monte_carlo(recorded_run['trades'], 100000.0, paths=300, seed=8, chunk_size=128)['paths'])
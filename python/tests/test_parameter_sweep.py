@@ -0,0 +1,62 @@
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+import Consolidated_Backtest_June_2025 as backtest
+from tests.synthetic import DATES
+
+SPEC = {'grid': {'MIN_PULLBACK_PERCENT': [10, 15], 'STUFF_WINDOW_LOOKBACK': [15, 20],
+                 'INTRADAY_BACKSIDE_PARAMS.MIN_PRICE_MOVE_PERCENT': [70]}}
+
+def sweep(strategy_dfs, workers, spec=SPEC):
+    return backtest.run_parameter_sweep(DATES, strategy_dfs, 100000.0, spec, workers)
+
+def test_apply_parameters_restores():
+    before = backtest.current_parameters()
+    previous = backtest.apply_parameters({'MIN_PULLBACK_PERCENT': 3, 'INTRADAY_BACKSIDE_PARAMS.MIN_VOLUME': 1})
+    assert backtest.MIN_PULLBACK_PERCENT == 3 and backtest.INTRADAY_BACKSIDE_PARAMS['MIN_VOLUME'] == 1
+    backtest.apply_parameters(previous)
+    assert backtest.current_parameters() == before
+
+@pytest.mark.parametrize('name', ['NOT_A_PARAMETER', 'cache_dir', 'POLYGON_API_KEY', 'INTRADAY_BACKSIDE_PARAMS.NOT_A_KEY'])
+def test_apply_parameters_rejects_unknown_names(name):
+    before = backtest.current_parameters()
+    with pytest.raises(ValueError, match=name.split('.')[-1]):
+        backtest.apply_parameters({'MIN_PULLBACK_PERCENT': 3, name: 1})
+    assert backtest.current_parameters() == before
+
+def test_expand_grid_spec():
+    configs = backtest.expand_sweep_spec({'grid': {'A': [1, 2], 'B': ['x', 'y', 'z']}})
+    assert configs == [{'A': a, 'B': b} for a in (1, 2) for b in ('x', 'y', 'z')]
+
+def test_expand_random_spec():
+    spec = {'random': {'A': [1, 5], 'B': [0.5, 1.5]}, 'samples': 8, 'seed': 3}
+    configs = backtest.expand_sweep_spec(spec)
+    assert configs == backtest.expand_sweep_spec(spec) and len(configs) == 8
+    assert all(isinstance(config['A'], int) and 1 <= config['A'] <= 5 and 0.5 <= config['B'] <= 1.5 for config in configs)
+    with pytest.raises(ValueError):
+        backtest.expand_sweep_spec({'samples': 8})
+
+def test_sweep_rows_match_direct_runs(strategy_dfs, output_dir):
+    results = sweep(strategy_dfs, workers=1)
+    assert len(results) == 4 and (output_dir / 'parameter_sweep_results.csv').exists()
+    assert results['total_return_pct'].is_monotonic_decreasing and results['total_return_pct'].nunique() > 1
+
+    before = backtest.current_parameters()
+    day_data = backtest.load_sweep_data(DATES, strategy_dfs)
+    for row in results.to_dict('records'):
+        params = backtest.expand_sweep_spec(SPEC)[row['config']]
+        run = backtest.run_with_parameters(params, DATES, strategy_dfs, 100000.0, day_data)
+        expected = {**params, **backtest.summarize_run(run, 100000.0)}
+        assert {name: row[name] for name in expected} == expected
+    assert backtest.current_parameters() == before
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='workers only see the patched fetchers when forked')
+def test_sweep_workers_match_in_process(strategy_dfs, output_dir):
+    pd.testing.assert_frame_equal(sweep(strategy_dfs, workers=3), sweep(strategy_dfs, workers=1))
+
+def test_sweep_rejects_unknown_parameters_before_loading(strategy_dfs, output_dir, monkeypatch):
+    monkeypatch.setattr(backtest, 'load_sweep_data', lambda *args: pytest.fail('loaded data for a bad spec'))
+    with pytest.raises(ValueError, match='NOT_A_PARAMETER'):
+        sweep(strategy_dfs, workers=1, spec={'grid': {'MIN_PULLBACK_PERCENT': [10], 'NOT_A_PARAMETER': [1]}})
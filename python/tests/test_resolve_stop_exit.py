@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+import Consolidated_Backtest_June_2025 as backtest
+
+STOP = 10.0
+
+def bars(rows, gaps=()):
+    """(open, high, low) rows one minute apart, with a HALT_GAP_SECONDS-plus gap before each bar in gaps."""
+    minutes = np.arange(len(rows)) + np.cumsum([10 if bar in gaps else 0 for bar in range(len(rows))])
+    o, h, l = (np.array(column, dtype=np.float64) for column in zip(*rows))
+    return minutes.astype(np.int64) * backtest.MS_PER_MINUTE, o, h, l
+
+def resolve(rows, gaps=(), **kwargs):
+    return backtest.resolve_stop_exit(*bars(rows, gaps), 1, STOP, **kwargs)
+
+def test_stop_hit_intrabar_fills_at_the_stop():
+    exit = resolve([(8, 8, 8), (8, 9, 7.5), (8.5, 10.2, 8), (9, 11, 9)])
+    assert (exit['bar'], exit['reason'], exit['price'], exit['halt_bar']) == (2, backtest.EVENT_STOP, STOP, -1)
+
+def test_stop_gapped_through_fills_at_the_open():
+    exit = resolve([(8, 8, 8), (8, 9, 7.5), (10.5, 10.8, 10.2), (9, 9, 9)])
+    assert (exit['bar'], exit['reason'], exit['price']) == (2, backtest.EVENT_STOP, 10.5)
+
+def test_stop_on_open_also_checks_opens():
+    # A bar whose high is below its open only hits the stop through stop_on_open
+    rows = [(8, 8, 8), (8, 9, 7.5), (10.5, 9.9, 9.5), (9, 9, 9)]
+    assert resolve(rows)['bar'] == -1
+    exit = resolve(rows, stop_on_open=True)
+    assert (exit['bar'], exit['reason'], exit['price']) == (2, backtest.EVENT_STOP, 10.5)
+
+def test_stop_never_hit():
+    exit = resolve([(8, 8, 8), (8, 9, 7.5), (8.5, 9.9, 8)])
+    assert exit['bar'] == -1 and exit['reason'] == backtest.EVENT_DONE and np.isnan(exit['price'])
+    assert exit['halt_bar'] == -1 and exit['trailing_bar'] == -1
+
+def test_first_bar_is_the_scan_start():
+    # The entry bar itself is never checked
+    exit = resolve([(8, 12, 8), (8, 9, 7.5), (8, 9, 7.5)])
+    assert exit['bar'] == -1
+
+@pytest.mark.parametrize('halt_exit,gap_open,reason', [
+    ('gap_open', 10.0, backtest.EVENT_HALT_STOP),
+    ('gap_open', 11.0, backtest.EVENT_HALT_STOP),
+    ('gap_open_above', 10.0, backtest.EVENT_STOP),
+    ('gap_open_above', 11.0, backtest.EVENT_HALT_STOP)
+])
+def test_gap_open_modes(halt_exit, gap_open, reason):
+    exit = resolve([(8, 8, 8), (8, 9, 7.5), (gap_open, gap_open, 9)], gaps=(2,), halt_exit=halt_exit)
+    assert (exit['bar'], exit['reason'], exit['price'], exit['halt_bar']) == (2, reason, gap_open, 2)
+
+def test_gap_below_the_stop_is_not_a_halt_exit():
+    exit = resolve([(8, 8, 8), (8, 9, 7.5), (9, 9.5, 9), (9.5, 10.5, 9)], gaps=(2,), halt_exit='gap_open')
+    assert (exit['bar'], exit['reason'], exit['price'], exit['halt_bar']) == (3, backtest.EVENT_STOP, STOP, 2)
+
+@pytest.mark.parametrize('gaps,halted,reason', [
+    ((), False, backtest.EVENT_STOP),
+    ((2,), False, backtest.EVENT_HALT_STOP),
+    ((), True, backtest.EVENT_HALT_STOP),
+    ((4,), False, backtest.EVENT_STOP)  # a gap after the exit does not count
+])
+def test_sticky_halt_mode(gaps, halted, reason):
+    rows = [(8, 8, 8), (8, 9, 7.5), (9, 9.5, 9), (9.5, 10.5, 9), (9, 9, 9)]
+    exit = resolve(rows, gaps=gaps, halt_exit='sticky', halted=halted)
+    assert (exit['bar'], exit['reason'], exit['price']) == (3, reason, STOP)
+
+def test_trailing_stop_replaces_the_stop_once_armed():
+    rows = [(10, 10, 10), (9.8, 9.9, 9.5), (8.7, 8.9, 8.5), (8.8, 9.0, 8.7), (8.9, 10.5, 8.8)]
+    exit = resolve(rows, entry_price=10.0, trailing_activation_pct=0.1, trailing_distance_pct=0.05)
+    # Armed on bar 2 (low 8.5 is 15% below entry); the trail is 8.5 * 1.05 and bar 3's high clears it
+    assert (exit['bar'], exit['reason'], exit['trailing_bar']) == (3, backtest.EVENT_TRAILING_STOP, 2)
+    assert exit['price'] == pytest.approx(8.5 * 1.05)
+
+def test_trailing_stop_not_armed_keeps_the_stop():
+    rows = [(10, 10, 10), (9.8, 9.9, 9.5), (9.6, 10.5, 9.4)]
+    exit = resolve(rows, entry_price=10.0, trailing_activation_pct=0.1, trailing_distance_pct=0.05)
+    assert (exit['bar'], exit['reason'], exit['price'], exit['trailing_bar']) == (2, backtest.EVENT_STOP, STOP, -1)
+
+def test_cutoff_exits_at_the_cutoff_price():
+    rows = [(8, 8, 8), (8, 9, 7.5), (8.5, 9, 8), (8.5, 9, 8)]
+    cutoff = np.array([False, False, True, True])
+    exit = resolve(rows, cutoff=cutoff, cutoff_price=np.array([1.0, 2.0, 3.0, 4.0]), cutoff_event=backtest.EVENT_TIME_CUTOFF)
+    assert (exit['bar'], exit['reason'], exit['price']) == (2, backtest.EVENT_TIME_CUTOFF, 3.0)
+
+def test_stop_beats_the_cutoff_on_the_same_bar():
+    rows = [(8, 8, 8), (8, 9, 7.5), (8.5, 10.5, 8), (8.5, 9, 8)]
+    cutoff = np.array([False, False, True, True])
+    exit = resolve(rows, cutoff=cutoff, cutoff_price=np.array([1.0, 2.0, 3.0, 4.0]))
+    assert (exit['bar'], exit['reason'], exit['price']) == (2, backtest.EVENT_STOP, STOP)
+
+def test_halt_exit_beats_the_stop_on_the_same_bar():
+    exit = resolve([(8, 8, 8), (8, 9, 7.5), (10.5, 11, 10)], gaps=(2,), halt_exit='gap_open', stop_on_open=True)
+    assert (exit['reason'], exit['price']) == (backtest.EVENT_HALT_STOP, 10.5)
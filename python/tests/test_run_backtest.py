@@ -0,0 +1,90 @@
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+import Consolidated_Backtest_June_2025 as backtest
+from tests.synthetic import results_match
+
+@pytest.fixture
+def cli(loads, monkeypatch, capsys, tmp_path):
+    """Run the script's __main__ block against the patched module and return what it printed to stdout."""
+    with open(backtest.__file__) as f:
+        source = f.read()
+    main_start = source.index('\nif __name__ == "__main__":')
+    # Padded so tracebacks point at the script's own line numbers
+    main = compile('\n' * source[:main_start].count('\n') + source[main_start:], backtest.__file__, 'exec')
+
+    def run(argv):
+        module_globals = vars(backtest)
+        saved_globals = dict(module_globals)
+        root_logger = logging.getLogger('')
+        saved_handlers, saved_level = root_logger.handlers[:], root_logger.level
+        monkeypatch.chdir(tmp_path)  # for backtesting_log.txt
+        monkeypatch.setattr(sys, 'argv', ['Consolidated_Backtest_June_2025.py', *argv])
+        capsys.readouterr()
+        try:
+            # In the module's own namespace, so the settings main assigns reach the functions it calls
+            module_globals['__name__'] = '__main__'
+            exec(main, module_globals)
+        finally:
+            for handler in root_logger.handlers[:]:
+                if handler not in saved_handlers:
+                    root_logger.removeHandler(handler)
+                    handler.close()
+            for handler in saved_handlers:
+                if handler not in root_logger.handlers:
+                    root_logger.addHandler(handler)
+            root_logger.setLevel(saved_level)
+            module_globals.clear()
+            module_globals.update(saved_globals)
+        return capsys.readouterr().out
+    return run
+
+@pytest.mark.parametrize('from_date,to_date', [('2024-06-04', '2024-06-04'), ('2024-06-03', '2024-06-14')])
+def test_summary_matches_cli_json(cli, output_dir, from_date, to_date):
+    printed = cli(['--from-date', from_date, '--to-date', to_date, '--output-format', 'json'])
+    summary = backtest.run_backtest(from_date, to_date)['summary']
+    assert summary['total_net_profit'] != 0
+    assert results_match(json.loads(printed.splitlines()[-1]), json.loads(json.dumps(summary)))
+    # Nothing but the data cache is written, and a multi-day run's checkpoint is gone once it finishes
+    assert os.listdir(output_dir) == ['data_cache']
+
+def test_cli_reports_create_their_directories(cli, output_dir):
+    cli(['--from-date', '2024-06-03', '--to-date', '2024-06-14'])
+    written = set(os.listdir(output_dir))
+    assert {'combined_trade_results_with_caching.csv', 'ticker_analysis.csv', 'trade_charts'} <= written
+    assert not any(name.endswith('.pkl') for name in written)
+    assert os.listdir(output_dir / 'trade_charts')
+    try:
+        import openpyxl
+    except ImportError:
+        return
+    assert 'trading_summary.xlsx' in written
+
+def test_params_are_restored(loads):
+    before = backtest.current_parameters()
+    tuned = backtest.run_backtest('2024-06-03', '2024-06-07', params={'MIN_PULLBACK_PERCENT': 50,
+                                                                     'INTRADAY_BACKSIDE_PARAMS.MIN_VOLUME': 1})
+    assert backtest.current_parameters() == before
+    assert not results_match(tuned['summary'], backtest.run_backtest('2024-06-03', '2024-06-07')['summary'])
+
+def test_params_are_restored_when_the_run_raises(loads, monkeypatch):
+    before = backtest.current_parameters()
+    seen = []
+
+    def fail(*args, **kwargs):
+        seen.append(backtest.MIN_PULLBACK_PERCENT)
+        raise RuntimeError('disk full')
+    monkeypatch.setattr(backtest, 'run_trading_days', fail)
+    with pytest.raises(RuntimeError, match='disk full'):
+        backtest.run_backtest('2024-06-03', '2024-06-07', params={'MIN_PULLBACK_PERCENT': 10})
+    assert seen == [10] and backtest.current_parameters() == before
+
+def test_unknown_params_are_rejected_before_loading(loads):
+    before = backtest.current_parameters()
+    with pytest.raises(ValueError, match='NOT_A_PARAMETER'):
+        backtest.run_backtest('2024-06-03', '2024-06-07', params={'MIN_PULLBACK_PERCENT': 10, 'NOT_A_PARAMETER': 1})
+    assert loads == [] and backtest.current_parameters() == before
@@ -0,0 +1,49 @@
+import datetime
+import json
+import os
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Consolidated_Backtest_June_2025 as backtest
+from tests.synthetic import generate_synthetic_day
+
+# Trades the original per-candle simulators produced on these synthetic days (scalar fields only)
+with open(os.path.join(os.path.dirname(__file__), 'data', 'baseline_simulations.json')) as f:
+    BASELINE_DAYS = json.load(f)
+
+def recorded_value(value):
+    """A trade field the way baseline_simulations.json stores it."""
+    if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date, datetime.time)):
+        return str(value)
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    return value
+
+def simulate_day(day):
+    bars, previous_close = generate_synthetic_day(day['seed'], day['date'])
+    date = pd.Timestamp(day['date'])
+    random.seed(day['seed'])
+    gapper = backtest.simulate_gapper_trade(backtest.preprocess_data(list(bars)), 'TEST', date, 100000.0, previous_close,
+                                            day['pre_market_high'], 0, 3e6)
+    return {
+        'Gapper': [gapper] if gapper else [],
+        'Backside': backtest.simulate_backside_trade_mac(backtest.preprocess_data(list(bars)), 'TEST', date, 100000.0,
+                                                         0, 3e6, 100000.0) or [],
+        'Intraday Backside': backtest.simulate_intraday_backside_trade(backtest.preprocess_data(list(bars)), 'TEST', date,
+                                                                       100000.0, 0, 3e6, 100000.0) or []
+    }
+
+@pytest.mark.parametrize('day', BASELINE_DAYS, ids=lambda day: f"seed{day['seed']}")
+def test_simulators_match_baseline(day):
+    simulated = simulate_day(day)
+    for strategy in ('Gapper', 'Backside', 'Intraday Backside'):
+        assert len(simulated[strategy]) == len(day[strategy]), strategy
+        for trade, expected in zip(simulated[strategy], day[strategy]):
+            assert {name: recorded_value(trade[name]) for name in expected} == expected, strategy
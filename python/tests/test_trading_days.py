@@ -0,0 +1,98 @@
+import multiprocessing
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+import Consolidated_Backtest_June_2025 as backtest
+from tests.synthetic import DATES, results_match
+
+# Everything a run returns except its timing stats
+RUN_KEYS = ('trades', 'daily_account_sizes', 'daily_pnl_list', 'dates', 'final_balance', 'winning_trade_count',
+            'starting_balance')
+
+def run(strategy_dfs, dates=DATES, starting_balance=100000.0, **kwargs):
+    result = backtest.run_trading_days(dates, strategy_dfs, starting_balance, show_progress=False, **kwargs)
+    return {key: result[key] for key in RUN_KEYS}
+
+@pytest.fixture
+def sequential(strategy_dfs):
+    result = run(strategy_dfs)
+    assert result['trades'] and len(result['dates']) == len(DATES)
+    return result
+
+def test_prefetch_matches_sequential(strategy_dfs, sequential):
+    assert results_match(run(strategy_dfs, prefetch_depth=2), sequential)
+
+def test_prefetch_loads_only_what_the_run_reads(strategy_dfs, monkeypatch):
+    def loads(**kwargs):
+        fetched, featured = [], []
+        monkeypatch.setattr(backtest, 'fetch_intraday_data', lambda ticker, date: fetched.append((ticker, date)) or fetch(ticker, date))
+        monkeypatch.setattr(backtest, 'compute_signal_features',
+                            lambda bars, reference_price, profile: featured.append(reference_price) or compute(bars, reference_price, profile))
+        run(strategy_dfs, **kwargs)
+        return sorted(fetched), sorted(featured)
+
+    fetch, compute = backtest.fetch_intraday_data, backtest.compute_signal_features
+    sequential_loads = loads()
+    # Backside-only tickers are read on Mondays, so a run skipping them there would not test the filter
+    assert any(ticker == 'T3' for ticker, _ in sequential_loads[0])
+    assert loads(prefetch_depth=2) == sequential_loads
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='workers only see the patched fetchers when forked')
+@pytest.mark.parametrize('static_sizing', (True, False))
+def test_parallel_matches_sequential(strategy_dfs, monkeypatch, static_sizing):
+    monkeypatch.setattr(backtest, 'USE_STATIC_POSITION_SIZING', static_sizing)
+    assert results_match(run(strategy_dfs, workers=3), run(strategy_dfs))
+
+def test_resume_matches_sequential(strategy_dfs, sequential, tmp_path):
+    checkpoint_path = str(tmp_path / 'checkpoint.pkl')
+    run(strategy_dfs, dates=DATES[:4], checkpoint_path=checkpoint_path)
+    assert results_match(run(strategy_dfs, checkpoint_path=checkpoint_path, resume=True), sequential)
+
+def test_append_covers_the_whole_journal(strategy_dfs, sequential, tmp_path):
+    checkpoint_path = str(tmp_path / 'checkpoint.pkl')
+    run(strategy_dfs, dates=DATES[:6], checkpoint_path=checkpoint_path)
+    appended = run(strategy_dfs, dates=DATES[6:], starting_balance=5.0, checkpoint_path=checkpoint_path, resume=True)
+    assert results_match(appended, sequential)
+    assert len(appended['dates']) == len(appended['daily_pnl_list']) == len(appended['daily_account_sizes']) - 1
+
+def test_read_checkpoint_drops_a_torn_record(strategy_dfs, sequential, tmp_path):
+    checkpoint_path = str(tmp_path / 'checkpoint.pkl')
+    run(strategy_dfs, checkpoint_path=checkpoint_path)
+    intact = backtest.read_checkpoint(checkpoint_path)
+    assert intact['days'] == len(DATES) and intact['valid_bytes'] == os.path.getsize(checkpoint_path)
+
+    # Kill mid-write: the last record loses its tail
+    with open(checkpoint_path, 'r+b') as f:
+        f.truncate(intact['valid_bytes'] - 10)
+    torn = backtest.read_checkpoint(checkpoint_path)
+    assert torn['days'] == len(DATES) - 1 and torn['last_date'] == DATES[-2]
+    assert results_match(torn['trades'], [trade for trade in sequential['trades'] if pd.Timestamp(trade['date']) < DATES[-1]])
+
+    assert results_match(run(strategy_dfs, checkpoint_path=checkpoint_path, resume=True), sequential)
+    assert backtest.read_checkpoint(checkpoint_path)['days'] == len(DATES)
+
+def test_resume_rejects_changed_parameters(strategy_dfs, monkeypatch, tmp_path):
+    checkpoint_path = str(tmp_path / 'checkpoint.pkl')
+    run(strategy_dfs, dates=DATES[:2], checkpoint_path=checkpoint_path)
+    monkeypatch.setattr(backtest, 'MIN_PULLBACK_PERCENT', 10)
+    with pytest.raises(ValueError, match='MIN_PULLBACK_PERCENT'):
+        run(strategy_dfs, checkpoint_path=checkpoint_path, resume=True)
+
+# None stands for the per-range checkpoint in current_dir
+@pytest.mark.parametrize('argv,days,checkpoint_path,keep', [
+    ([], 5, None, False),
+    (['--resume'], 1, None, False),
+    (['--checkpoint', 'kept.pkl'], 1, 'kept.pkl', True),
+    (['--append-to', 'kept.pkl'], 5, 'kept.pkl', True)
+])
+def test_cli_checkpoint(argv, days, checkpoint_path, keep, monkeypatch, output_dir):
+    monkeypatch.setattr(sys, 'argv', ['backtest', '--from-date', '2024-06-03', '--to-date', '2024-06-07', *argv])
+    default = os.path.join(backtest.current_dir, 'backtest_checkpoint_2024-06-03_2024-06-07.pkl')
+    assert backtest.cli_checkpoint(backtest.parse_arguments(), DATES[:days]) == (checkpoint_path or default, keep)
+
+def test_single_day_cli_run_does_not_checkpoint(monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['backtest', '--from-date', '2024-06-03', '--to-date', '2024-06-03'])
+    assert backtest.cli_checkpoint(backtest.parse_arguments(), DATES[:1]) == (None, False)
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+import Consolidated_Backtest_June_2025 as backtest
+from tests.synthetic import DATES
+
+SPEC = {'grid': {'MIN_PULLBACK_PERCENT': [10, 15]}, 'train_days': 4, 'test_days': 2}
+
+@pytest.mark.parametrize('train_days,test_days', [(4, 2), (3, 3), (5, 1), (8, 4)])
+def test_folds_never_test_on_training_days(train_days, test_days):
+    folds = backtest.walk_forward_folds(DATES, train_days, test_days)
+    assert folds
+    for fold in folds:
+        assert len(fold['train']) == train_days and 0 < len(fold['test']) <= test_days
+        assert fold['train'][-1] < fold['test'][0]
+        assert fold['train'].intersection(fold['test']).empty
+    # Test windows tile the dates after the first training window, in order and without overlap
+    tested = [date for fold in folds for date in fold['test']]
+    assert tested == list(DATES[train_days:])
+
+def test_too_few_days_for_a_fold(strategy_dfs, output_dir):
+    assert backtest.walk_forward_folds(DATES, len(DATES), 2) == []
+    with pytest.raises(ValueError):
+        backtest.run_walk_forward(DATES, strategy_dfs, 100000.0, {**SPEC, 'train_days': len(DATES)}, workers=1)
+
+def test_equity_curve_is_out_of_sample_only(strategy_dfs, output_dir):
+    walk_forward = backtest.run_walk_forward(DATES, strategy_dfs, 100000.0, SPEC, workers=1)
+    folds = backtest.walk_forward_folds(DATES, SPEC['train_days'], SPEC['test_days'])
+    equity_curve = walk_forward['equity_curve']
+    assert list(equity_curve.index) == [date for fold in folds for date in fold['test']]
+    assert not equity_curve.index.isin(DATES[:SPEC['train_days']]).any()
+
+    # Each test window trades the chosen configuration from the balance the previous window ended with
+    balance = 100000.0
+    day_data = backtest.load_sweep_data(DATES, strategy_dfs)
+    for fold, row in zip(folds, walk_forward['folds'].to_dict('records')):
+        assert (row['test_start'], row['test_end']) == (fold['test'][0].date(), fold['test'][-1].date())
+        params = backtest.expand_sweep_spec(SPEC)[row['config']]
+        run = backtest.run_with_parameters(params, fold['test'], strategy_dfs, balance, day_data)
+        assert list(equity_curve[fold['test']]) == run['daily_account_sizes'][1:]
+        balance = run['final_balance']
+    assert walk_forward['summary']['final_balance'] == balance and walk_forward['summary']['trades'] > 0
+
+    for path in ('walk_forward_folds.csv', 'walk_forward_equity.csv', 'trade_charts/walk_forward_equity_curve.png'):
+        assert (output_dir / path).exists()